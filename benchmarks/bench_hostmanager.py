@@ -0,0 +1,124 @@
+"""
+Memory and throughput benchmark for HostManager.
+
+Compares the compact HostManager against the original list/dict based
+implementation, reproduced below as `LegacyHostManager`.
+
+Usage:
+    python -m benchmarks.bench_hostmanager --hosts 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from core.hostmanager import HostManager
+
+SERVICE_NAMES = ["http", "https", "ssh", "smb", "dns", "ftp", "mysql", "rdp"]
+
+
+class LegacyHostManager:
+    """The pre-compaction HostManager, kept as the benchmark baseline."""
+
+    def __init__(self, ip_address):
+        self.ip_address = ip_address
+        self.metadata = {
+            "created_at": self.get_current_time(),
+            "last_updated": self.get_current_time(),
+        }
+        self.services = {}
+        self.open_ports = []
+        self.scan_results = {}
+
+    @staticmethod
+    def get_current_time():
+        return datetime.now(timezone.utc).isoformat()
+
+    def update_metadata(self, key, value):
+        self.metadata[key] = value
+        self.metadata["last_updated"] = self.get_current_time()
+
+    def add_service(self, port, service_name):
+        self.services[port] = service_name
+        self.update_metadata("services_updated", True)
+
+    def add_open_port(self, port):
+        if port not in self.open_ports:
+            self.open_ports.append(port)
+            self.update_metadata("open_ports_updated", True)
+
+    def add_scan_result(self, scan_type, result):
+        self.scan_results[scan_type] = result
+        self.update_metadata(f"scan_{scan_type}_updated", True)
+
+    def update_from_scan(self, scan_type, scan_data):
+        self.add_scan_result(scan_type, scan_data)
+        for port in scan_data.get("ports", []):
+            self.add_open_port(port)
+        for port, service in scan_data.get("services", {}).items():
+            self.add_service(port, service)
+
+
+def make_scan(index, ports_per_host):
+    ports = [(index * 7 + offset * 131) % 65535 + 1 for offset in range(ports_per_host)]
+    # Build fresh strings the way a parser would, so interning has something to do
+    services = {port: "".join(SERVICE_NAMES[port % len(SERVICE_NAMES)]) for port in ports}
+    return {"ports": ports, "services": services}
+
+
+def ip_for(index):
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def measure(host_class, hosts, ports_per_host):
+    scans = [make_scan(index, ports_per_host) for index in range(hosts)]
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    inventory = []
+    for index, scan in enumerate(scans):
+        host = host_class(ip_for(index))
+        host.update_from_scan("port_scan", {"ports": scan["ports"], "services": scan["services"]})
+        inventory.append(host)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    lookups = time.perf_counter()
+    for index, host in enumerate(inventory):
+        host.add_open_port(scans[index]["ports"][0])
+    lookup_elapsed = time.perf_counter() - lookups
+    return {
+        "hosts": hosts,
+        "ports_per_host": ports_per_host,
+        "build_seconds": round(elapsed, 4),
+        "hosts_per_second": round(hosts / elapsed, 1),
+        "duplicate_port_checks_per_second": round(hosts / lookup_elapsed, 1),
+        "memory_bytes": current,
+        "bytes_per_host": round(current / hosts, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HostManager memory/throughput benchmark")
+    parser.add_argument("--hosts", type=int, default=100000)
+    parser.add_argument("--ports", type=int, default=20, help="Open ports per host")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {
+        "legacy": measure(LegacyHostManager, args.hosts, args.ports),
+        "compact": measure(HostManager, args.hosts, args.ports),
+    }
+    results["memory_ratio"] = round(results["compact"]["memory_bytes"] / results["legacy"]["memory_bytes"], 3)
+    results["speedup"] = round(results["legacy"]["build_seconds"] / results["compact"]["build_seconds"], 2)
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
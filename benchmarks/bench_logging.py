@@ -0,0 +1,93 @@
+"""
+Event-loop lag benchmark for the logging pipeline.
+
+Floods a logger from inside a running event loop, the way `handle_output`
+logs nmap output lines, and measures how late a periodic timer fires while
+that happens. Three setups are compared:
+
+    direct    FileHandler on the logger itself (the original create_logger)
+    queued    create_logger: QueueHandler plus a background listener thread
+    sampled   queued, with raw lines going through the rate-limited output logger
+
+Usage:
+    python -m benchmarks.bench_logging --lines 200000 --output bench_logging.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from core.metrics import LoopLagMonitor
+from utils.logger import FORMATTER, create_logger, create_output_logger, stop_logging
+
+
+def direct_logger(name, log_file):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(FORMATTER)
+    logger.addHandler(handler)
+    return logger
+
+
+async def flood(logger, lines, burst):
+    """Log `lines` messages in bursts of `burst`, yielding to the loop between bursts."""
+    monitor = LoopLagMonitor(interval=0.005)
+    monitor.start()
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    for index in range(lines):
+        logger.warning("scan_bench: NSE: [http-enum] line %d of noisy nmap output", index)
+        if index % burst == 0:
+            await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    lag = await monitor.stop()
+    return {
+        "loop_seconds": round(elapsed, 4),
+        "lines_per_second": round(lines / elapsed, 1),
+        "loop_lag": lag,
+    }
+
+
+def measure(mode, lines, burst, max_per_second, work_dir):
+    log_file = os.path.join(work_dir, f"{mode}.log")
+    if mode == "direct":
+        logger = direct_logger("bench.direct", log_file)
+    else:
+        logger = create_logger(f"bench.{mode}", log_file, console=False)
+        if mode == "sampled":
+            logger = create_output_logger(logger, max_per_second=max_per_second)
+
+    result = asyncio.run(flood(logger, lines, burst))
+    drained = time.perf_counter()
+    stop_logging()
+    result["drain_seconds"] = round(time.perf_counter() - drained, 4)
+    with open(log_file) as file:
+        result["lines_written"] = sum(1 for _ in file)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging pipeline event-loop lag benchmark")
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--burst", type=int, default=100, help="Lines logged between yields to the loop")
+    parser.add_argument("--max-per-second", type=float, default=50, help="Rate limit of the sampled mode")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = {
+            mode: measure(mode, args.lines, args.burst, args.max_per_second, work_dir)
+            for mode in ("direct", "queued", "sampled")
+        }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
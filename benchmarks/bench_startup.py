@@ -0,0 +1,107 @@
+"""
+Cold-start benchmark for main.py.
+
+Each scenario runs in a fresh interpreter several times:
+
+    help        `python main.py --help`
+    construct   import main and build a ScanManager and WorkflowManager, as a run with -t does
+    instances   build 50 ScanManagers in one process (exercises the shared config cache)
+
+The median wall time of each scenario is compared with its budget; the
+script exits with status 1 when a budget is exceeded so it can gate CI. The
+slowest imports of the construct scenario are listed to show where time goes.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 10 --output bench_startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONSTRUCT = """
+import asyncio, main
+from core.scanmanager import ScanManager
+from core.workflowmanager import WorkflowManager
+scan_manager = ScanManager()
+WorkflowManager(scan_manager, results_dir="results", workflow_targets=["10.0.0.0/24"])
+"""
+
+INSTANCES = """
+from core.scanmanager import ScanManager
+for _ in range(50):
+    ScanManager()
+"""
+
+SCENARIOS = {
+    "help": ([os.path.join(ROOT, "main.py"), "--help"], 150.0),
+    "construct": (["-c", CONSTRUCT], 250.0),
+    "instances": (["-c", INSTANCES], 400.0),
+}
+
+
+def run_once(arguments, extra=()):
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, *extra, *arguments], cwd=ROOT, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"{arguments} failed:\n{completed.stderr}")
+    return elapsed, completed.stderr
+
+
+def slowest_imports(arguments, count):
+    """Parse `-X importtime` output and return the modules with the largest cumulative import time."""
+    _, stderr = run_once(arguments, extra=("-X", "importtime"))
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only top-level entries (indented once); nested imports are included in their parent's time
+        if not name[1:].startswith(" "):
+            imports.append({"module": name.strip(), "cumulative_ms": round(int(cumulative) / 1000, 2)})
+    return sorted(imports, key=lambda entry: entry["cumulative_ms"], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--scale-budget", type=float, default=1.0, help="Multiply every budget (slow machines)")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"runs": args.runs, "scenarios": {}}
+    over_budget = []
+    for name, (arguments, budget) in SCENARIOS.items():
+        run_once(arguments)  # Warm the filesystem cache and bytecode
+        timings = [run_once(arguments)[0] for _ in range(args.runs)]
+        median = statistics.median(timings)
+        budget *= args.scale_budget
+        results["scenarios"][name] = {
+            "median_ms": round(median, 1),
+            "min_ms": round(min(timings), 1),
+            "max_ms": round(max(timings), 1),
+            "budget_ms": budget,
+            "within_budget": median <= budget,
+        }
+        if median > budget:
+            over_budget.append(name)
+    results["slowest_imports"] = slowest_imports(SCENARIOS["construct"][0], args.top)
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
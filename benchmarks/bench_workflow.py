@@ -0,0 +1,196 @@
+"""
+End-to-end orchestration benchmark.
+
+Runs `WorkflowManager.execute_workflow` against synthetic networks with
+`benchmarks/fake_nmap.py` standing in for nmap, so the numbers measure the
+framework's own overhead: scheduling, subprocess handling, parsing and
+result bookkeeping. Each network size runs in a fresh process.
+
+Reported per size: wall time, peak RSS of the orchestrator and of the fake
+nmap processes, event-loop lag, number of (and peak concurrent) subprocesses
+and host results per second.
+
+Usage:
+    python -m benchmarks.bench_workflow --sizes 1000 10000 100000 --batch --output bench.json
+    python -m benchmarks.bench_workflow --sizes 1000 --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+FAKE_NMAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_nmap.py")
+
+
+def network_for(size, base="10.0.0.0"):
+    """Smallest CIDR block holding at least `size` addresses."""
+    prefix = 32 - max(0, math.ceil(math.log2(max(size, 1))))
+    return f"{base}/{prefix}"
+
+
+def subprocess_stats(log_path):
+    """Count fake nmap invocations and their peak concurrency from the invocation log."""
+    if not os.path.exists(log_path):
+        return {"count": 0, "peak_concurrent": 0}
+    events = []
+    with open(log_path) as log:
+        for line in log:
+            kind, timestamp = line.split()
+            events.append((float(timestamp), 1 if kind == "start" else -1))
+    running = peak = 0
+    # Ends sort before starts at the same timestamp
+    for _, delta in sorted(events, key=lambda event: (event[0], event[1])):
+        running += delta
+        peak = max(peak, running)
+    return {"count": sum(1 for _, delta in events if delta == 1), "peak_concurrent": peak}
+
+
+async def run_workflow(size, options, work_dir):
+    from core.scanmanager import ScanManager
+    from core.workflowmanager import WorkflowManager
+    from core.resultstore import ResultsWriter, SQLiteResultsStore
+    from core.metrics import LoopLagMonitor
+    from core.checkpoint import CheckpointJournal
+
+    scan_manager = ScanManager(path=FAKE_NMAP)
+    results = {"count": 0}
+    scan_manager.host_callbacks.append(lambda scan_id, scan_type, ip, details: results.__setitem__(
+        "count", results["count"] + 1))
+    results_writer = None
+    if options["store"]:
+        results_writer = ResultsWriter([SQLiteResultsStore(os.path.join(work_dir, "aether.db"))])
+    workflow_manager = WorkflowManager(
+        scan_manager,
+        results_dir=work_dir,
+        workflow_targets=[network_for(size)],
+        pipelined=options["pipeline"],
+        batch_scans=options["batch"],
+        results_writer=results_writer,
+        checkpoint=CheckpointJournal(os.path.join(work_dir, "checkpoint.jsonl")) if options["checkpoint"] else None,
+    )
+
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    started = time.perf_counter()
+    await workflow_manager.execute_workflow()
+    wall = time.perf_counter() - started
+    lag = await monitor.stop()
+    await scan_manager.shutdown()
+    return {
+        "wall_seconds": round(wall, 3),
+        "hosts_discovered": len(workflow_manager.workflow_hosts),
+        "results": results["count"],
+        "results_per_second": round(results["count"] / wall, 1),
+        "scan_errors": len(scan_manager.errors),
+        "loop_lag": lag,
+        "metrics": scan_manager.metrics.summary()["scan_types"],
+    }
+
+
+def run_size(size, options):
+    """Benchmark one network size; runs in its own process so peak RSS is per size."""
+    os.environ.update({f"FAKE_NMAP_{key.upper()}": str(value) for key, value in options["fake_nmap"].items()})
+    with tempfile.TemporaryDirectory() as work_dir:
+        log_path = os.environ["FAKE_NMAP_LOG"] = os.path.join(work_dir, "invocations.log")
+        result = asyncio.run(run_workflow(size, options, work_dir))
+        result["subprocesses"] = subprocess_stats(log_path)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    result["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    result["peak_child_rss_bytes"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {"size": size, "network": network_for(size), **result}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """Ratios of current to baseline for sizes present in both runs (>1 means slower / more)."""
+    previous = {run["size"]: run for run in baseline["runs"]}
+    comparison = []
+    for run in current["runs"]:
+        before = previous.get(run["size"])
+        if before is None:
+            continue
+        comparison.append({
+            "size": run["size"],
+            "wall_ratio": round(run["wall_seconds"] / before["wall_seconds"], 3),
+            "results_per_second_ratio": round(run["results_per_second"] / max(before["results_per_second"], 1e-9), 3),
+            "peak_rss_ratio": round(run["peak_rss_bytes"] / before["peak_rss_bytes"], 3),
+            "max_loop_lag_ms_delta": round(run["loop_lag"]["max_ms"] - before["loop_lag"]["max_ms"], 3),
+        })
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workflow orchestration benchmark with a fake nmap")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Number of addresses in each synthetic network")
+    parser.add_argument("--pipeline", action="store_true", help="Run the workflow pipelined")
+    parser.add_argument("--batch", action="store_true", help="Batch vulnerability scans")
+    parser.add_argument("--store", action="store_true", help="Also write results to a SQLite store")
+    parser.add_argument("--checkpoint", action="store_true", help="Journal progress to a checkpoint file")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake nmap seconds per invocation")
+    parser.add_argument("--host-latency", type=float, default=0.0, help="Fake nmap seconds per target address")
+    parser.add_argument("--up-ratio", type=float, default=0.25, help="Fraction of addresses reported up")
+    parser.add_argument("--ports", type=int, default=3, help="Open ports per up host")
+    parser.add_argument("--output-bytes", type=int, default=0, help="Script output bytes per up host")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of failing nmap invocations")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    os.chmod(FAKE_NMAP, 0o755)
+    options = {
+        "pipeline": args.pipeline,
+        "batch": args.batch,
+        "store": args.store,
+        "checkpoint": args.checkpoint,
+        "fake_nmap": {
+            "latency": args.latency,
+            "host_latency": args.host_latency,
+            "up_ratio": args.up_ratio,
+            "ports": args.ports,
+            "output_bytes": args.output_bytes,
+            "failure_rate": args.failure_rate,
+        },
+    }
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "options": options,
+        "runs": [],
+    }
+    for size in args.sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            run = pool.submit(run_size, size, options).result()
+        results["runs"].append(run)
+        print(json.dumps(run), file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as file:
+            results["comparison"] = compare(results, json.load(file))
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-in for the nmap binary, used by the orchestration benchmarks.
+
+It accepts any nmap command line, treats every IP/CIDR argument as a target
+and writes nmap-style XML to stdout. Whether a host is up, its open ports and
+whether an invocation fails are derived from a hash of the target, so the same
+command always produces the same output.
+
+Behaviour is configured through environment variables:
+    FAKE_NMAP_LATENCY        Seconds slept per invocation (default 0.05).
+    FAKE_NMAP_HOST_LATENCY   Extra seconds slept per target address (default 0).
+    FAKE_NMAP_UP_RATIO       Fraction of addresses reported up (default 0.25).
+    FAKE_NMAP_PORTS          Open ports reported per up host (default 3).
+    FAKE_NMAP_OUTPUT_BYTES   Bytes of NSE script output added per up host (default 0).
+    FAKE_NMAP_FAILURE_RATE   Fraction of invocations that exit with status 1 (default 0).
+    FAKE_NMAP_LOG            If set, a start and an end line per invocation are appended here.
+"""
+import ipaddress
+import os
+import sys
+import time
+import zlib
+
+SERVICES = {22: "ssh", 80: "http", 443: "https", 445: "microsoft-ds", 3306: "mysql", 3389: "ms-wbt-server",
+            8080: "http-proxy", 21: "ftp"}
+PORTS = sorted(SERVICES)
+
+
+def setting(name, default):
+    return type(default)(os.environ.get(f"FAKE_NMAP_{name}", default))
+
+
+def fraction(key):
+    """Map a string to a stable value in [0, 1)."""
+    return zlib.crc32(key.encode()) / 2 ** 32
+
+
+def parse_targets(argv):
+    networks = []
+    for arg in argv:
+        if "." not in arg and ":" not in arg:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(arg, strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def addresses(network):
+    if network.num_addresses == 1:
+        yield str(network.network_address)
+    else:
+        for address in network.hosts():
+            yield str(address)
+
+
+def host_xml(ip_address, ports, script_bytes):
+    ports_xml = []
+    for port in ports:
+        script = ""
+        if script_bytes:
+            script = f'<script id="fake-script" output="{"x" * script_bytes}"/>'
+        ports_xml.append(
+            f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+            f'<service name="{SERVICES[port]}"/>{script}</port>'
+        )
+    return (
+        f'<host><status state="up"/><address addr="{ip_address}" addrtype="ipv4"/>'
+        f'<ports>{"".join(ports_xml)}</ports></host>\n'
+    )
+
+
+def main(argv):
+    log_path = os.environ.get("FAKE_NMAP_LOG")
+    if log_path:
+        with open(log_path, "a") as log:
+            log.write(f"start {time.time()}\n")
+    try:
+        return run(argv)
+    finally:
+        if log_path:
+            with open(log_path, "a") as log:
+                log.write(f"end {time.time()}\n")
+
+
+def run(argv):
+    networks = parse_targets(argv)
+    total = sum(network.num_addresses for network in networks)
+    time.sleep(setting("LATENCY", 0.05) + setting("HOST_LATENCY", 0.0) * total)
+
+    if fraction(" ".join(sorted(argv))) < setting("FAILURE_RATE", 0.0):
+        sys.stderr.write("fake nmap: simulated failure\n")
+        return 1
+
+    up_ratio = setting("UP_RATIO", 0.25)
+    port_count = min(setting("PORTS", 3), len(PORTS))
+    script_bytes = setting("OUTPUT_BYTES", 0) // max(port_count, 1)
+    # Discovery-style scans (-sn) report no ports
+    ping_only = "-sn" in argv
+
+    out = sys.stdout
+    out.write('<?xml version="1.0"?>\n<nmaprun scanner="nmap">\n')
+    for network in networks:
+        for ip_address in addresses(network):
+            if fraction(ip_address) >= up_ratio:
+                continue
+            if ping_only:
+                ports = []
+            else:
+                offset = zlib.crc32(ip_address.encode()) % len(PORTS)
+                ports = sorted(PORTS[(offset + index) % len(PORTS)] for index in range(port_count))
+            out.write(host_xml(ip_address, ports, script_bytes))
+    out.write("</nmaprun>\n")
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
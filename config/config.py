@@ -11,7 +11,123 @@ LOGS_DIR = os.path.join(BASE_DIR, "logs")
 # filepaths for scans configs (default: config/scan_config.json)
 SCAN_CONFIG_PATH = os.path.join(BASE_DIR, "config", "scan_config.json")
 NSE_CONFIG_PATH = os.path.join(BASE_DIR, "config", "nse_config.json")
+WORKFLOW_CONFIG_PATH = os.path.join(BASE_DIR, "config", "workflow_config.json")
 
+# scan scheduler limits (per-scan-type limits live in scan_config.json)
+MAX_CONCURRENT_SCANS = max(4, (os.cpu_count() or 1) * 2)
 
+# pipelined workflow execution: hosts buffered between phases / hosts in flight per phase
+PIPELINE_QUEUE_SIZE = 256
+PIPELINE_MAX_IN_FLIGHT = 64
 
+# discovery sharding: large targets are split into CIDR blocks sized to take about
+# DISCOVERY_SHARD_TARGET_SECONDS each, between the min and max prefix lengths
+DISCOVERY_SHARD_PREFIX = 24
+DISCOVERY_SHARD_MIN_PREFIX = 16
+DISCOVERY_SHARD_MAX_PREFIX = 28
+DISCOVERY_SHARD_TARGET_SECONDS = 60.0
+DISCOVERY_SHARD_MAX_IN_FLIGHT = 32
 
+# nmap output parsing: once a scan's XML output exceeds PARSER_OFFLOAD_BYTES the rest
+# is parsed on a pool of PARSER_THREADS worker threads instead of the event loop
+PARSER_OFFLOAD_BYTES = 1024 * 1024
+PARSER_THREADS = 2
+
+# multi-host batching of vulnerability scans: batch sizes adapt so one nmap
+# invocation takes about BATCH_TARGET_SECONDS
+BATCH_INITIAL_SIZE = 16
+BATCH_MIN_SIZE = 1
+BATCH_MAX_SIZE = 256
+BATCH_TARGET_SECONDS = 300.0
+BATCH_MAX_IN_FLIGHT = 8
+BATCH_FLUSH_SECONDS = 2.0
+
+# results store: SQLite database (default backend) and optional per-host JSON export
+RESULTS_DB_PATH = os.path.join(RESULTS_DIR, "aether.db")
+RESULTS_HOSTS_DIR = os.path.join(RESULTS_DIR, "hosts")
+RESULTS_WRITER_BATCH_SIZE = 500
+RESULTS_WRITER_FLUSH_SECONDS = 1.0
+
+# streaming reports (--report): formats written by default, and entries kept per summary section
+REPORTS_DIR = os.path.join(RESULTS_DIR, "reports")
+REPORT_FORMATS = ("jsonl", "csv", "html")
+REPORT_TOP_ENTRIES = 20
+
+# scan result cache: per-scan-type TTLs come from "cache_ttl" in scan_config.json
+SCAN_CACHE_PATH = os.path.join(RESULTS_DIR, "scan_cache.db")
+SCAN_CACHE_DEFAULT_TTL = 3600
+SCAN_CACHE_MAX_ENTRIES = 50000
+# stores between full row counts, which pick up entries written by other processes sharing the file
+SCAN_CACHE_RECOUNT_INTERVAL = 1000
+
+# metrics: psutil sampling period of scan subprocesses and event-loop lag probe period; finished
+# scans kept for the trace and lag samples kept for the percentile (totals cover every scan)
+METRICS_SAMPLE_INTERVAL = 0.5
+METRICS_LOOP_LAG_INTERVAL = 0.05
+METRICS_TRACE_SCANS = 10000
+METRICS_LOOP_LAG_SAMPLES = 10000
+
+# logging: files rotate at LOG_MAX_BYTES; raw nmap output lines are sampled (one in
+# LOG_OUTPUT_SAMPLE_EVERY) and capped at LOG_OUTPUT_MAX_PER_SECOND (0 = unlimited)
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_OUTPUT_SAMPLE_EVERY = 1
+LOG_OUTPUT_MAX_PER_SECOND = 50
+
+# checkpoint journal: completed shards, host snapshots and per-host scans, flushed in batches
+CHECKPOINT_PATH = os.path.join(RESULTS_DIR, "checkpoint.jsonl")
+CHECKPOINT_FLUSH_RECORDS = 500
+CHECKPOINT_FLUSH_SECONDS = 2.0
+
+# distributed mode: workers renew their leases every DISTRIBUTED_HEARTBEAT_SECONDS; a lease not
+# renewed within DISTRIBUTED_LEASE_SECONDS goes back to the queue, and an idle worker steals a copy
+# of a lease that has run for DISTRIBUTED_STEAL_AFTER_SECONDS (the first result wins)
+DISTRIBUTED_ADDRESS = "127.0.0.1:47800"
+DISTRIBUTED_HEARTBEAT_SECONDS = 2.0
+DISTRIBUTED_LEASE_SECONDS = 10.0
+DISTRIBUTED_STEAL_AFTER_SECONDS = 120.0
+DISTRIBUTED_MAX_ATTEMPTS = 3
+DISTRIBUTED_WORKER_CAPACITY = 8
+DISTRIBUTED_MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+# adaptive rate control (--adaptive-rate): per-subnet AIMD of nmap's --max-rate, --max-parallelism and
+# --max-hostgroup, as (initial, minimum, maximum, additive step). Dropped probes, failed scans or a scan
+# slower than RATE_CONTROL_SLOWDOWN times the subnet's usual time per address multiply them by
+# RATE_CONTROL_DECREASE; -T4 is used at or above RATE_CONTROL_T4_RATE packets per second, -T3 below
+RATE_CONTROL_SUBNET_PREFIX = 24
+RATE_CONTROL_MAX_RATE = (300, 10, 5000, 50)
+RATE_CONTROL_PARALLELISM = (16, 1, 128, 2)
+RATE_CONTROL_HOSTGROUP = (64, 1, 256, 8)
+RATE_CONTROL_DECREASE = 0.5
+RATE_CONTROL_SLOWDOWN = 2.0
+RATE_CONTROL_T4_RATE = 1000
+RATE_CONTROL_HISTORY = 1000
+
+# full-port scans (--full-ports): the port space is split into PORT_SPLIT_PARTS ranges scanned
+# concurrently, the most common ports first, and merged back per host
+PORT_SPLIT_SCAN_TYPE = "stealth_all_port"
+PORT_SPLIT_PARTS = 8
+
+# inventory index: hosts are grouped into subnets of this IPv4 prefix length (IPv6 uses /64)
+INVENTORY_SUBNET_PREFIX = 24
+
+# scan deadlines: a scan running past its scan type's "timeout" in scan_config.json (default
+# SCAN_TIMEOUT_SECONDS) is stopped; nmap gets SCAN_TERMINATE_GRACE_SECONDS after SIGTERM before SIGKILL.
+# A workflow phase running past PHASE_TIMEOUT_SECONDS (None: no deadline) has its scans cancelled
+SCAN_TIMEOUT_SECONDS = 3600.0
+SCAN_TERMINATE_GRACE_SECONDS = 5.0
+PHASE_TIMEOUT_SECONDS = None
+
+# straggler hedging (--hedge): once HEDGE_MIN_SAMPLES scans of a type have completed, a scan still running
+# after HEDGE_FACTOR times the HEDGE_QUANTILE of their time per address is issued again with a matching
+# --host-timeout; the first copy to finish wins and the other is cancelled
+HEDGE_QUANTILE = 0.95
+HEDGE_FACTOR = 1.5
+HEDGE_MIN_SAMPLES = 10
+HEDGE_MIN_DELAY_SECONDS = 5.0
+HEDGE_HISTORY = 500
+
+# event bus: events queued per subscriber before its drop/coalesce policy applies; nmap writes task
+# progress (percent complete, ETA) this often while anyone subscribes to progress events
+EVENT_QUEUE_SIZE = 1000
+NMAP_STATS_EVERY = "5s"
@@ -0,0 +1,190 @@
+import asyncio
+import ipaddress
+import socket
+import time
+from functools import lru_cache
+
+DEFAULT_PORTS = [21, 22, 23, 25, 53, 80, 110, 135, 139, 143, 443, 445, 993, 995, 1723, 3306, 3389, 5900, 8080, 8443]
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how many connection attempts start per second.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Tokens added per second; 0 or None disables limiting.
+            burst (int): Bucket size; defaults to one second worth of tokens.
+        """
+        self.rate = rate or 0
+        self.capacity = burst or max(1, int(self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@lru_cache(maxsize=None)
+def service_name(port):
+    """
+    Returns:
+        str: The well-known TCP service name of a port, or None.
+    """
+    try:
+        return socket.getservbyport(port, "tcp")
+    except OSError:
+        return None
+
+
+class AsyncDiscoveryEngine:
+    """
+    Pure-asyncio TCP connect discovery, an alternative to nmap subprocesses.
+
+    A host counts as up when any probed port accepts the connection or actively
+    refuses it. Results use the same `{ip: {"state": ..., "ports": [...],
+    "services": {...}}}` shape as the nmap parser.
+    """
+
+    def __init__(self, ports=None, connect_timeout=1.0, max_in_flight=2000, per_host_limit=16,
+                 rate_limit=0, per_host_rate_limit=0):
+        """
+        Args:
+            ports (list): TCP ports probed on every host.
+            connect_timeout (float): Seconds to wait for each connection attempt.
+            max_in_flight (int): Global cap on simultaneous connection attempts.
+            per_host_limit (int): Cap on simultaneous attempts against one host.
+            rate_limit (float): Global connection attempts per second (0 = unlimited).
+            per_host_rate_limit (float): Connection attempts per second per host (0 = unlimited).
+        """
+        self.ports = list(ports or DEFAULT_PORTS)
+        self.connect_timeout = connect_timeout
+        self.max_in_flight = max_in_flight
+        self.per_host_limit = per_host_limit
+        self.rate_limit = rate_limit
+        self.per_host_rate_limit = per_host_rate_limit
+        self._in_flight = None
+        self._global_rate = None
+
+    @classmethod
+    def from_config(cls, scan_entry):
+        """
+        Build an engine from a scan_config.json entry with `"engine": "asyncio"`.
+        """
+        options = ("ports", "connect_timeout", "max_in_flight", "per_host_limit", "rate_limit", "per_host_rate_limit")
+        return cls(**{key: scan_entry[key] for key in options if key in scan_entry})
+
+    @staticmethod
+    def expand_targets(target):
+        """
+        Lazily expand a target string (IPs or CIDRs, space separated) into addresses.
+        """
+        for item in target.split():
+            network = ipaddress.ip_network(item, strict=False)
+            if network.num_addresses == 1:
+                yield str(network.network_address)
+            else:
+                for address in network.hosts():
+                    yield str(address)
+
+    async def probe(self, ip_address, port, host_limit, host_rate):
+        """
+        Attempt one TCP connection.
+
+        Returns:
+            str: "open", "closed" (connection refused) or "filtered" (timeout/unreachable).
+        """
+        async with self._in_flight, host_limit:
+            await self._global_rate.acquire()
+            await host_rate.acquire()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip_address, port), self.connect_timeout)
+            except ConnectionRefusedError:
+                return "closed"
+            except (OSError, asyncio.TimeoutError):
+                return "filtered"
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return "open"
+
+    async def scan_host(self, ip_address):
+        """
+        Probe every configured port on one host.
+
+        Returns:
+            dict: Host details in the shape produced by the nmap parser.
+        """
+        host_limit = asyncio.Semaphore(self.per_host_limit)
+        host_rate = RateLimiter(self.per_host_rate_limit)
+        states = await asyncio.gather(*(self.probe(ip_address, port, host_limit, host_rate) for port in self.ports))
+        open_ports = [port for port, state in zip(self.ports, states) if state == "open"]
+        up = any(state != "filtered" for state in states)
+        return {
+            "state": "up" if up else "down",
+            "hostnames": [],
+            "ports": open_ports,
+            "services": {port: name for port in open_ports if (name := service_name(port))},
+            "scripts": {},
+        }
+
+    async def scan(self, target, on_host=None):
+        """
+        Scan every address of a target.
+
+        Hosts are started lazily, only as many at a time as the global
+        connection budget can serve, however large the range. The budget and
+        the global rate limit are shared by concurrent scans on this engine.
+
+        Args:
+            target (str): IPs or CIDRs, space separated.
+            on_host (callable): Called with (ip, details) as soon as each live host finishes.
+
+        Returns:
+            dict: Mapping of IP address to host details, for live hosts only (as nmap -sn reports them).
+        """
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._global_rate = RateLimiter(self.rate_limit)
+        hosts_in_flight = asyncio.Semaphore(max(1, self.max_in_flight // max(1, min(len(self.ports), self.per_host_limit))))
+        results = {}
+        tasks = set()
+
+        async def run(ip_address):
+            try:
+                details = await self.scan_host(ip_address)
+            finally:
+                hosts_in_flight.release()
+            if details["state"] == "down":
+                return
+            results[ip_address] = details
+            if on_host is not None:
+                on_host(ip_address, details)
+
+        try:
+            for ip_address in self.expand_targets(target):
+                await hosts_in_flight.acquire()
+                task = asyncio.ensure_future(run(ip_address))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from config.config import BATCH_INITIAL_SIZE, BATCH_MIN_SIZE, BATCH_MAX_SIZE, BATCH_TARGET_SECONDS, BATCH_MAX_IN_FLIGHT
+
+
+class AdaptiveBatchSizer:
+    """
+    Chooses how many hosts go into one nmap invocation.
+
+    The size follows the observed scan time per host so batches take about
+    `target_duration` seconds; failures halve it.
+    """
+
+    def __init__(self, initial=BATCH_INITIAL_SIZE, minimum=BATCH_MIN_SIZE, maximum=BATCH_MAX_SIZE,
+                 target_duration=BATCH_TARGET_SECONDS):
+        """
+        Args:
+            initial (int): Starting batch size.
+            minimum (int): Smallest batch size.
+            maximum (int): Largest batch size.
+            target_duration (float): Desired wall time of a batch in seconds.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.current = min(max(initial, minimum), maximum)
+        self.target_duration = target_duration
+        self.seconds_per_host = None
+
+    def record(self, batch_size, duration):
+        """
+        Feed back a successful batch and adapt the size of the next ones.
+
+        Args:
+            batch_size (int): Number of hosts in the batch.
+            duration (float): Its wall time in seconds.
+        """
+        observed = max(duration, 1e-6) / batch_size
+        if self.seconds_per_host is None:
+            self.seconds_per_host = observed
+        else:
+            self.seconds_per_host = 0.7 * self.seconds_per_host + 0.3 * observed
+        wanted = int(self.target_duration / self.seconds_per_host)
+        # Never more than double in one step so a single fast batch cannot overshoot
+        self.current = min(max(wanted, self.minimum), self.current * 2, self.maximum)
+
+    def shrink(self):
+        """Halve the batch size after a failure."""
+        self.current = max(self.current // 2, self.minimum)
+
+
+class BatchScanner:
+    """
+    Scans many hosts with few nmap invocations.
+
+    Hosts are packed into multi-target scans; the combined output is split back
+    into per-host `HostManager.update_from_scan` calls. A failed batch is retried
+    as two smaller batches until single hosts are reached.
+    """
+
+    def __init__(self, scan_manager, scan_type, sizer=None, max_in_flight=BATCH_MAX_IN_FLIGHT, workflow_id="default",
+                 on_host_done=None):
+        """
+        Args:
+            scan_manager (ScanManager): Scanner used to run each batch.
+            scan_type (str): Scan type from scan_config.json.
+            sizer (AdaptiveBatchSizer): Shared batch sizer; a new one is created if omitted.
+            max_in_flight (int): Maximum number of batches submitted at once.
+            workflow_id (str): Workflow key passed to the scan scheduler.
+            on_host_done (callable): Called with each HostManager once its results are applied.
+        """
+        self.scan_manager = scan_manager
+        self.scan_type = scan_type
+        self.sizer = sizer or AdaptiveBatchSizer()
+        self.max_in_flight = max_in_flight
+        self.workflow_id = workflow_id
+        self.failed_hosts = []
+        self.on_host_done = on_host_done
+
+    async def scan(self, host_instances, additional_args=None):
+        """
+        Scan hosts that share the same nmap arguments in adaptive batches.
+
+        Args:
+            host_instances (list): HostManager objects to scan.
+            additional_args (str): Extra nmap arguments shared by every host (e.g. scripts).
+        """
+        remaining = list(host_instances)
+        pending = set()
+        try:
+            while remaining or pending:
+                while remaining and len(pending) < self.max_in_flight:
+                    batch, remaining = remaining[:self.sizer.current], remaining[self.sizer.current:]
+                    pending.add(asyncio.ensure_future(self.run_batch(batch, additional_args)))
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Reached with batches pending only when cancelled (e.g. a phase deadline): stop their scans too
+            for task in pending:
+                task.cancel()
+
+    async def run_batch(self, batch, additional_args=None):
+        """
+        Run one multi-host scan and distribute its results.
+
+        Args:
+            batch (list): HostManager objects scanned in a single nmap invocation.
+            additional_args (str): Extra nmap arguments.
+        """
+        started = time.monotonic()
+        try:
+            scan_id = await self.scan_manager.start_scan(
+                " ".join(host_instance.ip_address for host_instance in batch),
+                scan_type=self.scan_type,
+                additional_args=additional_args,
+                workflow_id=self.workflow_id,
+            )
+            result = await self.scan_manager.wait_for_scan(scan_id)
+        except Exception as e:
+            self.sizer.shrink()
+            if len(batch) == 1:
+                batch[0].update_metadata(f"scan_{self.scan_type}_error", str(e))
+                self.failed_hosts.append(batch[0].ip_address)
+                return
+            half = len(batch) // 2
+            await asyncio.gather(
+                self.run_batch(batch[:half], additional_args),
+                self.run_batch(batch[half:], additional_args),
+            )
+            return
+
+        self.sizer.record(len(batch), time.monotonic() - started)
+        for host_instance in batch:
+            host_instance.update_from_scan(self.scan_type, result.get(host_instance.ip_address, {}))
+            if self.on_host_done is not None:
+                self.on_host_done(host_instance)
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import CHECKPOINT_FLUSH_RECORDS, CHECKPOINT_FLUSH_SECONDS
+
+
+def targets_fingerprint(targets):
+    """
+    Returns:
+        str: A digest of a TargetSet's address intervals, used to refuse resuming a different sweep.
+    """
+    digest = hashlib.sha256()
+    for version, first, last in targets.intervals():
+        digest.update(f"{version}:{first}-{last};".encode())
+    return digest.hexdigest()
+
+
+class CheckpointState:
+    """
+    Work recorded in a checkpoint journal, replayed from disk.
+    """
+
+    def __init__(self):
+        self.fingerprint = None
+        self.hosts = {}
+        self.completed_shards = {}
+        self.completed_scans = {}
+        self.complete = False
+
+    def apply(self, record):
+        kind = record.get("type")
+        if kind == "run":
+            self.fingerprint = record["targets"]
+        elif kind == "host":
+            self.hosts[record["data"]["ip_address"]] = record["data"]
+        elif kind == "shard":
+            self.completed_shards.setdefault(record["scan_type"], []).append(record["shard"])
+        elif kind == "scan":
+            self.completed_scans.setdefault(record["scan_type"], set()).add(record["ip"])
+        elif kind == "complete":
+            self.complete = True
+
+
+class CheckpointJournal:
+    """
+    Append-only JSON-lines journal of completed discovery shards, host
+    snapshots and per-host scans.
+
+    Records are buffered and written (and fsynced) in batches on a dedicated
+    thread, so a crash loses at most the last unflushed batch and the event
+    loop never waits on the disk. A truncated final line, as left by a crash
+    mid-write, is skipped when the journal is replayed and cut off before a
+    resumed run appends to it.
+    """
+
+    def __init__(self, path, flush_records=CHECKPOINT_FLUSH_RECORDS, flush_interval=CHECKPOINT_FLUSH_SECONDS):
+        """
+        Args:
+            path (str): Path of the journal file.
+            flush_records (int): Flush once this many records are buffered.
+            flush_interval (float): Flush when a record arrives this many seconds after the last flush.
+        """
+        self.path = path
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.records_written = 0
+        self.errors = []
+        self.file = None
+        self._executor = None
+
+    @staticmethod
+    def load(path):
+        """
+        Replay a journal.
+
+        Args:
+            path (str): Path of the journal file.
+
+        Returns:
+            CheckpointState: The recorded work; empty if the file does not exist.
+        """
+        state = CheckpointState()
+        if not os.path.exists(path):
+            return state
+        with open(path, "r") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from a crash
+                state.apply(record)
+        return state
+
+    def open(self, targets, resume=False):
+        """
+        Open the journal for appending.
+
+        Args:
+            targets (TargetSet): Targets of this run.
+            resume (bool): Keep the existing journal and continue it; otherwise start a new one.
+
+        Returns:
+            CheckpointState: The state to resume from (empty unless `resume`).
+
+        Raises:
+            ValueError: If resuming a journal that was written for different targets.
+        """
+        fingerprint = targets_fingerprint(targets)
+        state = self.load(self.path) if resume else CheckpointState()
+        if state.fingerprint is not None and state.fingerprint != fingerprint:
+            raise ValueError(f"Checkpoint {self.path} was written for different targets; refusing to resume")
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume and os.path.exists(self.path):
+            self._truncate_partial_tail(self.path)
+        self.file = open(self.path, "a" if resume else "w")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        if state.fingerprint is None:
+            self.append({"type": "run", "targets": fingerprint, "started_at": time.time()})
+            self.flush()
+        return state
+
+    @staticmethod
+    def _truncate_partial_tail(path, chunk_size=65536):
+        """
+        Cut the journal back to its last complete line, so new records are not
+        glued onto a line left half-written by a crash.
+        """
+        with open(path, "rb+") as file:
+            end = file.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(position - chunk_size, 0)
+                file.seek(start)
+                newline = file.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                file.truncate(position)
+
+    def append(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.flush_records or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def record_host(self, host_instance):
+        self.append({"type": "host", "data": host_instance.to_dict()})
+
+    def record_shard(self, scan_type, shard):
+        self.append({"type": "shard", "scan_type": scan_type, "shard": shard})
+
+    def record_scan(self, scan_type, ip_address):
+        self.append({"type": "scan", "scan_type": scan_type, "ip": ip_address})
+
+    def flush(self):
+        """
+        Hand buffered records to the journal thread to be written and fsynced.
+        They are serialised first, on the caller's thread, so later changes to
+        a recorded host cannot race the write.
+        """
+        self.last_flush = time.monotonic()
+        if not self.buffer or self.file is None:
+            return
+        data = "".join(json.dumps(record, default=str) + "\n" for record in self.buffer)
+        self._executor.submit(self._write, data, len(self.buffer))
+        self.buffer = []
+
+    def _write(self, data, count):
+        try:
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except OSError as e:
+            self.errors.append(str(e))
+            return
+        self.records_written += count
+
+    def close(self, complete=False):
+        """
+        Flush and close the journal.
+
+        Args:
+            complete (bool): Mark the run as finished.
+        """
+        if self.file is None:
+            return
+        if complete:
+            self.append({"type": "complete", "finished_at": time.time()})
+        self.flush()
+        # Wait for the journal thread to finish the writes still queued
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self.file.close()
+        self.file = None
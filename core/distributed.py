@@ -0,0 +1,520 @@
+import asyncio
+import ipaddress
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from config.config import (
+    DISTRIBUTED_ADDRESS,
+    DISTRIBUTED_HEARTBEAT_SECONDS,
+    DISTRIBUTED_LEASE_SECONDS,
+    DISTRIBUTED_STEAL_AFTER_SECONDS,
+    DISTRIBUTED_MAX_ATTEMPTS,
+    DISTRIBUTED_WORKER_CAPACITY,
+    DISTRIBUTED_MAX_MESSAGE_BYTES,
+)
+from core.metrics import MetricsRegistry
+from core.eventbus import EventBus, SCAN_QUEUED, SCAN_STARTED, HOST_FOUND, SCAN_FINISHED
+
+MAIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def parse_address(address):
+    """
+    Args:
+        address (str): A "host:port" address.
+
+    Returns:
+        tuple: (host, port).
+
+    Raises:
+        ValueError: If the address has no valid port.
+    """
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address (expected host:port): {address}")
+    return host.strip("[]"), int(port)
+
+
+def is_loopback(host):
+    """
+    Returns:
+        bool: True if `host` is "localhost" or a loopback address.
+    """
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def encode_message(message):
+    return json.dumps(message, default=str).encode() + b"\n"
+
+
+async def read_message(reader):
+    """
+    Returns:
+        dict: The next JSON-lines message, or None once the peer closed the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def decode_result(result):
+    """JSON turns the integer port keys of `services` into strings; turn them back."""
+    for details in result.values():
+        services = details.get("services")
+        if services:
+            details["services"] = {int(port): name for port, name in services.items()}
+    return result
+
+
+class Lease:
+    """
+    One scan handed out to workers, with the workers currently holding it.
+    """
+
+    __slots__ = ("lease_id", "target", "scan_type", "additional_args", "future", "holders", "attempts",
+                 "leased_at")
+
+    def __init__(self, lease_id, target, scan_type, additional_args, future):
+        self.lease_id = lease_id
+        self.target = target
+        self.scan_type = scan_type
+        self.additional_args = additional_args
+        self.future = future
+        self.holders = {}  # worker id -> monotonic expiry of that worker's lease
+        self.attempts = 0
+        self.leased_at = None
+
+    def to_message(self):
+        return {
+            "type": "lease",
+            "lease": self.lease_id,
+            "target": self.target,
+            "scan_type": self.scan_type,
+            "additional_args": self.additional_args,
+        }
+
+
+class WorkerConnection:
+    __slots__ = ("worker_id", "writer", "capacity", "leases", "last_seen")
+
+    def __init__(self, worker_id, writer, capacity):
+        self.worker_id = worker_id
+        self.writer = writer
+        self.capacity = capacity
+        self.leases = set()
+        self.last_seen = time.monotonic()
+
+    @property
+    def free(self):
+        return self.capacity - len(self.leases)
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode_message(message))
+
+
+class ScanCoordinator:
+    """
+    Spreads scans over worker processes, each running its own ScanManager.
+
+    The coordinator offers the part of the ScanManager interface the workflow
+    uses (`start_scan`, `wait_for_scan`, `run_discovery`, `host_callbacks`,
+    `metrics`), so a WorkflowManager built on a coordinator leases discovery
+    shards and host scans to workers instead of running nmap itself, and the
+    results stream back into `workflow_hosts` as usual.
+
+    Workers connect over TCP and exchange JSON lines. Every scan is handed
+    out as a lease that its worker renews with heartbeats. A lease that is not
+    renewed in time (the worker died, hung or lost its connection) goes back to
+    the queue; an idle worker steals a copy of a lease that has been running
+    for `steal_after` seconds, and the first result wins. Cancelling a scan's
+    future withdraws its lease from every worker holding it.
+
+    The protocol has no authentication: anyone who can connect can take
+    leases and report results, so listen on a loopback address unless the
+    network is trusted.
+    """
+
+    def __init__(self, address=DISTRIBUTED_ADDRESS, lease_seconds=DISTRIBUTED_LEASE_SECONDS,
+                 heartbeat_interval=DISTRIBUTED_HEARTBEAT_SECONDS, steal_after=DISTRIBUTED_STEAL_AFTER_SECONDS,
+                 max_attempts=DISTRIBUTED_MAX_ATTEMPTS, metrics=None):
+        """
+        Args:
+            address (str): "host:port" to listen on; port 0 picks a free port.
+            lease_seconds (float): How long a lease stays valid without a heartbeat.
+            heartbeat_interval (float): Heartbeat period requested from workers.
+            steal_after (float): Age at which a running lease may be duplicated to an idle worker.
+            max_attempts (int): Leases granted per scan before it is failed.
+            metrics (MetricsRegistry): Receives per-scan timings; a new registry is created if omitted.
+        """
+        self.host, self.port = parse_address(address)
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.steal_after = steal_after
+        self.max_attempts = max_attempts
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.host_callbacks = []
+        self.event_bus = EventBus()
+        self.errors = []
+        self.active_scans = {}
+        self.pending = deque()
+        self.running = {}
+        self.workers = {}
+        self.stats = {"leases": 0, "expired": 0, "stolen": 0, "retried": 0}
+        self.processes = []
+        self.server = None
+        self._reaper = None
+        self._ids = itertools.count(1)
+
+    @property
+    def address(self):
+        return f"{self.host}:{self.port}"
+
+    async def start(self):
+        """Start accepting workers."""
+        self.server = await asyncio.start_server(self.handle_worker, self.host, self.port,
+                                                 limit=DISTRIBUTED_MAX_MESSAGE_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._reaper = asyncio.ensure_future(self.reap())
+
+    async def spawn_local_workers(self, count, capacity=DISTRIBUTED_WORKER_CAPACITY, extra_args=()):
+        """
+        Start worker processes on this machine, connected to this coordinator.
+
+        Args:
+            count (int): Number of worker processes.
+            capacity (int): Leases each worker runs at once.
+            extra_args (iterable): Further main.py arguments for every worker (e.g. --no-cache).
+        """
+        for _ in range(count):
+            self.processes.append(await asyncio.create_subprocess_exec(
+                sys.executable, MAIN_PATH, "--worker", self.address, "--worker-capacity", str(capacity), *extra_args,
+            ))
+
+    async def wait_for_workers(self, count, timeout=None):
+        """Wait until at least `count` workers are connected."""
+        async with asyncio.timeout(timeout):
+            while len(self.workers) < count:
+                await asyncio.sleep(0.05)
+
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None):
+        """
+        Queue a scan for the workers and return its scan id; use `wait_for_scan` for the result.
+        """
+        scan_id = f"lease_{next(self._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        lease = Lease(scan_id, target, scan_type, additional_args, future)
+        future.add_done_callback(lambda fut: self.withdraw(lease) if fut.cancelled() else None)
+        self.active_scans[scan_id] = future
+        self.pending.append(lease)
+        self.metrics.scan_queued(scan_id, scan_type)
+        self.event_bus.publish(SCAN_QUEUED, scan_id, target=target, scan_type=scan_type)
+        self.dispatch()
+        return scan_id
+
+    async def wait_for_scan(self, scan_id):
+        if scan_id not in self.active_scans:
+            raise ValueError(f"No scan found with id {scan_id}")
+        return await self.active_scans[scan_id]
+
+    async def run_discovery(self, target, workflow_id="default", scan_type="discovery"):
+        scan_id = await self.start_scan(target, scan_type, workflow_id=workflow_id)
+        return await self.wait_for_scan(scan_id)
+
+    def log_error(self, scan_id, error_message):
+        """Tracks an error reported against a scan, as `ScanManager.log_error` does."""
+        self.errors.append({"scan_id": scan_id, "error": error_message})
+
+    async def handle_worker(self, reader, writer):
+        """Serve one worker connection until it closes."""
+        worker = None
+        try:
+            hello = await read_message(reader)
+            if not hello or hello.get("type") != "hello":
+                return
+            worker = WorkerConnection(hello["worker"], writer, hello.get("capacity", DISTRIBUTED_WORKER_CAPACITY))
+            self.workers[worker.worker_id] = worker
+            worker.send({"type": "welcome", "heartbeat_interval": self.heartbeat_interval})
+            self.dispatch()
+            while (message := await read_message(reader)) is not None:
+                worker.last_seen = time.monotonic()
+                kind = message.get("type")
+                if kind == "heartbeat":
+                    self.renew(worker, message["leases"])
+                elif kind == "result":
+                    self.complete(worker, message["lease"], decode_result(message["result"]))
+                elif kind == "failed":
+                    self.fail(worker, message["lease"], message["error"])
+        except (ConnectionError, ValueError) as e:
+            self.errors.append({"worker": worker.worker_id if worker else None, "error": str(e)})
+        finally:
+            if worker is not None:
+                self.drop_worker(worker)
+            writer.close()
+
+    def dispatch(self):
+        """Fill every worker's free capacity with queued leases, or stolen ones once the queue is empty."""
+        for worker in list(self.workers.values()):
+            while worker.free > 0:
+                lease = self.next_lease(worker)
+                if lease is None:
+                    break
+                self.grant(worker, lease)
+
+    def next_lease(self, worker):
+        while self.pending:
+            lease = self.pending.popleft()
+            if not lease.future.done():
+                return lease
+        # Nothing queued: duplicate the oldest straggler held by a single other worker
+        now = time.monotonic()
+        candidates = [
+            lease for lease in self.running.values()
+            if len(lease.holders) == 1 and worker.worker_id not in lease.holders
+            and now - lease.leased_at >= self.steal_after
+        ]
+        if not candidates:
+            return None
+        self.stats["stolen"] += 1
+        return min(candidates, key=lambda lease: lease.leased_at)
+
+    def grant(self, worker, lease):
+        now = time.monotonic()
+        if lease.leased_at is None:
+            self.metrics.scan_started(lease.lease_id)
+            self.event_bus.publish(SCAN_STARTED, lease.lease_id, target=lease.target, scan_type=lease.scan_type,
+                                   worker_id=worker.worker_id)
+        lease.leased_at = now
+        lease.attempts += 1
+        lease.holders[worker.worker_id] = now + self.lease_seconds
+        worker.leases.add(lease.lease_id)
+        self.running[lease.lease_id] = lease
+        self.stats["leases"] += 1
+        worker.send(lease.to_message())
+
+    def renew(self, worker, lease_ids):
+        expires_at = time.monotonic() + self.lease_seconds
+        for lease_id in lease_ids:
+            lease = self.running.get(lease_id)
+            if lease is not None and worker.worker_id in lease.holders:
+                lease.holders[worker.worker_id] = expires_at
+
+    def release(self, worker_id, lease, requeue=True):
+        """
+        Take a lease away from one worker; requeue it if nobody else holds it.
+        """
+        lease.holders.pop(worker_id, None)
+        worker = self.workers.get(worker_id)
+        if worker is not None:
+            worker.leases.discard(lease.lease_id)
+        if lease.holders or lease.future.done() or not requeue:
+            return
+        del self.running[lease.lease_id]
+        if lease.attempts >= self.max_attempts:
+            self.finish(lease, error=RuntimeError(f"Scan of {lease.target} failed after {lease.attempts} attempts"))
+        else:
+            self.stats["retried"] += 1
+            self.pending.appendleft(lease)
+
+    def finish(self, lease, result=None, error=None):
+        self.running.pop(lease.lease_id, None)
+        for worker_id in list(lease.holders):
+            worker = self.workers.get(worker_id)
+            if worker is not None:
+                worker.leases.discard(lease.lease_id)
+                worker.send({"type": "cancel", "lease": lease.lease_id})
+        lease.holders.clear()
+        if error is not None:
+            self.metrics.scan_finished(lease.lease_id, "errored")
+            self.event_bus.publish(SCAN_FINISHED, lease.lease_id, scan_type=lease.scan_type, status="errored")
+            lease.future.set_exception(error)
+            lease.future.exception()  # Retrieved by `wait_for_scan`; keep unawaited scans quiet
+            return
+        for ip_address, details in result.items():
+            for callback in self.host_callbacks:
+                callback(lease.lease_id, lease.scan_type, ip_address, details)
+            self.event_bus.publish(HOST_FOUND, lease.lease_id, scan_type=lease.scan_type, ip_address=ip_address,
+                                   details=details)
+        self.metrics.scan_finished(lease.lease_id, "completed")
+        self.event_bus.publish(SCAN_FINISHED, lease.lease_id, scan_type=lease.scan_type, status="completed")
+        lease.future.set_result(result)
+
+    def withdraw(self, lease):
+        """
+        Drop a lease whose scan was cancelled by the caller and tell its workers to stop it.
+        Queued leases are skipped by `next_lease` once their future is done.
+        """
+        self.running.pop(lease.lease_id, None)
+        for worker_id in list(lease.holders):
+            worker = self.workers.get(worker_id)
+            if worker is not None:
+                worker.leases.discard(lease.lease_id)
+                worker.send({"type": "cancel", "lease": lease.lease_id})
+        lease.holders.clear()
+        self.metrics.scan_finished(lease.lease_id, "cancelled")
+        self.event_bus.publish(SCAN_FINISHED, lease.lease_id, scan_type=lease.scan_type, status="cancelled")
+        self.dispatch()
+
+    def complete(self, worker, lease_id, result):
+        worker.leases.discard(lease_id)
+        lease = self.running.get(lease_id)
+        if lease is None or lease.future.done():
+            return  # Another holder finished first
+        lease.holders.pop(worker.worker_id, None)
+        self.finish(lease, result=result)
+        self.dispatch()
+
+    def fail(self, worker, lease_id, error):
+        lease = self.running.get(lease_id)
+        if lease is None or worker.worker_id not in lease.holders:
+            worker.leases.discard(lease_id)
+            return
+        self.errors.append({"worker": worker.worker_id, "target": lease.target, "error": error})
+        self.release(worker.worker_id, lease)
+        self.dispatch()
+
+    def drop_worker(self, worker):
+        """Forget a disconnected worker and requeue the leases only it held."""
+        if self.workers.get(worker.worker_id) is not worker:
+            return
+        for lease_id in list(worker.leases):
+            lease = self.running.get(lease_id)
+            if lease is not None:
+                self.release(worker.worker_id, lease)
+        del self.workers[worker.worker_id]
+        self.dispatch()
+
+    async def reap(self):
+        """Expire leases that were not renewed, disconnect silent workers and retry stealing."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for lease in list(self.running.values()):
+                for worker_id, expires_at in list(lease.holders.items()):
+                    if expires_at < now:
+                        self.stats["expired"] += 1
+                        worker = self.workers.get(worker_id)
+                        if worker is not None:
+                            worker.send({"type": "cancel", "lease": lease.lease_id})
+                        self.release(worker_id, lease)
+            for worker in list(self.workers.values()):
+                if now - worker.last_seen > self.lease_seconds:
+                    worker.writer.close()
+                    self.drop_worker(worker)
+            self.dispatch()
+
+    async def shutdown(self):
+        """Stop the workers and the server, and fail scans that never completed."""
+        for worker in list(self.workers.values()):
+            worker.send({"type": "shutdown"})
+        if self._reaper is not None:
+            self._reaper.cancel()
+        if self.server is not None:
+            self.server.close()
+        for process in self.processes:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=self.lease_seconds)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        for future in self.active_scans.values():
+            if not future.done():
+                future.cancel()
+
+
+class ScanWorker:
+    """
+    Runs leased scans from a ScanCoordinator on a local ScanManager.
+    """
+
+    def __init__(self, address, scan_manager, capacity=DISTRIBUTED_WORKER_CAPACITY, worker_id=None):
+        """
+        Args:
+            address (str): "host:port" of the coordinator.
+            scan_manager (ScanManager): Runs the leased scans.
+            capacity (int): Leases run at once.
+            worker_id (str): Identifies the worker to the coordinator; generated if omitted.
+        """
+        self.host, self.port = parse_address(address)
+        self.scan_manager = scan_manager
+        self.capacity = capacity
+        self.worker_id = worker_id or f"worker_{uuid.uuid4().hex[:8]}"
+        self.heartbeat_interval = DISTRIBUTED_HEARTBEAT_SECONDS
+        self.tasks = {}
+        self.completed = 0
+        self.writer = None
+
+    async def run(self):
+        """Serve leases until the coordinator shuts down or the connection drops."""
+        reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=DISTRIBUTED_MAX_MESSAGE_BYTES)
+        self.writer.write(encode_message({"type": "hello", "worker": self.worker_id, "capacity": self.capacity}))
+        heartbeat = None
+        try:
+            while (message := await read_message(reader)) is not None:
+                kind = message.get("type")
+                if kind == "welcome":
+                    self.heartbeat_interval = message["heartbeat_interval"]
+                    heartbeat = asyncio.ensure_future(self.heartbeat())
+                elif kind == "lease":
+                    self.tasks[message["lease"]] = asyncio.ensure_future(self.run_lease(message))
+                elif kind == "cancel":
+                    task = self.tasks.pop(message["lease"], None)
+                    if task is not None:
+                        task.cancel()
+                elif kind == "shutdown":
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            for task in self.tasks.values():
+                task.cancel()
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+            await self.scan_manager.shutdown()
+            self.writer.close()
+
+    async def heartbeat(self):
+        while True:
+            self.send({"type": "heartbeat", "leases": list(self.tasks)})
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(encode_message(message))
+
+    async def run_lease(self, lease):
+        lease_id = lease["lease"]
+        scan_id = None
+        try:
+            scan_id = await self.scan_manager.start_scan(
+                lease["target"], lease["scan_type"], additional_args=lease.get("additional_args")
+            )
+            result = await self.scan_manager.wait_for_scan(scan_id)
+        except asyncio.CancelledError:
+            # A cancelled lease, such as the losing copy of a stolen one, must not leave its nmap running
+            if scan_id is not None:
+                self.scan_manager.cancel_scan(scan_id)
+            raise
+        except Exception as e:
+            message = {"type": "failed", "lease": lease_id, "error": str(e)}
+        else:
+            self.completed += 1
+            message = {"type": "result", "lease": lease_id, "result": result}
+        finally:
+            self.tasks.pop(lease_id, None)
+        try:
+            self.send(message)
+            await self.writer.drain()
+        except ConnectionError:
+            pass  # The coordinator is gone; `run` sees the connection close and stops
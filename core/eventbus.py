@@ -0,0 +1,170 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from config.config import EVENT_QUEUE_SIZE
+
+# Event kinds published by ScanManager
+SCAN_QUEUED = "scan_queued"
+SCAN_STARTED = "scan_started"
+HOST_FOUND = "host_found"
+SCAN_PROGRESS = "scan_progress"
+SCAN_FINISHED = "scan_finished"
+EVENT_KINDS = (SCAN_QUEUED, SCAN_STARTED, HOST_FOUND, SCAN_PROGRESS, SCAN_FINISHED)
+# Kinds that describe current state, so only the latest event per scan matters
+COALESCED_KINDS = frozenset({SCAN_PROGRESS})
+
+# What a subscription does with a new event when its queue is full
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+COALESCE = "coalesce"
+POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+
+
+class Event:
+    __slots__ = ("kind", "scan_id", "data", "at")
+
+    def __init__(self, kind, scan_id, data):
+        self.kind = kind
+        self.scan_id = scan_id
+        self.data = data
+        self.at = time.time()
+
+    def to_dict(self):
+        return {"kind": self.kind, "scan_id": self.scan_id, "at": self.at, **self.data}
+
+
+class Subscription:
+    """
+    A bounded queue of events for one consumer.
+
+    Publishing never waits on the consumer. When the queue is full the new
+    event is handled by the subscription's policy: DROP_OLDEST evicts the
+    oldest queued event, DROP_NEWEST discards the new one. With COALESCE a
+    queued progress event of the same scan is replaced in place by the newer
+    one (a slow dashboard sees the latest percentage, not every step), and a
+    full queue then drops its oldest event. Evicted and discarded events are
+    counted in `dropped`, replaced ones in `coalesced`.
+    """
+
+    def __init__(self, kinds=None, maxsize=EVENT_QUEUE_SIZE, policy=DROP_OLDEST):
+        """
+        Args:
+            kinds (iterable): Event kinds delivered to this subscription; None for all.
+            maxsize (int): Events queued before the policy applies.
+            policy (str): DROP_OLDEST, DROP_NEWEST or COALESCE.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown event policy: {policy}")
+        self.kinds = frozenset(kinds) if kinds is not None else None
+        self.maxsize = max(maxsize, 1)
+        self.policy = policy
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._events = OrderedDict()
+        self._ids = itertools.count()
+        self._ready = asyncio.Event()
+
+    def wants(self, kind):
+        return self.kinds is None or kind in self.kinds
+
+    def put(self, event):
+        """Queue an event without waiting, applying the overflow policy."""
+        if self.closed:
+            return
+        if self.policy == COALESCE and event.kind in COALESCED_KINDS:
+            key = (event.kind, event.scan_id)
+            if key in self._events:
+                self._events[key] = event
+                self.coalesced += 1
+                return
+        else:
+            key = next(self._ids)
+        if len(self._events) >= self.maxsize:
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return
+            self._events.popitem(last=False)
+        self._events[key] = event
+        self._ready.set()
+
+    def close(self):
+        """End the subscription; queued events are still delivered."""
+        self.closed = True
+        self._ready.set()
+
+    def pending(self):
+        return len(self._events)
+
+    async def get(self):
+        """
+        Returns:
+            Event: The next event, or None once the subscription is closed and drained.
+        """
+        while not self._events:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popitem(last=False)[1]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+
+class EventBus:
+    """
+    In-process publish/subscribe for scan lifecycle events.
+
+    `publish` is synchronous and costs one dict insertion per interested
+    subscriber, so the scan path is never held up by consumers; each consumer
+    drains its own bounded `Subscription` at its own pace.
+    """
+
+    def __init__(self):
+        self.subscriptions = []
+        self.published = 0
+
+    def subscribe(self, kinds=None, maxsize=EVENT_QUEUE_SIZE, policy=DROP_OLDEST):
+        """
+        Returns:
+            Subscription: A new subscription; see `Subscription` for the arguments.
+        """
+        subscription = Subscription(kinds, maxsize, policy)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def wants(self, kind):
+        """
+        Returns:
+            bool: Whether any subscriber receives events of `kind`, so publishers can skip building them.
+        """
+        return any(subscription.wants(kind) for subscription in self.subscriptions)
+
+    def publish(self, kind, scan_id, **data):
+        """Deliver an event to every subscription interested in its kind."""
+        if not self.subscriptions:
+            return
+        event = Event(kind, scan_id, data)
+        self.published += 1
+        for subscription in self.subscriptions:
+            if subscription.wants(kind):
+                subscription.put(event)
+
+    def close(self):
+        """Close every subscription, so consumers finish once they have drained their queues."""
+        for subscription in self.subscriptions:
+            subscription.close()
+        self.subscriptions.clear()
@@ -0,0 +1,70 @@
+import math
+from collections import defaultdict, deque
+from config.config import (
+    HEDGE_QUANTILE,
+    HEDGE_FACTOR,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_HISTORY,
+)
+from utils.targets import count_addresses
+
+
+class StragglerHedger:
+    """
+    Decides when a running scan is a straggler worth issuing a second time.
+
+    Completed scans are kept per scan type as seconds per address. Once
+    `min_samples` are known, a scan still running after `factor` times the
+    `quantile` of that distribution (scaled to its own number of addresses)
+    is hedged: a copy is queued with nmap's --host-timeout set to the same
+    delay, so one unresponsive host cannot hold it up again, and whichever
+    copy finishes first is kept. The copy needs a scheduler slot of its own
+    while the original keeps holding one; it is queued ahead of other scans,
+    but with every slot busy it waits for the next one to free up.
+    """
+
+    def __init__(self, quantile=HEDGE_QUANTILE, factor=HEDGE_FACTOR, min_samples=HEDGE_MIN_SAMPLES,
+                 min_delay=HEDGE_MIN_DELAY_SECONDS, history=HEDGE_HISTORY):
+        """
+        Args:
+            quantile (float): Quantile of past durations a scan has to exceed to count as a straggler.
+            factor (float): Multiplier applied to that quantile.
+            min_samples (int): Completed scans of a type needed before its scans are hedged.
+            min_delay (float): Shortest hedge delay in seconds.
+            history (int): Number of recent durations kept per scan type.
+        """
+        self.quantile = quantile
+        self.factor = factor
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.samples = defaultdict(lambda: deque(maxlen=history))
+        self.stats = {"hedged": 0, "hedge_won": 0, "primary_won": 0}
+
+    def record(self, scan_type, target, duration):
+        """Feed back the wall time of a completed (unhedged) scan."""
+        self.samples[scan_type].append(max(duration, 1e-6) / count_addresses(target))
+
+    def hedge_delay(self, scan_type, target):
+        """
+        Returns:
+            float: Seconds after which a running scan of `target` is hedged; None while too few
+                scans of the type have completed.
+        """
+        samples = self.samples.get(scan_type)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        per_address = ordered[min(int(self.quantile * len(ordered)), len(ordered) - 1)]
+        return max(per_address * self.factor * count_addresses(target), self.min_delay)
+
+    @staticmethod
+    def host_timeout(delay):
+        """
+        Returns:
+            str: nmap option bounding the time spent on any single host of a hedged copy.
+        """
+        return f"--host-timeout {math.ceil(delay)}s"
+
+    def record_winner(self, hedge_won):
+        self.stats["hedge_won" if hedge_won else "primary_won"] += 1
@@ -1,13 +1,26 @@
+from array import array
+from bisect import bisect_left
 from datetime import datetime, timezone
 import json
-from typing import Any, Dict, List
+import sys
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional
 
 
 class HostManager:
     """
     Manages host-specific data and operations for a network scan workflow.
+
+    Instances are kept compact so that fleets of 100k+ hosts fit in memory:
+    attributes live in `__slots__`, open ports are a sorted `array('H')`,
+    service names are interned and timestamps are stored as epoch floats that
+    are only formatted when the host is exported.
     """
 
+    __slots__ = ("ip_address", "_created_at", "_last_updated", "_flags", "_ports", "services", "scan_results",
+                 "_inventory")
+
     def __init__(self, ip_address: str):
         """
         Initialize a HostManager instance.
@@ -15,13 +28,12 @@ class HostManager:
         :param ip_address: The IP address of the host.
         """
         self.ip_address = ip_address
-        self.metadata = {
-            "created_at": self.get_current_time(),
-            "last_updated": self.get_current_time(),
-        }
+        self._created_at = self._last_updated = time.time()
+        self._flags = None
+        self._ports = array("H")
         self.services = {}
-        self.open_ports = []
         self.scan_results = {}
+        self._inventory = None
 
     @staticmethod
     def get_current_time() -> str:
@@ -32,45 +44,140 @@ class HostManager:
         """
         return datetime.now(timezone.utc).isoformat()
 
-    def update_metadata(self, key: str, value: Any):
+    @staticmethod
+    def format_timestamp(timestamp: float) -> str:
+        """
+        Format an epoch timestamp as UTC ISO 8601.
+
+        :param timestamp: Seconds since the epoch.
+        :return: The timestamp as a string.
+        """
+        return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+    @property
+    def metadata(self) -> MappingProxyType:
+        """
+        Read-only view of the host metadata; use `update_metadata` to change it.
+
+        The view is built on access from the compact fields, so item assignment
+        raises TypeError instead of being silently lost.
+
+        :return: Metadata including the `created_at` and `last_updated` timestamps.
+        """
+        return MappingProxyType(self._export_metadata())
+
+    def _export_metadata(self) -> Dict[str, Any]:
+        metadata = {
+            "created_at": self.format_timestamp(self._created_at),
+            "last_updated": self.format_timestamp(self._last_updated),
+        }
+        if self._flags:
+            metadata.update(self._flags)
+        return metadata
+
+    def get_metadata(self, key: str, default: Any = None) -> Any:
+        """
+        Read a single metadata value without building the full metadata view.
+
+        :param key: Metadata key to read.
+        :param default: Value returned when the key is not set.
+        :return: The metadata value.
+        """
+        if self._flags is None:
+            return default
+        return self._flags.get(key, default)
+
+    @property
+    def open_ports(self) -> List[int]:
+        """
+        Open ports of the host, in ascending order.
+
+        :return: A list of port numbers.
+        """
+        return self._ports.tolist()
+
+    def has_port(self, port: int) -> bool:
+        """
+        Check whether a port is known to be open.
+
+        :param port: The port number.
+        :return: True if the port is open.
+        """
+        index = bisect_left(self._ports, port)
+        return index < len(self._ports) and self._ports[index] == port
+
+    def touch(self, timestamp: Optional[float] = None):
+        """
+        Mark the host as updated.
+
+        :param timestamp: Epoch timestamp to record; taken now if omitted.
+        """
+        self._last_updated = timestamp if timestamp is not None else time.time()
+
+    def update_metadata(self, key: str, value: Any, timestamp: Optional[float] = None):
         """
         Update the metadata for the host.
 
         :param key: Metadata key to update.
         :param value: New value for the metadata key.
+        :param timestamp: Epoch timestamp of the update; taken now if omitted.
+        """
+        if self._flags is None:
+            self._flags = {}
+        self._flags[key] = value
+        self.touch(timestamp)
+
+    def attach_inventory(self, inventory):
+        """
+        Report future port and service changes to an inventory index.
+
+        :param inventory: The Inventory holding this host, or None to detach.
         """
-        self.metadata[key] = value
-        self.metadata["last_updated"] = self.get_current_time()
+        self._inventory = inventory
 
-    def add_service(self, port: int, service_name: str):
+    def add_service(self, port: int, service_name: str, timestamp: Optional[float] = None):
         """
         Add a service to the host.
 
         :param port: The port number where the service is running.
         :param service_name: The name of the service.
+        :param timestamp: Epoch timestamp of the update; taken now if omitted.
         """
+        service_name = sys.intern(service_name)
+        previous = self.services.get(port)
         self.services[port] = service_name
-        self.update_metadata("services_updated", True)
+        if self._inventory is not None and previous is not service_name:
+            self._inventory.service_changed(self, previous, service_name)
+        self.update_metadata("services_updated", True, timestamp)
 
-    def add_open_port(self, port: int):
+    def add_open_port(self, port: int, timestamp: Optional[float] = None) -> bool:
         """
         Add an open port to the host.
 
         :param port: The port number to add.
+        :param timestamp: Epoch timestamp of the update; taken now if omitted.
+        :return: True if the port was not known before.
         """
-        if port not in self.open_ports:
-            self.open_ports.append(port)
-            self.update_metadata("open_ports_updated", True)
+        port = int(port)
+        index = bisect_left(self._ports, port)
+        if index < len(self._ports) and self._ports[index] == port:
+            return False
+        self._ports.insert(index, port)
+        if self._inventory is not None:
+            self._inventory.port_added(self, port)
+        self.update_metadata("open_ports_updated", True, timestamp)
+        return True
 
-    def add_scan_result(self, scan_type: str, result: Dict[str, Any]):
+    def add_scan_result(self, scan_type: str, result: Dict[str, Any], timestamp: Optional[float] = None):
         """
         Add scan results for a specific scan type.
 
         :param scan_type: The type of scan (e.g., "discovery", "vulnerability").
         :param result: The result data of the scan.
+        :param timestamp: Epoch timestamp of the update; taken now if omitted.
         """
         self.scan_results[scan_type] = result
-        self.update_metadata(f"scan_{scan_type}_updated", True)
+        self.update_metadata(f"scan_{scan_type}_updated", True, timestamp)
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -80,12 +187,32 @@ class HostManager:
         """
         return {
             "ip_address": self.ip_address,
-            "metadata": self.metadata,
+            "metadata": self._export_metadata(),
             "services": self.services,
             "open_ports": self.open_ports,
             "scan_results": self.scan_results,
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HostManager":
+        """
+        Rebuild a host from the output of `to_dict` (e.g. a previous run's inventory).
+
+        :param data: A dictionary produced by `to_dict`.
+        :return: The restored HostManager.
+        """
+        host = cls(data["ip_address"])
+        metadata = dict(data.get("metadata", {}))
+        for key, attribute in (("created_at", "_created_at"), ("last_updated", "_last_updated")):
+            if key in metadata:
+                setattr(host, attribute, datetime.fromisoformat(metadata.pop(key)).timestamp())
+        if metadata:
+            host._flags = metadata
+        host._ports = array("H", sorted({int(port) for port in data.get("open_ports", [])}))
+        host.services = {int(port): sys.intern(name) for port, name in data.get("services", {}).items()}
+        host.scan_results = host.merge_data(host.scan_results, data.get("scan_results", {}))
+        return host
+
     def save_to_file(self, file_path: str):
         """
         Save the host data to a file.
@@ -112,16 +239,19 @@ class HostManager:
         """
         Update the host data based on scan results.
 
+        A single timestamp is taken for the whole update rather than one per port or service.
+
         :param scan_type: The type of scan (e.g., "discovery", "port_scan").
         :param scan_data: The scan result data.
         """
-        self.add_scan_result(scan_type, scan_data)
+        timestamp = time.time()
+        self.add_scan_result(scan_type, scan_data, timestamp)
         if "ports" in scan_data:
             for port in scan_data["ports"]:
-                self.add_open_port(port)
+                self.add_open_port(port, timestamp)
         if "services" in scan_data:
             for port, service in scan_data["services"].items():
-                self.add_service(port, service)
+                self.add_service(port, service, timestamp)
 
     def execute_scan(self, scan_manager, scan_type: str):
         """
@@ -139,13 +269,14 @@ class HostManager:
 
         :return: A string summary of the scan results.
         """
-        summary = f"Host: {self.ip_address}\n"
-        summary += f"Metadata: {self.metadata}\n"
-        summary += f"Open Ports: {self.open_ports}\n"
-        summary += "Services:\n"
-        for port, service in self.services.items():
-            summary += f"  - Port {port}: {service}\n"
-        summary += "Scan Results:\n"
-        for scan_type, result in self.scan_results.items():
-            summary += f"  - {scan_type}: {result}\n"
-        return summary
\ No newline at end of file
+        lines = [
+            f"Host: {self.ip_address}",
+            f"Metadata: {self._export_metadata()}",
+            f"Open Ports: {self.open_ports}",
+            "Services:",
+        ]
+        lines.extend(f"  - Port {port}: {service}" for port, service in self.services.items())
+        lines.append("Scan Results:")
+        lines.extend(f"  - {scan_type}: {result}" for scan_type, result in self.scan_results.items())
+        lines.append("")
+        return "\n".join(lines)
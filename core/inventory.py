@@ -0,0 +1,219 @@
+import ipaddress
+from collections import Counter
+from config.config import INVENTORY_SUBNET_PREFIX
+
+
+def subnet_key(ip_address):
+    """
+    Returns:
+        str: The /24 (IPv4) or /64 (IPv6) subnet holding an address, e.g. "10.0.3.0/24";
+            None for hostnames and other keys that are not addresses.
+    """
+    if ":" not in ip_address:
+        if INVENTORY_SUBNET_PREFIX == 24 and ip_address.count(".") == 3 and ip_address.replace(".", "").isdigit():
+            return ip_address.rpartition(".")[0] + ".0/24"
+        prefix = INVENTORY_SUBNET_PREFIX
+    else:
+        prefix = 64
+    try:
+        return str(ipaddress.ip_network(f"{ip_address}/{prefix}", strict=False))
+    except ValueError:
+        return None
+
+
+def address_key(ip_address):
+    """
+    Returns:
+        tuple: Sort key ordering IPv4 addresses before IPv6 ones, each family in address order,
+            followed by hostnames in name order.
+    """
+    try:
+        address = ipaddress.ip_address(ip_address)
+    except ValueError:
+        return 7, 0, ip_address
+    return address.version, int(address), ""
+
+
+class Inventory(dict):
+    """
+    Workflow hosts keyed by IP address, indexed by open port, service and subnet.
+
+    Behaves like the plain `{ip: HostManager}` dict it replaces. Every host
+    added is attached to the index, and its `add_open_port` and `add_service`
+    calls keep the index up to date, so queries such as "hosts with 445 open"
+    or "hosts running http" cost the size of the answer, not of the fleet.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.by_port = {}
+        self.by_service = {}
+        self.by_subnet = {}
+
+    @staticmethod
+    def _link(index, key, ip_address):
+        members = index.get(key)
+        if members is None:
+            members = index[key] = set()
+        members.add(ip_address)
+
+    @staticmethod
+    def _unlink(index, key, ip_address):
+        members = index.get(key)
+        if members is not None:
+            members.discard(ip_address)
+            if not members:
+                del index[key]
+
+    def __setitem__(self, ip_address, host_instance):
+        previous = self.get(ip_address)
+        if previous is host_instance:
+            return
+        if previous is not None:
+            self._remove(previous)
+        super().__setitem__(ip_address, host_instance)
+        host_instance.attach_inventory(self)
+        subnet = subnet_key(ip_address)
+        if subnet is not None:
+            self._link(self.by_subnet, subnet, ip_address)
+        for port in host_instance.open_ports:
+            self._link(self.by_port, port, ip_address)
+        for service_name in host_instance.services.values():
+            self._link(self.by_service, service_name, ip_address)
+
+    def __delitem__(self, ip_address):
+        self._remove(self[ip_address])
+        super().__delitem__(ip_address)
+
+    def _remove(self, host_instance):
+        ip_address = host_instance.ip_address
+        host_instance.attach_inventory(None)
+        subnet = subnet_key(ip_address)
+        if subnet is not None:
+            self._unlink(self.by_subnet, subnet, ip_address)
+        for port in host_instance.open_ports:
+            self._unlink(self.by_port, port, ip_address)
+        for service_name in host_instance.services.values():
+            self._unlink(self.by_service, service_name, ip_address)
+
+    def pop(self, ip_address, *default):
+        if ip_address not in self:
+            if default:
+                return default[0]
+            raise KeyError(ip_address)
+        host_instance = self[ip_address]
+        del self[ip_address]
+        return host_instance
+
+    def update(self, *args, **kwargs):
+        for ip_address, host_instance in dict(*args, **kwargs).items():
+            self[ip_address] = host_instance
+
+    def setdefault(self, ip_address, host_instance):
+        if ip_address not in self:
+            self[ip_address] = host_instance
+        return self[ip_address]
+
+    def port_added(self, host_instance, port):
+        """Called by an attached host when it learns an open port."""
+        self._link(self.by_port, port, host_instance.ip_address)
+
+    def service_changed(self, host_instance, old_name, new_name):
+        """Called by an attached host when the service on one of its ports changes."""
+        ip_address = host_instance.ip_address
+        if old_name is not None and old_name not in host_instance.services.values():
+            self._unlink(self.by_service, old_name, ip_address)
+        self._link(self.by_service, new_name, ip_address)
+
+    def _hosts(self, ip_addresses):
+        return [self[ip_address] for ip_address in sorted(ip_addresses, key=address_key)]
+
+    def with_port(self, port):
+        """
+        Returns:
+            list: Hosts with `port` open, in address order.
+        """
+        return self._hosts(self.by_port.get(int(port), ()))
+
+    def with_service(self, service_name):
+        """
+        Returns:
+            list: Hosts running `service_name` on any port, in address order.
+        """
+        return self._hosts(self.by_service.get(service_name, ()))
+
+    def _subnet_members(self, network):
+        network = ipaddress.ip_network(network, strict=False)
+        key_network = ipaddress.ip_network(subnet_key(str(network.network_address)))
+        if network.prefixlen >= key_network.prefixlen:
+            # Narrower than one index bucket: filter that bucket
+            return {ip_address for ip_address in self.by_subnet.get(str(key_network), ())
+                    if ipaddress.ip_address(ip_address) in network}
+        members = set()
+        for key, ip_addresses in self.by_subnet.items():
+            key_network = ipaddress.ip_network(key)
+            if key_network.version == network.version and key_network.subnet_of(network):
+                members |= ip_addresses
+        return members
+
+    def in_subnet(self, network):
+        """
+        Returns:
+            list: Hosts inside a CIDR network, in address order.
+        """
+        return self._hosts(self._subnet_members(network))
+
+    def query(self, ports=(), services=(), subnet=None):
+        """
+        Hosts matching every given criterion.
+
+        Args:
+            ports (iterable): Match hosts with any of these ports open.
+            services (iterable): Match hosts running any of these services.
+            subnet (str): Match hosts inside this CIDR network.
+
+        Returns:
+            list: The matching hosts, in address order; every host if no criterion is given.
+        """
+        selections = []
+        if ports:
+            selections.append(set().union(*(self.by_port.get(int(port), ()) for port in ports)))
+        if services:
+            selections.append(set().union(*(self.by_service.get(name, ()) for name in services)))
+        if subnet is not None:
+            selections.append(self._subnet_members(subnet))
+        if not selections:
+            return self._hosts(self.keys())
+        selections.sort(key=len)
+        return self._hosts(selections[0].intersection(*selections[1:]))
+
+    def matches(self, host_instance, ports=(), services=(), subnet=None):
+        """
+        Returns:
+            bool: Whether a single host satisfies the same criteria as `query`.
+        """
+        if ports and not any(host_instance.has_port(int(port)) for port in ports):
+            return False
+        if services and not set(services).intersection(host_instance.services.values()):
+            return False
+        if subnet is not None:
+            if subnet_key(host_instance.ip_address) is None:
+                return False  # Hostnames belong to no subnet
+            if ipaddress.ip_address(host_instance.ip_address) not in ipaddress.ip_network(subnet, strict=False):
+                return False
+        return True
+
+    def summary(self, top=10):
+        """
+        Returns:
+            dict: Host count and the most common ports, services and subnets with their host counts.
+        """
+        def most_common(index):
+            return dict(Counter({key: len(members) for key, members in index.items()}).most_common(top))
+
+        return {
+            "hosts": len(self),
+            "ports": most_common(self.by_port),
+            "services": most_common(self.by_service),
+            "subnets": most_common(self.by_subnet),
+        }
@@ -0,0 +1,388 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from config.config import (
+    METRICS_SAMPLE_INTERVAL,
+    METRICS_LOOP_LAG_INTERVAL,
+    METRICS_TRACE_SCANS,
+    METRICS_LOOP_LAG_SAMPLES,
+)
+
+# Upper bounds (seconds) of the histogram buckets exported for queue wait and runtime
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+class ScanRecord:
+    """
+    Timings and resource usage of a single scan.
+    """
+
+    __slots__ = ("scan_id", "scan_type", "queued_at", "started_at", "finished_at", "status", "cached",
+                 "output_bytes", "cpu_seconds", "peak_rss_bytes")
+
+    def __init__(self, scan_id, scan_type, queued_at):
+        self.scan_id = scan_id
+        self.scan_type = scan_type
+        self.queued_at = queued_at
+        self.started_at = None
+        self.finished_at = None
+        self.status = "queued"
+        self.cached = False
+        self.output_bytes = 0
+        self.cpu_seconds = 0.0
+        self.peak_rss_bytes = 0
+
+    @property
+    def queue_wait(self):
+        return self.started_at - self.queued_at if self.started_at is not None else None
+
+    @property
+    def runtime(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self):
+        return {
+            "scan_id": self.scan_id,
+            "scan_type": self.scan_type,
+            "status": self.status,
+            "cached": self.cached,
+            "queue_wait": self.queue_wait,
+            "runtime": self.runtime,
+            "output_bytes": self.output_bytes,
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "peak_rss_bytes": self.peak_rss_bytes,
+        }
+
+
+class Histogram:
+    """
+    Cumulative Prometheus-style histogram over fixed buckets.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            yield bound, total
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a periodic sleep wakes up.
+
+    Mean and maximum cover the whole run; the percentile is taken over the
+    most recent `history` samples, so a long run does not grow the monitor.
+    """
+
+    def __init__(self, interval=METRICS_LOOP_LAG_INTERVAL, history=METRICS_LOOP_LAG_SAMPLES):
+        """
+        Args:
+            interval (float): Seconds between samples.
+            history (int): Recent samples kept for the percentile.
+        """
+        self.interval = interval
+        self.samples = deque(maxlen=history)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.observe(max(0.0, loop.time() - started - self.interval))
+
+    def observe(self, lag):
+        self.samples.append(lag)
+        self.count += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return self.summary()
+
+    def summary(self):
+        """
+        Returns:
+            dict: Mean, 99th percentile and maximum lag in milliseconds.
+        """
+        samples = sorted(self.samples) or [0.0]
+        return {
+            "mean_ms": round(1000 * self.total / max(self.count, 1), 3),
+            "p99_ms": round(1000 * samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+            "max_ms": round(1000 * self.max, 3),
+        }
+
+
+class MetricsRegistry:
+    """
+    Collects per-scan and per-phase timings and exports them for later analysis.
+
+    Scans are recorded by `ScanManager`, phase spans by `WorkflowManager`. The
+    registry can be written as a Prometheus text-format file (aggregates) and
+    as a JSON trace in the Chrome trace-event format (one event per scan and
+    phase), which Perfetto or chrome://tracing can display.
+
+    Only queued and running scans are kept in `scans`. A finished scan is
+    folded into the per-type totals and histograms and then kept in the
+    bounded `finished` window for the trace, so memory stays flat however
+    many scans a run performs.
+    """
+
+    def __init__(self, sample_interval=METRICS_SAMPLE_INTERVAL, trace_scans=METRICS_TRACE_SCANS):
+        """
+        Args:
+            sample_interval (float): Seconds between psutil samples of a running subprocess.
+            trace_scans (int): Most recent finished scans kept for the trace.
+        """
+        self.sample_interval = sample_interval
+        self.origin = time.monotonic()
+        self.scans = {}
+        self.finished = deque(maxlen=trace_scans)
+        self.totals = {}
+        self.statuses = Counter()
+        self.spans = []
+        self.queue_wait = {}
+        self.runtime = {}
+        self.loop_lag = LoopLagMonitor()
+
+    def scan_queued(self, scan_id, scan_type):
+        self.scans[scan_id] = ScanRecord(scan_id, scan_type, time.monotonic())
+
+    def scan_cached(self, scan_id, scan_type):
+        record = ScanRecord(scan_id, scan_type, time.monotonic())
+        record.started_at = record.finished_at = record.queued_at
+        record.status = "completed"
+        record.cached = True
+        self._fold(record)
+
+    def scan_started(self, scan_id):
+        record = self.scans[scan_id]
+        record.started_at = time.monotonic()
+        record.status = "in_progress"
+        self.queue_wait.setdefault(record.scan_type, Histogram()).observe(record.queue_wait)
+
+    def scan_finished(self, scan_id, status):
+        record = self.scans.pop(scan_id)
+        record.finished_at = time.monotonic()
+        record.status = status
+        if record.started_at is not None:
+            self.runtime.setdefault(record.scan_type, Histogram()).observe(record.runtime)
+        self._fold(record)
+
+    def _fold(self, record):
+        """Add a finished scan to the per-type totals and the trace window."""
+        entry = self.totals.setdefault(record.scan_type, {
+            "scans": 0, "cached": 0, "errored": 0, "queue_wait_seconds": 0.0, "runtime_seconds": 0.0,
+            "output_bytes": 0, "cpu_seconds": 0.0, "peak_rss_bytes": 0,
+        })
+        entry["scans"] += 1
+        entry["cached"] += record.cached
+        entry["errored"] += record.status == "errored"
+        entry["queue_wait_seconds"] += record.queue_wait or 0.0
+        entry["runtime_seconds"] += record.runtime or 0.0
+        entry["output_bytes"] += record.output_bytes
+        entry["cpu_seconds"] += record.cpu_seconds
+        entry["peak_rss_bytes"] = max(entry["peak_rss_bytes"], record.peak_rss_bytes)
+        self.statuses[(record.scan_type, record.status, record.cached)] += 1
+        self.finished.append(record)
+
+    def add_output_bytes(self, scan_id, size):
+        self.scans[scan_id].output_bytes += size
+
+    async def sample_process(self, scan_id, pid):
+        """
+        Sample CPU time and RSS of a scan subprocess until it exits or the task is cancelled.
+
+        CPU time is the last sampled value, so work done after the final
+        sample of a short-lived process is not counted.
+
+        Args:
+            scan_id (str): Scan the process belongs to.
+            pid (int): Process id of the subprocess.
+        """
+        import psutil
+
+        record = self.scans[scan_id]
+        try:
+            process = psutil.Process(pid)
+            while True:
+                with process.oneshot():
+                    cpu = process.cpu_times()
+                    record.cpu_seconds = cpu.user + cpu.system
+                    record.peak_rss_bytes = max(record.peak_rss_bytes, process.memory_info().rss)
+                await asyncio.sleep(self.sample_interval)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time a block of work (e.g. a workflow phase) as a named span.
+
+        Args:
+            name (str): Span name.
+            **attributes: Extra values stored with the span.
+        """
+        started = time.monotonic()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.spans.append({
+                "name": name,
+                "start": started,
+                "duration": time.monotonic() - started,
+                "status": status,
+                "attributes": attributes,
+            })
+
+    def summary(self):
+        """
+        Returns:
+            dict: Aggregate counts, timings and resource usage per scan type (finished scans), phase
+                durations and loop lag.
+        """
+        per_type = {}
+        for scan_type, totals in self.totals.items():
+            entry = per_type[scan_type] = dict(totals)
+            for key in ("queue_wait_seconds", "runtime_seconds", "cpu_seconds"):
+                entry[key] = round(entry[key], 4)
+        return {
+            "scan_types": per_type,
+            "phases": {span["name"]: round(span["duration"], 4) for span in self.spans},
+            "loop_lag": self.loop_lag.summary(),
+        }
+
+    def to_prometheus(self):
+        """
+        Render the aggregates in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics document.
+        """
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histograms(name, help_text, by_type):
+            family(name, "histogram", help_text)
+            for scan_type, histogram in sorted(by_type.items()):
+                for bound, total in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{scan_type="{scan_type}",le="{bound}"}} {total}')
+                lines.append(f'{name}_sum{{scan_type="{scan_type}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{scan_type="{scan_type}"}} {histogram.count}')
+
+        statuses = self.statuses + Counter(
+            (record.scan_type, record.status, record.cached) for record in self.scans.values()
+        )
+        family("aether_scans_total", "counter", "Scans by type and final status.")
+        for (scan_type, status, cached), count in sorted(statuses.items()):
+            lines.append(f'aether_scans_total{{scan_type="{scan_type}",status="{status}",'
+                         f'cached="{str(cached).lower()}"}} {count}')
+
+        histograms("aether_scan_queue_wait_seconds", "Time scans spent queued in the scheduler.", self.queue_wait)
+        histograms("aether_scan_runtime_seconds", "Wall time of scan execution.", self.runtime)
+
+        summary = self.summary()
+        for name, key, help_text in (
+            ("aether_scan_output_bytes_total", "output_bytes", "Bytes of scanner output read."),
+            ("aether_scan_cpu_seconds_total", "cpu_seconds", "Sampled CPU time of scan subprocesses."),
+            ("aether_scan_peak_rss_bytes", "peak_rss_bytes", "Largest sampled RSS of a scan subprocess."),
+        ):
+            family(name, "gauge" if key == "peak_rss_bytes" else "counter", help_text)
+            for scan_type, entry in sorted(summary["scan_types"].items()):
+                lines.append(f'{name}{{scan_type="{scan_type}"}} {entry[key]}')
+
+        family("aether_phase_duration_seconds", "gauge", "Wall time of each workflow phase.")
+        for span in self.spans:
+            lines.append(f'aether_phase_duration_seconds{{phase="{span["name"]}"}} {span["duration"]:.6f}')
+
+        family("aether_event_loop_lag_seconds", "gauge", "Event-loop lag observed during the workflow.")
+        for stat in ("mean", "p99", "max"):
+            lines.append(f'aether_event_loop_lag_seconds{{stat="{stat}"}} {summary["loop_lag"][stat + "_ms"] / 1000:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def to_trace(self):
+        """
+        Build a Chrome trace-event document: queue wait and runtime of every phase span, of the scans
+        still running and of the most recent `trace_scans` finished ones.
+
+        Returns:
+            dict: The trace, ready for `json.dump`.
+        """
+        def micros(timestamp):
+            return round((timestamp - self.origin) * 1e6)
+
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span["name"], "cat": "phase", "ph": "X", "pid": 1, "tid": "phases",
+                "ts": micros(span["start"]), "dur": round(span["duration"] * 1e6),
+                "args": {"status": span["status"], **span["attributes"]},
+            })
+        for record in list(self.finished) + list(self.scans.values()):
+            if record.started_at is None:
+                continue
+            tid = f"scans:{record.scan_type}"
+            if not record.cached:
+                events.append({
+                    "name": f"{record.scan_id} queued", "cat": "queue", "ph": "X", "pid": 1, "tid": tid,
+                    "ts": micros(record.queued_at), "dur": round(record.queue_wait * 1e6),
+                })
+            if record.finished_at is not None:
+                events.append({
+                    "name": record.scan_id, "cat": "scan", "ph": "X", "pid": 1, "tid": tid,
+                    "ts": micros(record.started_at), "dur": round(record.runtime * 1e6),
+                    "args": record.to_dict(),
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "summary": self.summary()}
+
+    def export_prometheus(self, path):
+        self._write(path, self.to_prometheus())
+
+    def export_trace(self, path):
+        self._write(path, json.dumps(self.to_trace()))
+
+    @staticmethod
+    def _write(path, content):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
@@ -0,0 +1,199 @@
+import asyncio
+from config.config import PORT_SPLIT_SCAN_TYPE, PORT_SPLIT_PARTS
+from core.scheduler import DEFAULT_PRIORITY
+
+MAX_PORT = 65535
+
+# nmap's 100 most frequently open TCP ports; scanned in the first partition
+TOP_PORTS = (
+    7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113, 119, 135, 139, 143, 144, 179, 199,
+    389, 427, 443, 444, 445, 465, 513, 514, 515, 543, 544, 548, 554, 587, 631, 646, 873, 990, 993, 995, 1025, 1026,
+    1027, 1028, 1029, 1110, 1433, 1720, 1723, 1755, 1900, 2000, 2001, 2049, 2121, 2717, 3000, 3128, 3306, 3389,
+    3986, 4899, 5000, 5009, 5051, 5060, 5101, 5190, 5357, 5432, 5631, 5666, 5800, 5900, 6000, 6001, 6646, 7070,
+    8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999, 10000, 32768, 49152, 49153, 49154, 49155, 49156, 49157,
+)
+
+# Options that select ports; dropped from a scan type's arguments when a partition supplies its own
+PORT_OPTIONS = ("-p", "--top-ports", "--port-ratio")
+
+
+def format_ports(ports):
+    """
+    Returns:
+        str: Sorted ports in nmap's compact notation, e.g. "1-20,22,25-79".
+    """
+    ranges = []
+    for port in sorted(ports):
+        if ranges and port == ranges[-1][1] + 1:
+            ranges[-1][1] = port
+        else:
+            ranges.append([port, port])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def split_ports(parts=PORT_SPLIT_PARTS, priority_ports=TOP_PORTS, last_port=MAX_PORT):
+    """
+    Partition the port space for concurrent scanning, most likely open ports first.
+
+    The first partition holds `priority_ports`, the second the rest of the
+    well-known ports (1-1024). The remaining space is cut into ranges that
+    double in size, so the denser low registered ports finish early and the
+    sparse high ports come last in a few large ranges.
+
+    Args:
+        parts (int): Number of partitions (at least 2).
+        priority_ports (iterable): Ports scanned in the first partition.
+        last_port (int): Highest port to scan.
+
+    Returns:
+        list: nmap port specifications, one per partition, in scan order.
+    """
+    priority = sorted({port for port in priority_ports if port <= last_port})
+    skip = set(priority)
+    partitions = [format_ports(priority)]
+    well_known = [port for port in range(1, min(1024, last_port) + 1) if port not in skip]
+    if well_known:
+        partitions.append(format_ports(well_known))
+
+    first = 1025
+    remaining = max(parts - len(partitions), 1)
+    total = last_port - first + 1
+    weights = [2 ** index for index in range(remaining)]
+    for weight in weights:
+        if first > last_port:
+            break
+        size = max(1, total * weight // sum(weights))
+        last = last_port if weight == weights[-1] else min(first + size - 1, last_port)
+        ports = [port for port in range(first, last + 1) if port not in skip]
+        if ports:
+            partitions.append(format_ports(ports))
+        first = last + 1
+    return partitions
+
+
+def strip_port_options(arguments):
+    """
+    Remove port-selection options from an nmap argument list.
+
+    Args:
+        arguments (list): Split nmap arguments, e.g. ["-sS", "-p-", "-T4"].
+
+    Returns:
+        list: The arguments without -p, --top-ports, --port-ratio and -F.
+    """
+    stripped = []
+    skip_value = False
+    for argument in arguments:
+        if skip_value:
+            skip_value = False
+        elif argument in PORT_OPTIONS:
+            skip_value = True
+        elif argument == "-F" or argument.startswith("-p"):  # -p-, -p22,80 (host discovery options are -P*)
+            continue
+        else:
+            stripped.append(argument)
+    return stripped
+
+
+def merge_host_results(merged, details):
+    """
+    Fold one partition's host details into the accumulated details.
+
+    Returns:
+        list: Ports that were not known before.
+    """
+    known = set(merged.setdefault("ports", []))
+    new_ports = sorted(set(details.get("ports", [])) - known)
+    merged["ports"] = sorted(known.union(new_ports))
+    merged.setdefault("services", {}).update(details.get("services", {}))
+    for key, scripts in details.get("scripts", {}).items():
+        merged.setdefault("scripts", {}).setdefault(key, {}).update(scripts)
+    if details.get("state") == "up" or "state" not in merged:
+        merged["state"] = details.get("state", merged.get("state"))
+    for hostname in details.get("hostnames", []):
+        if hostname not in merged.setdefault("hostnames", []):
+            merged["hostnames"].append(hostname)
+    return new_ports
+
+
+class PortSplitScanner:
+    """
+    Runs a full-port scan of one host as several concurrent nmap invocations.
+
+    Every partition goes through the scan scheduler, so partitions share its
+    global and per-type budget with all other scans. Later partitions are
+    queued with a lower priority, so across many hosts the common ports are
+    scanned first. Results are merged into the host after each partition,
+    without duplicate ports or services.
+    """
+
+    def __init__(self, scan_manager, scan_type=PORT_SPLIT_SCAN_TYPE, parts=PORT_SPLIT_PARTS, workflow_id="default"):
+        """
+        Args:
+            scan_manager (ScanManager): Scanner used to run each partition.
+            scan_type (str): Port-scan type from scan_config.json; its own port options are overridden.
+            parts (int): Number of port partitions per host.
+            workflow_id (str): Workflow key passed to the scan scheduler.
+        """
+        self.scan_manager = scan_manager
+        self.scan_type = scan_type
+        self.partitions = split_ports(parts)
+        self.workflow_id = workflow_id
+        # The scan type's own priority, when the scan manager has a local scan configuration
+        scan_config = getattr(scan_manager, "scan_config", {})
+        self.base_priority = scan_config.get(scan_type, {}).get("priority", DEFAULT_PRIORITY)
+
+    async def scan_partition(self, host_instance, index, additional_args=None):
+        port_arguments = f"-p {self.partitions[index]}"
+        scan_id = await self.scan_manager.start_scan(
+            host_instance.ip_address,
+            scan_type=self.scan_type,
+            additional_args=f"{additional_args} {port_arguments}" if additional_args else port_arguments,
+            workflow_id=self.workflow_id,
+            priority=self.base_priority + index,
+        )
+        return index, await self.scan_manager.wait_for_scan(scan_id)
+
+    async def scan(self, host_instance, additional_args=None, on_partition=None):
+        """
+        Scan every port partition of a host and merge the results into it.
+
+        Args:
+            host_instance (HostManager): The host to scan.
+            additional_args (str): Extra nmap arguments for every partition.
+            on_partition (callable): Called with (host, partition index, new open ports) as each
+                partition is merged, so callers can act on the first open ports early. A failed
+                partition is reported with None for its new ports.
+
+        Returns:
+            dict: The merged scan details of the host.
+        """
+        merged = {}
+        failed = []
+        tasks = [
+            asyncio.ensure_future(self.scan_partition(host_instance, index, additional_args))
+            for index in range(len(self.partitions))
+        ]
+        pending = {task: index for index, task in enumerate(tasks)}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Partitions finishing together are merged in port-priority order
+                for task in sorted(done, key=pending.get):
+                    index = pending.pop(task)
+                    try:
+                        _, result = task.result()
+                    except Exception as e:
+                        failed.append(str(e))
+                        new_ports = None
+                    else:
+                        new_ports = merge_host_results(merged, result.get(host_instance.ip_address, {}))
+                        host_instance.update_from_scan(self.scan_type, merged)
+                    if on_partition is not None:
+                        on_partition(host_instance, index, new_ports)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if failed:
+            host_instance.update_metadata(f"scan_{self.scan_type}_error", failed)
+        return merged
@@ -0,0 +1,188 @@
+import ipaddress
+import re
+import time
+from collections import defaultdict, deque
+from config.config import (
+    RATE_CONTROL_SUBNET_PREFIX,
+    RATE_CONTROL_MAX_RATE,
+    RATE_CONTROL_PARALLELISM,
+    RATE_CONTROL_HOSTGROUP,
+    RATE_CONTROL_DECREASE,
+    RATE_CONTROL_SLOWDOWN,
+    RATE_CONTROL_T4_RATE,
+    RATE_CONTROL_HISTORY,
+)
+from utils.targets import count_addresses, parse_target
+
+# nmap messages that mean probes are being dropped or hosts are not keeping up
+DROP_PATTERNS = (
+    re.compile(r"due to (\d+) out of \d+ dropped probes"),
+    re.compile(r"retransmission cap hit"),
+    re.compile(r"due to host timeout"),
+    re.compile(r"RTTVAR has grown"),
+)
+
+
+class AIMD:
+    """
+    A value that grows additively and shrinks multiplicatively, within bounds.
+    """
+
+    __slots__ = ("value", "minimum", "maximum", "step")
+
+    def __init__(self, initial, minimum, maximum, step):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.value = min(max(initial, minimum), maximum)
+
+    def increase(self):
+        self.value = min(self.value + self.step, self.maximum)
+
+    def decrease(self, factor=RATE_CONTROL_DECREASE):
+        self.value = max(int(self.value * factor), self.minimum)
+
+
+class SubnetRate:
+    """
+    Rate-control state of one subnet.
+    """
+
+    def __init__(self, max_rate, parallelism, hostgroup):
+        self.max_rate = AIMD(*max_rate)
+        self.parallelism = AIMD(*parallelism)
+        self.hostgroup = AIMD(*hostgroup)
+        self.seconds_per_address = None
+        self.scans = 0
+
+    @property
+    def timing(self):
+        return "-T4" if self.max_rate.value >= RATE_CONTROL_T4_RATE else "-T3"
+
+    def arguments(self):
+        return (f"{self.timing} --max-rate {self.max_rate.value} "
+                f"--max-parallelism {self.parallelism.value} --max-hostgroup {self.hostgroup.value}")
+
+    def settings(self):
+        return {
+            "timing": self.timing,
+            "max_rate": self.max_rate.value,
+            "max_parallelism": self.parallelism.value,
+            "max_hostgroup": self.hostgroup.value,
+        }
+
+
+class RateController:
+    """
+    AIMD rate control of nmap scans, per subnet.
+
+    Each finished scan is judged by its time per address against the subnet's
+    usual time, by whether it failed, and by nmap's dropped-probe and
+    retransmission warnings. Clean scans raise the subnet's packet rate,
+    probe parallelism and host group size by a fixed step; a congested scan
+    multiplies them by RATE_CONTROL_DECREASE. The next scans of that subnet are
+    launched with the adjusted nmap options.
+    """
+
+    def __init__(self, subnet_prefix=RATE_CONTROL_SUBNET_PREFIX, max_rate=RATE_CONTROL_MAX_RATE,
+                 parallelism=RATE_CONTROL_PARALLELISM, hostgroup=RATE_CONTROL_HOSTGROUP,
+                 slowdown=RATE_CONTROL_SLOWDOWN, history=RATE_CONTROL_HISTORY):
+        """
+        Args:
+            subnet_prefix (int): IPv4 prefix length grouping targets into subnets (IPv6 uses 64).
+            max_rate (tuple): (initial, minimum, maximum, step) of nmap's --max-rate.
+            parallelism (tuple): (initial, minimum, maximum, step) of --max-parallelism.
+            hostgroup (tuple): (initial, minimum, maximum, step) of --max-hostgroup.
+            slowdown (float): Ratio to the usual time per address above which a scan counts as congested.
+            history (int): Number of recent decisions kept in `decisions`.
+        """
+        self.subnet_prefix = subnet_prefix
+        self.slowdown = slowdown
+        self.subnets = defaultdict(lambda: SubnetRate(max_rate, parallelism, hostgroup))
+        self.decisions = deque(maxlen=history)
+        self.drops = defaultdict(int)
+
+    def subnet_for(self, target):
+        """
+        Returns:
+            str: The subnet of a target's first address, e.g. "10.0.3.0/24". Hostnames
+                and other targets that are not addresses are keyed by the name itself.
+        """
+        token = target.split()[0] if target.split() else target
+        try:
+            version, first, _ = parse_target(token)
+        except ValueError:
+            return token.lower()
+        prefix = self.subnet_prefix if version == 4 else 64
+        return str(ipaddress.ip_network((first, prefix), strict=False))
+
+    def arguments(self, subnet):
+        """
+        Returns:
+            str: nmap options for the next scan in `subnet`.
+        """
+        return self.subnets[subnet].arguments()
+
+    def observe_output(self, scan_id, line):
+        """Count dropped-probe and retransmission warnings in a line of nmap output."""
+        for pattern in DROP_PATTERNS:
+            match = pattern.search(line)
+            if match:
+                self.drops[scan_id] += int(match.group(1)) if match.groups() else 1
+                return
+
+    def record(self, scan_id, target, subnet, duration, failed=False):
+        """
+        Judge a finished scan and adjust its subnet's settings.
+
+        Args:
+            scan_id (str): The scan.
+            target (str): Its targets, used to count the addresses scanned.
+            subnet (str): Subnet returned by `subnet_for`.
+            duration (float): Wall time of the scan in seconds.
+            failed (bool): Whether the scan errored or timed out.
+
+        Returns:
+            dict: The decision: action, reason and the subnet's new settings.
+        """
+        state = self.subnets[subnet]
+        drops = self.drops.pop(scan_id, 0)
+        per_address = max(duration, 1e-6) / count_addresses(target)
+        baseline = state.seconds_per_address
+
+        if failed:
+            reason = "scan failed"
+        elif drops:
+            reason = f"{drops} dropped probes"
+        elif baseline is not None and per_address > self.slowdown * baseline:
+            reason = f"{per_address / baseline:.1f}x slower per address"
+        else:
+            reason = None
+
+        if reason is None:
+            for knob in (state.max_rate, state.parallelism, state.hostgroup):
+                knob.increase()
+            # The baseline only learns from clean scans, so congestion cannot become the norm
+            state.seconds_per_address = per_address if baseline is None else 0.8 * baseline + 0.2 * per_address
+        else:
+            for knob in (state.max_rate, state.parallelism, state.hostgroup):
+                knob.decrease()
+        state.scans += 1
+
+        decision = {
+            "subnet": subnet,
+            "action": "increase" if reason is None else "decrease",
+            "reason": reason or "clean scan",
+            "seconds_per_address": round(per_address, 6),
+            "at": time.time(),
+            **state.settings(),
+        }
+        self.decisions.append(decision)
+        return decision
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Current settings of every subnet seen so far.
+        """
+        return {subnet: {**state.settings(), "scans": state.scans} for subnet, state in self.subnets.items()}
@@ -0,0 +1,282 @@
+import csv
+import gzip
+import html
+import json
+import os
+import re
+from collections import Counter, defaultdict
+from config.config import REPORT_FORMATS, REPORT_TOP_ENTRIES
+from core.inventory import subnet_key
+
+# How nmap's vulns library marks a confirmed or likely finding ("State: NOT VULNERABLE" does not match)
+VULNERABLE_PATTERN = re.compile(r"State: (?:LIKELY )?VULNERABLE")
+
+CSV_COLUMNS = ("ip_address", "subnet", "state", "open_ports", "services", "vulnerabilities", "last_updated")
+
+
+def open_output(path, compress=False):
+    """
+    Open a report file for writing text, gzip-compressed if asked.
+
+    Returns:
+        file: A text file object; the caller closes it.
+    """
+    if compress:
+        return gzip.open(path + ".gz", "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def iter_host_dicts(source):
+    """
+    Stream `HostManager.to_dict`-shaped dictionaries from a results store or a host inventory.
+
+    Args:
+        source: An object with `iter_hosts()` (e.g. SQLiteResultsStore), a mapping of
+            HostManager objects (e.g. the workflow's Inventory), or an iterable of host dicts.
+
+    Yields:
+        dict: One host at a time; hosts are converted as they are reached, never all at once.
+    """
+    if hasattr(source, "iter_hosts"):
+        yield from source.iter_hosts()
+        return
+    for host in (source.values() if hasattr(source, "values") else source):
+        yield host.to_dict() if hasattr(host, "to_dict") else host
+
+
+def find_vulnerabilities(host):
+    """
+    Returns:
+        list: "<port>/<script id>" for every script output of the host reporting a vulnerability.
+    """
+    findings = []
+    for result in host.get("scan_results", {}).values():
+        if not isinstance(result, dict):
+            continue
+        for port, scripts in result.get("scripts", {}).items():
+            for script_id, output in scripts.items():
+                if output and VULNERABLE_PATTERN.search(output):
+                    findings.append(f"{port}/{script_id}")
+    return findings
+
+
+class ReportAggregator:
+    """
+    Fleet totals computed in the same pass that writes the host rows.
+
+    Memory grows with the number of distinct services, ports and subnets,
+    not with the number of hosts.
+    """
+
+    def __init__(self):
+        self.hosts = 0
+        self.states = Counter()
+        self.ports_by_service = defaultdict(Counter)
+        self.hosts_by_subnet = Counter()
+        self.vulnerabilities_by_subnet = Counter()
+        self.vulnerabilities_by_script = Counter()
+
+    def add(self, host, row):
+        """
+        Args:
+            host (dict): The host, shaped like `HostManager.to_dict`.
+            row (dict): Its derived "subnet", "state" and vulnerability "findings".
+        """
+        subnet, findings = row["subnet"], row["findings"]
+        self.hosts += 1
+        self.states[row["state"]] += 1
+        self.hosts_by_subnet[subnet] += 1
+        services = host.get("services", {})
+        for port in host.get("open_ports", []):
+            # Keys are ints in memory but strings once a host has been through JSON
+            self.ports_by_service[services.get(port) or services.get(str(port)) or "unknown"][int(port)] += 1
+        if findings:
+            self.vulnerabilities_by_subnet[subnet] += len(findings)
+            self.vulnerabilities_by_script.update(finding.partition("/")[2] for finding in findings)
+
+    def summary(self, top=REPORT_TOP_ENTRIES):
+        """
+        Returns:
+            dict: Host and state counts, open ports by service, and vulnerability counts by subnet and
+                script; each section limited to its `top` largest entries.
+        """
+        ports_by_service = sorted(self.ports_by_service.items(), key=lambda item: -sum(item[1].values()))[:top]
+        return {
+            "hosts": self.hosts,
+            "states": dict(self.states),
+            "open_ports_by_service": {
+                service: dict(ports.most_common(top)) for service, ports in ports_by_service
+            },
+            "hosts_by_subnet": dict(self.hosts_by_subnet.most_common(top)),
+            "vulnerabilities_by_subnet": dict(self.vulnerabilities_by_subnet.most_common(top)),
+            "vulnerabilities_by_script": dict(self.vulnerabilities_by_script.most_common(top)),
+        }
+
+
+class JsonLinesReport:
+    """One JSON object per host, followed by a final summary record."""
+
+    extension = "jsonl"
+
+    def __init__(self, file):
+        self.file = file
+
+    def write_host(self, host, row):
+        self.file.write(json.dumps({**host, "subnet": row["subnet"], "vulnerabilities": row["findings"]},
+                                   default=str))
+        self.file.write("\n")
+
+    def finish(self, summary):
+        self.file.write(json.dumps({"summary": summary}, default=str))
+        self.file.write("\n")
+
+
+class CsvReport:
+    """One row per host with its ports, services and vulnerability count."""
+
+    extension = "csv"
+
+    def __init__(self, file):
+        self.writer = csv.writer(file)
+        self.writer.writerow(CSV_COLUMNS)
+
+    def write_host(self, host, row):
+        services = host.get("services", {})
+        self.writer.writerow((
+            host["ip_address"],
+            row["subnet"],
+            row["state"],
+            ";".join(str(port) for port in host.get("open_ports", [])),
+            ";".join(f"{port}/{name}" for port, name in services.items()),
+            len(row["findings"]),
+            host.get("metadata", {}).get("last_updated", ""),
+        ))
+
+    def finish(self, summary):
+        pass
+
+
+class HtmlReport:
+    """
+    A self-contained HTML page: the host table is streamed as rows arrive and
+    the fleet summary is appended below it once every host has been seen.
+    """
+
+    extension = "html"
+
+    STYLE = ("body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:2em}"
+             "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#eee}"
+             ".vulnerable{color:#b00;font-weight:bold}")
+
+    def __init__(self, file):
+        self.file = file
+        self.file.write(f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Aether scan report</title>"
+                        f"<style>{self.STYLE}</style></head><body><h1>Aether scan report</h1>"
+                        "<h2>Hosts</h2><table><tr><th>Host</th><th>Subnet</th><th>State</th><th>Open ports</th>"
+                        "<th>Services</th><th>Vulnerabilities</th></tr>\n")
+
+    def write_host(self, host, row):
+        findings = row["findings"]
+        cells = (
+            host["ip_address"],
+            row["subnet"],
+            row["state"],
+            ", ".join(str(port) for port in host.get("open_ports", [])),
+            ", ".join(f"{port}/{name}" for port, name in host.get("services", {}).items()),
+            ", ".join(findings),
+        )
+        self.file.write("<tr>" + "".join(
+            f"<td class=\"vulnerable\">{html.escape(str(cell))}</td>" if index == 5 and findings
+            else f"<td>{html.escape(str(cell))}</td>"
+            for index, cell in enumerate(cells)
+        ) + "</tr>\n")
+
+    @staticmethod
+    def table(title, headers, rows):
+        header = "".join(f"<th>{html.escape(name)}</th>" for name in headers)
+        body = "".join("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows)
+        return f"<h2>{html.escape(title)}</h2><table><tr>{header}</tr>{body}</table>\n"
+
+    def finish(self, summary):
+        self.file.write("</table>\n")
+        self.file.write(self.table("Summary", ("Hosts", "States"), [
+            (summary["hosts"], ", ".join(f"{state}: {count}" for state, count in summary["states"].items())),
+        ]))
+        self.file.write(self.table("Open ports by service", ("Service", "Ports (hosts)"), [
+            (service, ", ".join(f"{port} ({count})" for port, count in ports.items()))
+            for service, ports in summary["open_ports_by_service"].items()
+        ]))
+        self.file.write(self.table("Vulnerabilities by subnet", ("Subnet", "Findings"),
+                                   summary["vulnerabilities_by_subnet"].items()))
+        self.file.write(self.table("Vulnerabilities by script", ("Script", "Findings"),
+                                   summary["vulnerabilities_by_script"].items()))
+        self.file.write("</body></html>\n")
+
+
+REPORT_CLASSES = {report.extension: report for report in (JsonLinesReport, CsvReport, HtmlReport)}
+
+
+class ReportGenerator:
+    """
+    Writes fleet reports in one streaming pass over the hosts.
+
+    Every host is read once, written to each requested format and folded into
+    the aggregates, then dropped; the summary sections are written at the end.
+    """
+
+    def __init__(self, output_dir, formats=REPORT_FORMATS, compress=False, name="report"):
+        """
+        Args:
+            output_dir (str): Directory receiving the report files.
+            formats (iterable): Any of "jsonl", "csv" and "html".
+            compress (bool): gzip every report (adds ".gz" to the file names).
+            name (str): Base file name of the reports.
+        """
+        unknown = set(formats) - set(REPORT_CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown report formats: {', '.join(sorted(unknown))}")
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.compress = compress
+        self.name = name
+
+    def generate(self, source):
+        """
+        Write the reports.
+
+        Args:
+            source: Results store, host inventory or iterable of host dicts (see `iter_host_dicts`).
+
+        Returns:
+            dict: "files" (format -> path written) and "summary" (see `ReportAggregator.summary`).
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = {report_format: os.path.join(self.output_dir, f"{self.name}.{report_format}")
+                 for report_format in self.formats}
+        files = {}
+        aggregator = ReportAggregator()
+        try:
+            for report_format, path in paths.items():
+                files[report_format] = open_output(path, self.compress)
+            reports = [REPORT_CLASSES[report_format](files[report_format]) for report_format in self.formats]
+
+            for host in iter_host_dicts(source):
+                row = {
+                    "subnet": subnet_key(host["ip_address"]),
+                    "state": host.get("metadata", {}).get("state", "up"),
+                    "findings": find_vulnerabilities(host),
+                }
+                aggregator.add(host, row)
+                for report in reports:
+                    report.write_host(host, row)
+
+            summary = aggregator.summary()
+            for report in reports:
+                report.finish(summary)
+        finally:
+            for file in files.values():
+                file.close()
+        return {
+            "files": {report_format: path + ".gz" if self.compress else path for report_format, path in paths.items()},
+            "summary": summary,
+        }
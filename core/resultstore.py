@@ -0,0 +1,300 @@
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import RESULTS_WRITER_BATCH_SIZE, RESULTS_WRITER_FLUSH_SECONDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    ip TEXT PRIMARY KEY,
+    created_at TEXT,
+    last_updated TEXT,
+    metadata TEXT
+);
+CREATE TABLE IF NOT EXISTS ports (
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    PRIMARY KEY (ip, port)
+);
+CREATE TABLE IF NOT EXISTS services (
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (ip, port)
+);
+CREATE TABLE IF NOT EXISTS host_scan_results (
+    ip TEXT NOT NULL,
+    scan_type TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (ip, scan_type)
+);
+CREATE TABLE IF NOT EXISTS scan_results (
+    scan_id TEXT NOT NULL,
+    scan_type TEXT,
+    ip TEXT NOT NULL,
+    recorded_at REAL,
+    result TEXT,
+    PRIMARY KEY (scan_id, ip)
+);
+CREATE INDEX IF NOT EXISTS idx_ports_port ON ports (port);
+CREATE INDEX IF NOT EXISTS idx_services_name ON services (name);
+CREATE INDEX IF NOT EXISTS idx_services_port ON services (port);
+CREATE INDEX IF NOT EXISTS idx_services_ip ON services (ip);
+CREATE INDEX IF NOT EXISTS idx_scan_results_ip ON scan_results (ip);
+"""
+
+
+class ResultsBackend:
+    """
+    Interface for persisting workflow results.
+
+    Backends are called from the background `ResultsWriter` thread with whole
+    batches, never from the event loop.
+    """
+
+    def write_hosts(self, host_dicts):
+        """
+        Persist a batch of hosts.
+
+        Args:
+            host_dicts (list): Host dictionaries as produced by `HostManager.to_dict`.
+        """
+        raise NotImplementedError("Subclasses must implement write_hosts.")
+
+    def write_scan_results(self, rows):
+        """
+        Persist a batch of per-scan host results.
+
+        Args:
+            rows (list): (scan_id, scan_type, ip, details) tuples.
+        """
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class SQLiteResultsStore(ResultsBackend):
+    """
+    Default results backend: a local SQLite database in WAL mode.
+
+    Hosts, open ports, services and per-scan results are stored in separate
+    tables, indexed on ip, port and service name.
+    """
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path of the SQLite database file.
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def write_hosts(self, host_dicts):
+        hosts, ports, services, scan_results = [], [], [], []
+        for host in host_dicts:
+            ip = host["ip_address"]
+            metadata = host.get("metadata", {})
+            hosts.append((ip, metadata.get("created_at"), metadata.get("last_updated"), json.dumps(metadata, default=str)))
+            ports.extend((ip, int(port)) for port in host.get("open_ports", []))
+            services.extend((ip, int(port), name) for port, name in host.get("services", {}).items())
+            scan_results.extend(
+                (ip, scan_type, json.dumps(result, default=str)) for scan_type, result in host.get("scan_results", {}).items()
+            )
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO hosts (ip, created_at, last_updated, metadata) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ip) DO UPDATE SET last_updated = excluded.last_updated, metadata = excluded.metadata",
+                hosts,
+            )
+            # Each host dict is a full snapshot, so replace its port and service rows
+            stale = [(host["ip_address"],) for host in host_dicts]
+            self.connection.executemany("DELETE FROM ports WHERE ip = ?", stale)
+            self.connection.executemany("DELETE FROM services WHERE ip = ?", stale)
+            self.connection.executemany("INSERT OR IGNORE INTO ports (ip, port) VALUES (?, ?)", ports)
+            self.connection.executemany("INSERT OR REPLACE INTO services (ip, port, name) VALUES (?, ?, ?)", services)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO host_scan_results (ip, scan_type, result) VALUES (?, ?, ?)", scan_results
+            )
+
+    def write_scan_results(self, rows):
+        recorded_at = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scan_results (scan_id, scan_type, ip, recorded_at, result) VALUES (?, ?, ?, ?, ?)",
+                [(scan_id, scan_type, ip, recorded_at, json.dumps(details, default=str)) for scan_id, scan_type, ip, details in rows],
+            )
+
+    def hosts_with_port(self, port):
+        """
+        Returns:
+            list: IP addresses with the given port open.
+        """
+        return [row[0] for row in self.connection.execute("SELECT ip FROM ports WHERE port = ? ORDER BY ip", (port,))]
+
+    def hosts_with_service(self, name):
+        """
+        Returns:
+            list: IP addresses running a service with the given name.
+        """
+        query = "SELECT DISTINCT ip FROM services WHERE name = ? ORDER BY ip"
+        return [row[0] for row in self.connection.execute(query, (name,))]
+
+    def iter_hosts(self):
+        """
+        Stream every stored host as a `HostManager.to_dict`-shaped dictionary.
+
+        Yields:
+            dict: One host at a time.
+        """
+        cursor = self.connection.execute("SELECT ip, metadata FROM hosts ORDER BY ip")
+        for ip, metadata in cursor:
+            ports = [row[0] for row in self.connection.execute("SELECT port FROM ports WHERE ip = ? ORDER BY port", (ip,))]
+            services = dict(self.connection.execute("SELECT port, name FROM services WHERE ip = ?", (ip,)).fetchall())
+            scan_results = {
+                scan_type: json.loads(result)
+                for scan_type, result in self.connection.execute(
+                    "SELECT scan_type, result FROM host_scan_results WHERE ip = ?", (ip,)
+                )
+            }
+            yield {
+                "ip_address": ip,
+                "metadata": json.loads(metadata) if metadata else {},
+                "services": services,
+                "open_ports": ports,
+                "scan_results": scan_results,
+            }
+
+    def close(self):
+        self.connection.close()
+
+
+class JsonResultsWriter(ResultsBackend):
+    """
+    Optional backend writing one pretty-printed JSON file per host (the original export format).
+    """
+
+    def __init__(self, output_dir):
+        """
+        Args:
+            output_dir (str): Directory receiving `<ip>.json` files.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+
+    def write_hosts(self, host_dicts):
+        for host in host_dicts:
+            file_name = host["ip_address"].replace(":", "_") + ".json"
+            with open(os.path.join(self.output_dir, file_name), "w") as file:
+                json.dump(host, file, indent=4, default=str)
+
+
+class ResultsWriter:
+    """
+    Groups result writes and hands them to the backends from a background task.
+
+    Producers enqueue snapshots without blocking; a single writer task drains
+    the queue in batches of up to `batch_size` entries (or whatever arrived
+    within `flush_interval`) and runs the backend calls on a dedicated thread,
+    so the event loop never waits on disk I/O.
+    """
+
+    def __init__(self, backends, batch_size=RESULTS_WRITER_BATCH_SIZE, flush_interval=RESULTS_WRITER_FLUSH_SECONDS):
+        """
+        Args:
+            backends (list): ResultsBackend instances receiving every batch.
+            batch_size (int): Maximum entries per transaction.
+            flush_interval (float): Longest time an entry waits before being written.
+        """
+        self.backends = list(backends)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches_written = 0
+        self.errors = []
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="results-writer")
+
+    def start(self):
+        """Start the background writer task on the running loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.ensure_future(self._run())
+
+    def submit_host(self, host_instance):
+        """
+        Queue a snapshot of a host for writing.
+
+        The snapshot is deep-copied here, on the loop, so later changes to the
+        host's services or scan results cannot race the writer thread.
+
+        Args:
+            host_instance (HostManager): Host to persist.
+        """
+        self._queue.put_nowait(("host", copy.deepcopy(host_instance.to_dict())))
+
+    def submit_scan_result(self, scan_id, scan_type, ip_address, details):
+        """
+        Queue a single host's result from a scan; signature matches `ScanManager.host_callbacks`.
+        The details are deep-copied on the loop, as in `submit_host`.
+        """
+        self._queue.put_nowait(("scan", (scan_id, scan_type, ip_address, copy.deepcopy(details))))
+
+    async def close(self):
+        """Flush everything still queued, stop the writer and close the backends."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        loop = asyncio.get_running_loop()
+        for backend in self.backends:
+            await loop.run_in_executor(self._executor, backend.close)
+        self._executor.shutdown(wait=True)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            batch = []
+            deadline = loop.time() + self.flush_interval
+            while entry is not None:
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout=max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+            stopping = entry is None
+            if batch:
+                try:
+                    await loop.run_in_executor(self._executor, self._write, batch)
+                except Exception as e:
+                    # Keep the writer alive so one bad batch does not stop persistence for the rest of the run
+                    self.errors.append(str(e))
+
+    def _write(self, batch):
+        hosts = {}
+        scans = []
+        for kind, payload in batch:
+            if kind == "host":
+                # Later snapshots of the same host supersede earlier ones within a batch
+                hosts[payload["ip_address"]] = payload
+            else:
+                scans.append(payload)
+        for backend in self.backends:
+            if hosts:
+                backend.write_hosts(list(hosts.values()))
+            if scans:
+                backend.write_scan_results(scans)
+        self.batches_written += 1
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import SCAN_CACHE_DEFAULT_TTL, SCAN_CACHE_MAX_ENTRIES, SCAN_CACHE_RECOUNT_INTERVAL
+
+# scan_config.json keys that only affect scheduling, not what nmap returns
+NON_RESULT_KEYS = ("description", "priority", "max_concurrent", "cache_ttl")
+
+
+class ScanCache:
+    """
+    Persistent, content-addressed cache of parsed scan results.
+
+    Entries are keyed on a hash of the target, the scan_config entry and any
+    extra arguments, expire after the scan type's `cache_ttl` and are evicted
+    least-recently-used once `max_entries` is exceeded.
+
+    Scans use `lookup` and `store`, which run the SQLite work on a dedicated
+    thread so the event loop never waits on the cache file.
+    """
+
+    def __init__(self, db_path, max_entries=SCAN_CACHE_MAX_ENTRIES, default_ttl=SCAN_CACHE_DEFAULT_TTL):
+        """
+        Args:
+            db_path (str): Path of the SQLite cache file.
+            max_entries (int): Maximum number of cached scans.
+            default_ttl (float): TTL in seconds for scan types without `cache_ttl`.
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        # Only ever used by one thread at a time: the caller's, or the cache's single worker thread
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scan_cache ("
+            " key TEXT PRIMARY KEY, scan_type TEXT, created_at REAL, last_access REAL, result TEXT)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_scan_cache_access ON scan_cache (last_access)")
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        # Running row count for the LRU bound, so a store does not scan the table
+        self._rows = len(self)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-cache")
+
+    @staticmethod
+    def make_key(target, scan_entry, additional_args=None):
+        """
+        Build the content address of a scan.
+
+        Args:
+            target (str): Scan target (IP, CIDR or space separated list).
+            scan_entry (dict): The resolved scan_config.json entry.
+            additional_args (str): Extra nmap arguments such as an NSE script list.
+
+        Returns:
+            str: Hex digest identifying the scan.
+        """
+        payload = {
+            "target": " ".join(sorted(target.split())),
+            "scan": {key: value for key, value in scan_entry.items() if key not in NON_RESULT_KEYS},
+            "args": additional_args or "",
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def ttl_for(self, scan_entry):
+        return scan_entry.get("cache_ttl", self.default_ttl)
+
+    def get(self, key, ttl):
+        """
+        Look up a fresh entry.
+
+        Args:
+            key (str): Key from `make_key`.
+            ttl (float): Maximum age in seconds.
+
+        Returns:
+            dict: The cached `{ip: details}` result, or None on a miss.
+        """
+        row = self.connection.execute("SELECT created_at, result FROM scan_cache WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        if now - row[0] > ttl:
+            self.stats["misses"] += 1
+            self.stats["expired"] += 1
+            with self.connection:
+                self._rows -= self.connection.execute("DELETE FROM scan_cache WHERE key = ?", (key,)).rowcount
+            return None
+
+        with self.connection:
+            self.connection.execute("UPDATE scan_cache SET last_access = ? WHERE key = ?", (now, key))
+        self.stats["hits"] += 1
+        return self.decode(row[1])
+
+    def put(self, key, scan_type, result):
+        """
+        Store a completed scan and evict the least recently used entries beyond `max_entries`.
+
+        Args:
+            key (str): Key from `make_key`.
+            scan_type (str): Scan type, kept for inspection.
+            result (dict): Parsed `{ip: details}` scan result.
+        """
+        self._write(key, scan_type, json.dumps(result))
+
+    def _write(self, key, scan_type, raw):
+        now = time.time()
+        with self.connection:
+            exists = self.connection.execute("SELECT 1 FROM scan_cache WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO scan_cache (key, scan_type, created_at, last_access, result) VALUES (?, ?, ?, ?, ?)",
+                (key, scan_type, now, now, raw),
+            )
+            if exists is None:
+                self._rows += 1
+            if (self.stats["stores"] + 1) % SCAN_CACHE_RECOUNT_INTERVAL == 0:
+                # Worker processes may share the cache file; resync with their writes now and then
+                self._rows = self.connection.execute("SELECT COUNT(*) FROM scan_cache").fetchone()[0]
+            excess = self._rows - self.max_entries
+            if excess > 0:
+                evicted = self.connection.execute(
+                    "DELETE FROM scan_cache WHERE key IN (SELECT key FROM scan_cache ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                ).rowcount
+                self._rows -= evicted
+                self.stats["evictions"] += evicted
+        self.stats["stores"] += 1
+
+    async def lookup(self, key, ttl):
+        """
+        `get` run on the cache thread.
+
+        Returns:
+            dict: The cached `{ip: details}` result, or None on a miss.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, key, ttl)
+
+    async def store(self, key, scan_type, result):
+        """
+        `put` run on the cache thread. The result is serialised first, on the
+        caller's thread, so later changes to it cannot race the write.
+        """
+        raw = json.dumps(result)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write, key, scan_type, raw)
+
+    @staticmethod
+    def decode(raw):
+        # JSON turns the integer port keys of `services` into strings; restore them
+        result = json.loads(raw)
+        for details in result.values():
+            if isinstance(details.get("services"), dict):
+                details["services"] = {int(port): name for port, name in details["services"].items()}
+        return result
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM scan_cache").fetchone()[0]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.connection.close()
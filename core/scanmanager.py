@@ -1,14 +1,39 @@
-from nmap3 import NmapAsync
-from utils.logger import create_logger
-from config.config import SCAN_CONFIG_PATH
-import json, os
+from concurrent.futures import ThreadPoolExecutor
+from utils.configcache import load_json_config
+from utils.logger import create_logger, create_output_logger
+from config.config import (
+    SCAN_CONFIG_PATH,
+    LOGS_DIR,
+    LOG_OUTPUT_SAMPLE_EVERY,
+    LOG_OUTPUT_MAX_PER_SECOND,
+    MAX_CONCURRENT_SCANS,
+    PARSER_OFFLOAD_BYTES,
+    PARSER_THREADS,
+    SCAN_TIMEOUT_SECONDS,
+    SCAN_TERMINATE_GRACE_SECONDS,
+    NMAP_STATS_EVERY,
+)
+from core.scheduler import ScanScheduler
+from core.metrics import MetricsRegistry
+from core.eventbus import EventBus, SCAN_QUEUED, SCAN_STARTED, HOST_FOUND, SCAN_PROGRESS, SCAN_FINISHED
+from core.asyncdiscovery import AsyncDiscoveryEngine
+from core.portsplit import strip_port_options
+from utils.nmapparser import StreamingHostParser, parse_host
+from xml.etree.ElementTree import ParseError
+import asyncio, json, os, shlex, time
+
+# Bytes read from a subprocess pipe per iteration
+READ_CHUNK_SIZE = 64 * 1024
 
 class ScanManager:
 
-    def __init__(self, instance_id=None, path=None):
+    def __init__(self, instance_id=None, path=None, scan_cache=None, metrics=None, rate_controller=None,
+                 hedger=None):
         self._created_at = self.get_current_time()
         self.instance_id = instance_id or self.generate_instance_id()
-        self.logger = create_logger("scansmgr", f"logs/scansmgr_{self.instance_id}.log")
+        # All instances share one log file; raw nmap output is sampled and rate limited
+        self.logger = create_logger("scansmgr", os.path.join(LOGS_DIR, "scansmgr.log"))
+        self.output_logger = create_output_logger(self.logger, LOG_OUTPUT_SAMPLE_EVERY, LOG_OUTPUT_MAX_PER_SECOND)
         self.scan_config = self.load_scan_config()
 
         self.metadata = {
@@ -16,14 +41,39 @@ class ScanManager:
             "scan_config": self.scan_config,
         }
 
-        self.nmap_async = NmapAsync(path=path)
+        self.nmap_path = path
+        self._nmap_async = None
         self.active_scans = {}
         self.scan_results = {}
         self.scan_status = {}
         self.progress = {}
         self.errors = []
         self.update_callbacks = []
-        self.parser_registry = {}
+        # Scan lifecycle, host and nmap progress events for asynchronous consumers
+        self.event_bus = EventBus()
+        self.parser_registry = {scan_type: parse_host for scan_type in self.scan_config}
+        self.host_callbacks = []
+        self.scan_cache = scan_cache
+        self.discovery_engines = {}
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        # Adjusts nmap's rate, parallelism and host group size per subnet, if given
+        self.rate_controller = rate_controller
+        # Re-issues straggling nmap scans and keeps the first copy to finish, if given
+        self.hedger = hedger
+        self.parse_executor = ThreadPoolExecutor(max_workers=PARSER_THREADS, thread_name_prefix="nmap-parse")
+        self.scheduler = ScanScheduler(
+            max_concurrent=MAX_CONCURRENT_SCANS,
+            type_limits={name: entry.get("max_concurrent") for name, entry in self.scan_config.items()},
+            type_priorities={name: entry["priority"] for name, entry in self.scan_config.items() if "priority" in entry},
+        )
+
+    @property
+    def nmap_async(self):
+        """The python3-nmap helper, imported and created on first use (asyncio-engine runs never need it)."""
+        if self._nmap_async is None:
+            from nmap3 import NmapAsync
+            self._nmap_async = NmapAsync(path=self.nmap_path)
+        return self._nmap_async
 
     @property
     def created_at(self):
@@ -41,29 +91,374 @@ class ScanManager:
         import uuid
         return f"scan_{uuid.uuid4().hex[:8]}"
 
-    async def start_scan(self, target, scan_type):
-        """Starts an asynchronous scan using NmapAsync."""
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None,
+                         use_cache=True, timeout=None, hedge=True):
+        """
+        Queues a scan with the scheduler and returns its scan id.
+
+        The nmap subprocess is launched once a slot is free under the global and
+        per-scan-type limits; use `wait_for_scan` to await the result. A fresh
+        entry in the scan cache completes the scan immediately instead. A scan
+        still running after `timeout` seconds (default: the scan type's "timeout",
+        or SCAN_TIMEOUT_SECONDS) is stopped and fails with TimeoutError; with a
+        hedger configured, a straggling scan may be issued a second time.
+        """
         if scan_type not in self.scan_config:
             self.logger.error(f"Scan type '{scan_type}' not found in configuration")
             raise KeyError(f"Scan type '{scan_type}' not found in configuration")
 
         scan_id = self.generate_instance_id()
+        cache_key = None
+        scan_entry = self.scan_config[scan_type]
+        if self.scan_cache is not None and use_cache and self.scan_cache.ttl_for(scan_entry) > 0:
+            cache_key = self.scan_cache.make_key(target, scan_entry, additional_args)
+            cached = await self.scan_cache.lookup(cache_key, self.scan_cache.ttl_for(scan_entry))
+            if cached is not None:
+                self.complete_from_cache(scan_id, scan_type, cached)
+                return scan_id
+
+        if timeout is None:
+            timeout = scan_entry.get("timeout", SCAN_TIMEOUT_SECONDS)
+        queued_at = time.monotonic()
+        self.scan_status[scan_id] = "queued"
+        self.metrics.scan_queued(scan_id, scan_type)
+        future = self.scheduler.submit(
+            scan_id,
+            scan_type,
+            lambda: self._run_scan(scan_id, target, scan_type, additional_args, queued_at, cache_key,
+                                   timeout, workflow_id if hedge else None),
+            workflow_id=workflow_id,
+            priority=priority,
+        )
+        future.add_done_callback(self._retrieve_exception)
+        self.active_scans[scan_id] = future
+        self.update_progress(scan_id, {"state": "queued", "queue_depth": self.scheduler.queue_depth})
+        self.event_bus.publish(SCAN_QUEUED, scan_id, target=target, scan_type=scan_type)
+        return scan_id
+
+    def complete_from_cache(self, scan_id, scan_type, cached):
+        """Records a scan answered from the cache as completed without running nmap."""
+        self.logger.info(f"Scan {scan_id} ({scan_type}) answered from cache")
+        self.metrics.scan_cached(scan_id, scan_type)
+        self.scan_results[scan_id] = {}
+        self.publish_hosts(scan_id, scan_type, cached.items())
+        self.scan_status[scan_id] = "completed"
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(self.scan_results[scan_id])
+        self.active_scans[scan_id] = future
+        self.update_progress(scan_id, {"state": "completed", "cached": True})
+        self.event_bus.publish(SCAN_FINISHED, scan_id, scan_type=scan_type, status="completed", cached=True)
+
+    async def _run_scan(self, scan_id, target, scan_type, additional_args, queued_at, cache_key=None,
+                        timeout=SCAN_TIMEOUT_SECONDS, hedge_workflow_id=None):
+        """
+        Runs a scan once the scheduler has granted it a slot.
+
+        `hedge_workflow_id` is the workflow a hedged copy is queued under; None for
+        scans that must not be hedged (hedged copies themselves).
+        """
+        self.scan_status[scan_id] = "in_progress"
+        self.metrics.scan_started(scan_id)
+        self.update_progress(scan_id, {
+            "state": "in_progress",
+            "queue_wait": round(time.monotonic() - queued_at, 4),
+            "queue_depth": self.scheduler.queue_depth,
+        })
+        self.event_bus.publish(SCAN_STARTED, scan_id, target=target, scan_type=scan_type)
+        asyncio_engine = self.scan_config[scan_type].get("engine") == "asyncio"
+        requested_args = additional_args
+        subnet = None
+        started_at = time.monotonic()
         try:
+            if self.rate_controller is not None and not asyncio_engine:
+                subnet = self.rate_controller.subnet_for(target)
+                rate_arguments = self.rate_controller.arguments(subnet)
+                additional_args = f"{additional_args} {rate_arguments}" if additional_args else rate_arguments
             self.logger.info(f"Starting scan {scan_id} for target {target} with type {scan_type}")
-            self.active_scans[scan_id] = await self.nmap_async.scan_command(target, scan_type)
-            self.scan_status[scan_id] = "in_progress"
-            return scan_id
+            async with asyncio.timeout(timeout):
+                if asyncio_engine:
+                    result = await self.execute_asyncio(scan_id, target, scan_type)
+                elif self.hedger is not None and hedge_workflow_id is not None:
+                    result = await self.execute_hedged(
+                        scan_id, target, scan_type, additional_args, requested_args, hedge_workflow_id
+                    )
+                else:
+                    result = await self.execute_nmap(scan_id, target, scan_type, additional_args)
+        except asyncio.CancelledError:
+            self.scan_status[scan_id] = "cancelled"
+            raise
+        except TimeoutError:
+            self.log_error(scan_id, f"deadline of {timeout}s exceeded")
+            self.scan_status[scan_id] = "timed_out"
+            raise TimeoutError(f"Scan {scan_id} ({scan_type}) exceeded its {timeout}s deadline") from None
         except Exception as e:
             self.log_error(scan_id, str(e))
             self.scan_status[scan_id] = "errored"
             raise
+        else:
+            self.scan_results[scan_id] = result
+            self.scan_status[scan_id] = "completed"
+        finally:
+            self.metrics.scan_finished(scan_id, self.scan_status[scan_id])
+            if subnet is not None and self.scan_status[scan_id] != "cancelled":
+                decision = self.rate_controller.record(
+                    scan_id, target, subnet, time.monotonic() - started_at,
+                    failed=self.scan_status[scan_id] != "completed",
+                )
+                self.update_progress(scan_id, {"state": self.scan_status[scan_id], "rate_control": decision})
+            self.event_bus.publish(SCAN_FINISHED, scan_id, scan_type=scan_type, status=self.scan_status[scan_id],
+                                   duration=round(time.monotonic() - started_at, 4))
+
+        if self.hedger is not None and hedge_workflow_id is not None:
+            self.hedger.record(scan_type, target, time.monotonic() - started_at)
+        if cache_key is not None:
+            await self.scan_cache.store(cache_key, scan_type, result)
+        return result
+
+    async def execute_hedged(self, scan_id, target, scan_type, additional_args, requested_args, workflow_id):
+        """
+        Runs nmap for a scan and, if it straggles, races it against a second copy.
+
+        The copy is queued ahead of other scans in a scheduler slot of its own
+        (the original keeps holding its slot until one of them wins), bypasses
+        the cache and bounds every host with --host-timeout. Hosts the original already finished are
+        kept when the copy wins; the losing copy is cancelled and its nmap stopped.
+
+        Returns:
+            dict: Mapping of IP address to host details.
+        """
+        primary = asyncio.ensure_future(self.execute_nmap(scan_id, target, scan_type, additional_args))
+        hedge = None
+        try:
+            delay = self.hedger.hedge_delay(scan_type, target)
+            if delay is None or (await asyncio.wait({primary}, timeout=delay))[0]:
+                return await primary
+
+            self.logger.info(f"Scan {scan_id} still running after {delay:.1f}s; hedging with a second copy")
+            hedge_args = self.hedger.host_timeout(delay)
+            hedge_id = await self.start_scan(
+                target, scan_type, f"{requested_args} {hedge_args}" if requested_args else hedge_args,
+                workflow_id=workflow_id, priority=0, use_cache=False, hedge=False,
+            )
+            self.hedger.stats["hedged"] += 1
+            self.update_progress(scan_id, {"state": "in_progress", "hedged_by": hedge_id})
+            hedge = asyncio.ensure_future(self.wait_for_scan(hedge_id))
+
+            pending, error = {primary, hedge}, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    self.hedger.record_winner(task is hedge)
+                    if task is primary:
+                        return task.result()
+                    return {**self.scan_results.get(scan_id, {}), **task.result()}
+            raise error or asyncio.CancelledError()
+        finally:
+            tasks = [task for task in (primary, hedge) if task is not None]
+            for task in tasks:
+                task.cancel()
+            # Let the losing nmap be terminated before the slot is released
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _retrieve_exception(future):
+        # Errors are already recorded by `_run_scan`; mark them retrieved so unawaited scans stay quiet
+        if not future.cancelled():
+            future.exception()
+
+    async def wait_for_scan(self, scan_id):
+        """Waits for a queued or running scan to finish and returns its results."""
+        if self.scan_status.get(scan_id) == "completed" and scan_id in self.scan_results:
+            return self.scan_results[scan_id]
+        if scan_id not in self.active_scans:
+            raise ValueError(f"No scan found with id {scan_id}")
+        return await self.active_scans[scan_id]
+
+    def cancel_scan(self, scan_id):
+        """
+        Cancels a queued or running scan; a running nmap is terminated.
+
+        Returns:
+            bool: True if the scan had not finished yet.
+        """
+        future = self.active_scans.get(scan_id)
+        if future is None or future.done():
+            return False
+        if self.scan_status.get(scan_id) == "queued":
+            self.scan_status[scan_id] = "cancelled"
+        future.cancel()
+        return True
+
+    async def run_discovery(self, target, workflow_id="default", scan_type="discovery"):
+        """Runs a discovery scan against a target and returns `{ip: details}` for every host reported."""
+        scan_id = await self.start_scan(target, scan_type, workflow_id=workflow_id)
+        return await self.wait_for_scan(scan_id)
+
+    @property
+    def cache_stats(self):
+        """Returns hit/miss/eviction counters of the scan cache, if one is configured."""
+        return dict(self.scan_cache.stats) if self.scan_cache is not None else {}
+
+    @property
+    def queue_stats(self):
+        """Returns queue depth, running counts and wait-time statistics of the scheduler."""
+        return self.scheduler.stats()
 
-    async def handle_output(self, process):
-        """Handles real-time output from the subprocess."""
-        async for line in process.stdout:
-            self.logger.info(line.strip())
-        async for line in process.stderr:
-            self.logger.error(line.strip())
+    async def shutdown(self):
+        """Cancels all queued and running scans and stops the parser threads."""
+        running = self.scheduler.cancel_all()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        self.parse_executor.shutdown(wait=False, cancel_futures=True)
+
+    def build_command(self, target, scan_type, additional_args=None):
+        """Builds the nmap argument list for a scan; output is XML on stdout."""
+        command = shlex.split(self.nmap_async.default_command())
+        if NMAP_STATS_EVERY and self.event_bus.wants(SCAN_PROGRESS):
+            # Periodic <taskprogress> elements in the XML output, published as progress events
+            command += ["--stats-every", NMAP_STATS_EVERY]
+        command += target.split() if isinstance(target, str) else list(target)
+        scan_arguments = shlex.split(self.scan_config[scan_type]["args"])
+        extra_arguments = shlex.split(additional_args) if additional_args else []
+        if "-p" in extra_arguments:
+            # nmap accepts a single -p option; ports chosen by the caller replace the scan type's
+            scan_arguments = strip_port_options(scan_arguments)
+        return command + scan_arguments + extra_arguments
+
+    async def execute_nmap(self, scan_id, target, scan_type, additional_args=None):
+        """
+        Runs nmap for a scan and streams its hosts into `scan_results` as they complete.
+
+        Returns:
+            dict: Mapping of IP address to host details for every host nmap reported.
+        """
+        from nmap3.exceptions import NmapExecutionError, NmapNotInstalledError
+
+        if not os.path.exists(self.nmap_async.nmaptool):
+            raise NmapNotInstalledError()
+
+        process = await asyncio.create_subprocess_exec(
+            *self.build_command(target, scan_type, additional_args),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        sampler = asyncio.ensure_future(self.metrics.sample_process(scan_id, process.pid))
+        try:
+            stderr_lines = await self.handle_output(scan_id, process, scan_type)
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            await self.terminate_process(process)
+            raise
+        finally:
+            sampler.cancel()
+
+        if returncode != 0:
+            raise NmapExecutionError(f"nmap exited with status {returncode}: " + "\n".join(stderr_lines))
+        return self.scan_results[scan_id]
+
+    @staticmethod
+    async def terminate_process(process):
+        """
+        Stop a scan subprocess: SIGTERM first, SIGKILL if it has not exited within
+        SCAN_TERMINATE_GRACE_SECONDS. Always reaps the process.
+        """
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), SCAN_TERMINATE_GRACE_SECONDS)
+        except (ProcessLookupError, TimeoutError):
+            pass
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    async def execute_asyncio(self, scan_id, target, scan_type):
+        """
+        Runs a scan with the built-in asyncio engine instead of an nmap subprocess.
+
+        Returns:
+            dict: Mapping of IP address to host details.
+        """
+        engine = self.discovery_engines.get(scan_type)
+        if engine is None:
+            engine = self.discovery_engines[scan_type] = AsyncDiscoveryEngine.from_config(self.scan_config[scan_type])
+        self.scan_results[scan_id] = {}
+        await engine.scan(target, on_host=lambda ip, details: self.publish_hosts(scan_id, scan_type, [(ip, details)]))
+        return self.scan_results[scan_id]
+
+    async def handle_output(self, scan_id, process, scan_type=None):
+        """
+        Handles real-time output from the subprocess.
+
+        stdout and stderr are drained concurrently so neither pipe can fill up
+        and stall nmap. stdout is parsed incrementally; each host is published
+        as soon as its <host> element closes.
+
+        Returns:
+            list: The last stderr lines, for error reporting.
+
+        Raises:
+            xml.etree.ElementTree.ParseError: If nmap exited successfully but its XML was truncated or
+                malformed. When nmap failed, the caller reports its exit status and stderr instead.
+        """
+        parser = StreamingHostParser(self.parser_registry.get(scan_type, parse_host))
+        self.scan_results[scan_id] = {}
+        stderr_lines = []
+        parse_errors = []
+        loop = asyncio.get_running_loop()
+
+        async def read_stdout():
+            while chunk := await process.stdout.read(READ_CHUNK_SIZE):
+                self.metrics.add_output_bytes(scan_id, len(chunk))
+                if parser.bytes_fed >= PARSER_OFFLOAD_BYTES:
+                    # Large outputs (full-port NSE runs) are parsed on a worker thread to keep the loop responsive
+                    hosts = await loop.run_in_executor(self.parse_executor, parser.feed, chunk)
+                else:
+                    hosts = parser.feed(chunk)
+                self.publish_hosts(scan_id, scan_type, hosts)
+                self.publish_progress(scan_id, scan_type, parser.take_progress())
+            try:
+                self.publish_hosts(scan_id, scan_type, parser.close())
+            except ParseError as e:
+                # An nmap that failed early (e.g. unresolvable target) prints little or no XML
+                parse_errors.append(e)
+            self.publish_progress(scan_id, scan_type, parser.take_progress())
+
+        async def read_stderr():
+            async for line in process.stderr:
+                message = line.decode(errors="replace").rstrip()
+                self.output_logger.warning("%s: %s", scan_id, message)
+                if self.rate_controller is not None:
+                    self.rate_controller.observe_output(scan_id, message)
+                stderr_lines.append(message)
+                del stderr_lines[:-20]
+
+        await asyncio.gather(read_stdout(), read_stderr())
+        if parse_errors and await process.wait() == 0:
+            raise parse_errors[0]
+        return stderr_lines
+
+    def publish_hosts(self, scan_id, scan_type, hosts):
+        """Stores parsed hosts under their scan and notifies `host_callbacks` and the event bus."""
+        results = self.scan_results[scan_id]
+        for ip_address, details in hosts:
+            results[ip_address] = details
+            for callback in self.host_callbacks:
+                callback(scan_id, scan_type, ip_address, details)
+            self.event_bus.publish(HOST_FOUND, scan_id, scan_type=scan_type, ip_address=ip_address, details=details)
+
+    def publish_progress(self, scan_id, scan_type, records):
+        """Publishes nmap's task progress (percent complete and ETA) and keeps the latest in `progress`."""
+        for record in records:
+            self.progress[scan_id] = {**self.progress.get(scan_id, {}), **record}
+            self.event_bus.publish(SCAN_PROGRESS, scan_id, scan_type=scan_type, **record)
 
     def log_error(self, scan_id, error_message):
         """Logs an error for a specific scan and tracks it."""
@@ -89,14 +484,18 @@ class ScanManager:
         return self.scan_results[scan_id]
 
     def load_scan_config(self):
-        """Loads the scan configuration settings from a predefined source."""
+        """
+        Loads the scan configuration settings from a predefined source.
+
+        The parsed file is cached per process and shared between instances; it
+        is only re-read when its modification time changes.
+        """
         if not os.path.exists(SCAN_CONFIG_PATH):
             self.logger.error(f"Configuration file not found: {SCAN_CONFIG_PATH}")
             raise FileNotFoundError(f"Configuration file not found: {SCAN_CONFIG_PATH}")
 
         try:
-            with open(SCAN_CONFIG_PATH, "r") as config_file:
-                config = json.load(config_file)
+            config = load_json_config(SCAN_CONFIG_PATH)
 
             if not isinstance(config, dict):
                 raise ValueError("Invalid configuration format: Expected a JSON object.")
@@ -0,0 +1,219 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict, deque
+
+DEFAULT_PRIORITY = 100
+
+
+class ScheduledJob:
+    """
+    A single unit of work waiting for (or holding) a scheduler slot.
+    """
+
+    __slots__ = ("job_id", "scan_type", "workflow_id", "priority", "factory", "future", "submitted_at", "started_at",
+                 "queued")
+
+    def __init__(self, job_id, scan_type, workflow_id, priority, factory, future):
+        self.job_id = job_id
+        self.scan_type = scan_type
+        self.workflow_id = workflow_id
+        self.priority = priority
+        self.factory = factory
+        self.future = future
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.queued = True
+
+
+class ScanScheduler:
+    """
+    Bounded, priority-aware dispatcher for scan coroutines.
+
+    Jobs are queued per (workflow, scan type). Whenever a slot frees up the
+    scheduler picks the eligible job with the lowest priority value, breaking
+    ties in favour of the workflow with the fewest running jobs so concurrent
+    workflows share the global budget fairly.
+    """
+
+    def __init__(self, max_concurrent, type_limits=None, type_priorities=None, wait_sample_size=1000):
+        """
+        Args:
+            max_concurrent (int): Global cap on concurrently running jobs.
+            type_limits (dict): Optional per-scan-type concurrency caps.
+            type_priorities (dict): Default priority per scan type (lower runs first).
+            wait_sample_size (int): Number of recent queue wait times kept for stats.
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.type_limits = {k: v for k, v in (type_limits or {}).items() if v}
+        self.type_priorities = dict(type_priorities or {})
+
+        self._queues = {}
+        self._seq = itertools.count()
+        self._running = {}
+        self._running_by_type = defaultdict(int)
+        self._running_by_workflow = defaultdict(int)
+        self._dispatched_by_workflow = defaultdict(int)
+        self._queued = 0
+        self._wait_times = deque(maxlen=wait_sample_size)
+        self._max_wait = 0.0
+        self.total_submitted = 0
+        self.total_completed = 0
+
+    def submit(self, job_id, scan_type, factory, workflow_id="default", priority=None):
+        """
+        Queue a job and return a future resolved with its result.
+
+        Args:
+            job_id (str): Identifier of the job (usually the scan id).
+            scan_type (str): Scan type, used for per-type limits and default priority.
+            factory (callable): Zero-argument callable returning the coroutine to run.
+            workflow_id (str): Key used for fair sharing between workflows.
+            priority (int): Overrides the scan type's default priority.
+
+        Returns:
+            asyncio.Future: Resolves with the coroutine's result or exception.
+        """
+        if priority is None:
+            priority = self.type_priorities.get(scan_type, DEFAULT_PRIORITY)
+        future = asyncio.get_running_loop().create_future()
+        job = ScheduledJob(job_id, scan_type, workflow_id, priority, factory, future)
+
+        heapq.heappush(self._queues.setdefault((workflow_id, scan_type), []), (priority, next(self._seq), job))
+        self._queued += 1
+        # A job cancelled while queued stays in its heap until popped, but stops counting as queued at once
+        future.add_done_callback(lambda _: self._dequeue(job))
+        self.total_submitted += 1
+        self._dispatch()
+        return future
+
+    @property
+    def queue_depth(self):
+        """Number of jobs waiting for a slot."""
+        return self._queued
+
+    @property
+    def running(self):
+        """Number of jobs currently holding a slot."""
+        return len(self._running)
+
+    def stats(self):
+        """
+        Snapshot of queue depth, running counts and queue wait times.
+
+        Returns:
+            dict: Scheduler statistics.
+        """
+        waits = list(self._wait_times)
+        queued_by_type = defaultdict(int)
+        for (_, scan_type), heap in self._queues.items():
+            queued_by_type[scan_type] += sum(1 for _, _, job in heap if not job.future.done())
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": len(self._running),
+            "queued": self._queued,
+            "running_by_type": dict(self._running_by_type),
+            "queued_by_type": dict(queued_by_type),
+            "submitted": self.total_submitted,
+            "completed": self.total_completed,
+            "avg_wait": round(sum(waits) / len(waits), 4) if waits else 0.0,
+            "max_wait": round(self._max_wait, 4),
+        }
+
+    def cancel_all(self):
+        """
+        Cancel every queued and running job.
+
+        Returns:
+            list: The running tasks that were cancelled.
+        """
+        for heap in self._queues.values():
+            for _, _, job in heap:
+                job.queued = False
+                job.future.cancel()
+        self._queues.clear()
+        self._queued = 0
+        running = list(self._running.values())
+        for task in running:
+            task.cancel()
+        return running
+
+    def _dequeue(self, job):
+        if job.queued:
+            job.queued = False
+            self._queued -= 1
+
+    def _has_capacity(self, scan_type):
+        limit = self.type_limits.get(scan_type)
+        return limit is None or self._running_by_type[scan_type] < limit
+
+    def _pick(self):
+        best_key, best_queue = None, None
+        for queue_key, heap in list(self._queues.items()):
+            # Drop jobs whose futures were cancelled while queued
+            while heap and heap[0][2].future.done():
+                self._dequeue(heapq.heappop(heap)[2])
+            if not heap:
+                del self._queues[queue_key]
+                continue
+            workflow_id, scan_type = queue_key
+            if not self._has_capacity(scan_type):
+                continue
+            priority, seq, _ = heap[0]
+            key = (
+                priority,
+                self._running_by_workflow[workflow_id],
+                self._dispatched_by_workflow[workflow_id],
+                seq,
+            )
+            if best_key is None or key < best_key:
+                best_key, best_queue = key, queue_key
+        if best_queue is None:
+            return None
+        job = heapq.heappop(self._queues[best_queue])[2]
+        self._dequeue(job)
+        return job
+
+    def _dispatch(self):
+        while len(self._running) < self.max_concurrent:
+            job = self._pick()
+            if job is None:
+                return
+            self._start(job)
+
+    def _start(self, job):
+        job.started_at = time.monotonic()
+        wait = job.started_at - job.submitted_at
+        self._wait_times.append(wait)
+        self._max_wait = max(self._max_wait, wait)
+
+        self._running_by_type[job.scan_type] += 1
+        self._running_by_workflow[job.workflow_id] += 1
+        self._dispatched_by_workflow[job.workflow_id] += 1
+
+        task = asyncio.ensure_future(self._run(job))
+        self._running[job.job_id] = task
+        job.future.add_done_callback(lambda fut: task.cancel() if fut.cancelled() else None)
+
+    async def _run(self, job):
+        # Outcomes are forwarded to the job's future so the task itself never ends with an unretrieved error
+        try:
+            result = await job.factory()
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running.pop(job.job_id, None)
+            self._running_by_type[job.scan_type] -= 1
+            self._running_by_workflow[job.workflow_id] -= 1
+            self.total_completed += 1
+            self._dispatch()
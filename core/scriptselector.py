@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+
+class ScriptSelector:
+    """
+    Chooses the NSE scripts of a category that apply to a host.
+
+    Rules come from the "triggers" of each entry under "services" in
+    nse_config.json: a script listed by a service entry runs only on hosts
+    with one of that entry's ports open or services detected. Scripts that no
+    service entry claims run on every host. Hosts with no known ports or
+    services yet get the whole category, as before.
+
+    The `--script` argument of every distinct script set is built once and
+    reused, so hosts with the same set share one argument string (and can be
+    batched together).
+    """
+
+    def __init__(self, nse_configuration, category="vuln"):
+        """
+        Args:
+            nse_configuration (dict): Parsed nse_config.json.
+            category (str): Script category whose scripts are selected from.
+        """
+        self.scripts = tuple(nse_configuration["categories"][category]["scripts"])
+        self.order = {script: index for index, script in enumerate(self.scripts)}
+        self.port_rules = defaultdict(set)
+        self.service_rules = defaultdict(set)
+        claimed = set()
+        for service_entry in nse_configuration.get("services", {}).values():
+            triggers = service_entry.get("triggers")
+            if not triggers:
+                continue
+            scripts = set(service_entry.get("scripts", ())).intersection(self.scripts)
+            claimed |= scripts
+            for port in triggers.get("ports", ()):
+                self.port_rules[int(port)] |= scripts
+            for service_name in triggers.get("services", ()):
+                self.service_rules[service_name] |= scripts
+        self.always = frozenset(set(self.scripts) - claimed)
+        self.everything = frozenset(self.scripts)
+        self._arguments = {}
+
+    def select(self, host_instance):
+        """
+        Returns:
+            frozenset: Scripts that apply to the host; empty if nothing applies.
+        """
+        open_ports = host_instance.open_ports
+        if not open_ports and not host_instance.services:
+            return self.everything
+        selected = set(self.always)
+        for port in open_ports:
+            selected |= self.port_rules.get(port, set())
+        for service_name in host_instance.services.values():
+            selected |= self.service_rules.get(service_name, set())
+        return frozenset(selected)
+
+    def script_argument(self, scripts):
+        """
+        Returns:
+            str: The `--script` option for a script set, in configuration order; None for an empty set.
+        """
+        if not scripts:
+            return None
+        argument = self._arguments.get(scripts)
+        if argument is None:
+            argument = self._arguments[scripts] = "--script " + ",".join(sorted(scripts, key=self.order.__getitem__))
+        return argument
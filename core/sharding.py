@@ -0,0 +1,163 @@
+import asyncio
+import ipaddress
+import math
+import time
+from config.config import (
+    DISCOVERY_SHARD_PREFIX,
+    DISCOVERY_SHARD_MIN_PREFIX,
+    DISCOVERY_SHARD_MAX_PREFIX,
+    DISCOVERY_SHARD_TARGET_SECONDS,
+    DISCOVERY_SHARD_MAX_IN_FLIGHT,
+)
+from utils.targets import TargetSet
+
+IPV4_BITS = 32
+IPV6_BITS = 128
+
+
+class AdaptiveSharder:
+    """
+    Splits targets into aligned CIDR blocks, lazily.
+
+    The size of each new shard is derived from the observed scan time per
+    address of earlier shards, aiming for shards that take roughly
+    `target_duration` seconds, clamped between `min_prefix` and `max_prefix`.
+    Prefix lengths apply to either family as written, so an IPv6 network
+    longer than `min_prefix` (a /48 or /64) stays a single shard; its
+    duration is not fed into the adaptation, which is tuned on IPv4 sweeps.
+    """
+
+    def __init__(self, target, prefix=DISCOVERY_SHARD_PREFIX, min_prefix=DISCOVERY_SHARD_MIN_PREFIX,
+                 max_prefix=DISCOVERY_SHARD_MAX_PREFIX, target_duration=DISCOVERY_SHARD_TARGET_SECONDS):
+        """
+        Args:
+            target (str | TargetSet): Targets to shard (IPs or CIDRs, or a TargetSet with exclusions applied).
+            prefix (int): Initial shard prefix length.
+            min_prefix (int): Shortest prefix (largest shard) the sharder may grow to.
+            max_prefix (int): Longest prefix (smallest shard) the sharder may shrink to.
+            target_duration (float): Desired wall time of a single shard in seconds.
+        """
+        self.min_prefix = min(max(min_prefix, 0), IPV4_BITS)
+        self.max_prefix = max(min(max_prefix, IPV4_BITS), self.min_prefix)
+        self.prefix = min(max(prefix, self.min_prefix), self.max_prefix)
+        self.target_duration = target_duration
+        self.seconds_per_address = None
+
+        self._intervals = TargetSet.coerce(target).intervals()
+        self._version = self._cursor = self._end = None
+
+    def next_shard(self):
+        """
+        Returns:
+            str: The next shard in CIDR notation, or None when the targets are exhausted.
+        """
+        if self._cursor is None or self._cursor > self._end:
+            interval = next(self._intervals, None)
+            if interval is None:
+                return None
+            self._version, self._cursor, self._end = interval
+
+        bits = IPV4_BITS if self._version == 4 else IPV6_BITS
+        # Largest block aligned on the cursor that fits both the shard size and the remaining interval
+        alignment = self._cursor & -self._cursor or 1 << bits
+        limit = min(alignment, self._end - self._cursor + 1, 1 << (bits - self.prefix))
+        size = 1 << (limit.bit_length() - 1)
+        shard = ipaddress.ip_network((self._cursor, bits - size.bit_length() + 1))
+        self._cursor += size
+        return str(shard)
+
+    def record(self, shard, duration):
+        """
+        Feed back the duration of a completed shard and adapt the shard size.
+
+        Args:
+            shard (str): The shard that completed.
+            duration (float): Its wall time in seconds.
+        """
+        network = ipaddress.ip_network(shard)
+        if network.version != 4:
+            return
+        num_addresses = network.num_addresses
+        observed = max(duration, 1e-6) / num_addresses
+        if self.seconds_per_address is None:
+            self.seconds_per_address = observed
+        else:
+            self.seconds_per_address = 0.7 * self.seconds_per_address + 0.3 * observed
+
+        wanted_addresses = max(1.0, self.target_duration / self.seconds_per_address)
+        wanted_prefix = IPV4_BITS - int(math.log2(wanted_addresses))
+        # Move one step at a time so a single outlier does not swing the shard size
+        if wanted_prefix < self.prefix:
+            self.prefix = max(self.prefix - 1, self.min_prefix)
+        elif wanted_prefix > self.prefix:
+            self.prefix = min(self.prefix + 1, self.max_prefix)
+
+
+class ShardedDiscovery:
+    """
+    Runs discovery over large targets as parallel shards and streams partial results.
+    """
+
+    def __init__(self, scan_manager, max_in_flight=DISCOVERY_SHARD_MAX_IN_FLIGHT, scan_type="discovery",
+                 **sharder_options):
+        """
+        Args:
+            scan_manager (ScanManager): Scanner used to run discovery on each shard.
+            scan_type (str): Discovery-style scan type run on each shard.
+            max_in_flight (int): Maximum number of shards submitted at once per target.
+            **sharder_options: Passed through to `AdaptiveSharder`.
+        """
+        self.scan_manager = scan_manager
+        self.max_in_flight = max_in_flight
+        self.scan_type = scan_type
+        self.sharder_options = sharder_options
+        self.completed_shards = []
+        self.failed_shards = []
+
+    async def _scan_shard(self, shard, workflow_id):
+        started = time.monotonic()
+        result = await self.scan_manager.run_discovery(shard, workflow_id=workflow_id, scan_type=self.scan_type)
+        return result, time.monotonic() - started
+
+    async def run(self, target, workflow_id="default"):
+        """
+        Discover hosts in a target shard by shard.
+
+        Shards are generated lazily, so even a /8 or a TargetSet built from a
+        huge target file never has more than `max_in_flight` shards outstanding. A failing or cancelled shard
+        is recorded in `failed_shards`, logged through the scan manager and does not affect the others.
+
+        Args:
+            target (str | TargetSet): IPs or CIDRs to discover.
+            workflow_id (str): Workflow key passed to the scan scheduler.
+
+        Yields:
+            tuple: (shard, {ip: details}) for every shard that completed.
+        """
+        sharder = AdaptiveSharder(target, **self.sharder_options)
+        pending = {}
+        try:
+            while True:
+                while len(pending) < self.max_in_flight:
+                    shard = sharder.next_shard()
+                    if shard is None:
+                        break
+                    pending[asyncio.ensure_future(self._scan_shard(shard, workflow_id))] = shard
+                if not pending:
+                    return
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    shard = pending.pop(task)
+                    if task.cancelled() or task.exception() is not None:
+                        error = "cancelled" if task.cancelled() else str(task.exception()) or repr(task.exception())
+                        self.failed_shards.append({"shard": shard, "error": error})
+                        self.scan_manager.log_error(f"shard {shard}", f"discovery shard failed: {error}")
+                        continue
+                    result, duration = task.result()
+                    sharder.record(shard, duration)
+                    self.completed_shards.append(shard)
+                    yield shard, result
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+
+class PhaseNode:
+    __slots__ = ("name", "phase", "depends_on", "started_at", "finished_at")
+
+    def __init__(self, name, phase, depends_on):
+        self.name = name
+        self.phase = phase
+        self.depends_on = tuple(depends_on)
+        self.started_at = None
+        self.finished_at = None
+
+
+class WorkflowDAG:
+    """
+    Workflow phases with their dependencies.
+
+    A phase starts as soon as every phase it depends on has finished, so
+    independent phases run concurrently (their scans still share the scan
+    scheduler's budget). Start and finish times are kept so the critical path,
+    the chain of phases that bounded the total runtime, can be reported.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def add(self, name, phase, depends_on=()):
+        if name in self.nodes:
+            raise ValueError(f"Duplicate workflow phase: {name}")
+        self.nodes[name] = PhaseNode(name, phase, depends_on)
+
+    def remove(self, name):
+        """Drop a phase; phases that depended on it inherit its dependencies."""
+        removed = self.nodes.pop(name)
+        for node in self.nodes.values():
+            if name in node.depends_on:
+                inherited = [dependency for dependency in removed.depends_on if dependency not in node.depends_on]
+                node.depends_on = tuple(
+                    dependency for dependency in node.depends_on if dependency != name
+                ) + tuple(inherited)
+
+    def topological_order(self):
+        """
+        Returns:
+            list: The nodes, each after all of its dependencies (ties keep insertion order).
+
+        Raises:
+            ValueError: On an unknown dependency or a dependency cycle.
+        """
+        for node in self.nodes.values():
+            for dependency in node.depends_on:
+                if dependency not in self.nodes:
+                    raise ValueError(f"Workflow phase {node.name} depends on unknown phase {dependency}")
+        remaining = {name: set(node.depends_on) for name, node in self.nodes.items()}
+        order = []
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Workflow phases form a cycle: {', '.join(remaining)}")
+            for name in ready:
+                del remaining[name]
+                for dependencies in remaining.values():
+                    dependencies.discard(name)
+                order.append(self.nodes[name])
+        return order
+
+    def is_chain(self):
+        """
+        Returns:
+            bool: True if the phases form a single line, which can be streamed as a pipeline.
+        """
+        order = self.topological_order()
+        return all(
+            node.depends_on == ((order[index - 1].name,) if index else ())
+            for index, node in enumerate(order)
+        )
+
+    async def run(self, run_phase):
+        """
+        Run every phase once its dependencies have finished.
+
+        Args:
+            run_phase (callable): Coroutine function called with each phase.
+        """
+        finished = {name: asyncio.Event() for name in self.nodes}
+
+        async def run_node(node):
+            for dependency in node.depends_on:
+                await finished[dependency].wait()
+            node.started_at = time.monotonic()
+            await run_phase(node.phase)
+            node.finished_at = time.monotonic()
+            finished[node.name].set()
+
+        async with asyncio.TaskGroup() as group:
+            for node in self.topological_order():
+                group.create_task(run_node(node))
+
+    def critical_path(self):
+        """
+        Returns:
+            list: Names of the phases on the critical path, first to last. Starting from the phase
+                that finished last, each step goes to the dependency that finished last, i.e. the one
+                that held the phase back.
+        """
+        finished = [node for node in self.nodes.values() if node.finished_at is not None]
+        if not finished:
+            return []
+        node = max(finished, key=lambda candidate: candidate.finished_at)
+        path = [node.name]
+        while node.depends_on:
+            node = max((self.nodes[name] for name in node.depends_on), key=lambda candidate: candidate.finished_at)
+            path.append(node.name)
+        return path[::-1]
+
+    def report(self):
+        """
+        Returns:
+            dict: Per-phase start offset, duration and time spent waiting on dependencies, plus the
+                critical path and the total runtime.
+        """
+        started = [node.started_at for node in self.nodes.values() if node.started_at is not None]
+        if not started:
+            return {"phases": {}, "critical_path": [], "total_seconds": 0.0}
+        origin = min(started)
+        phases = {}
+        for node in self.nodes.values():
+            if node.finished_at is None:
+                continue
+            ready_at = max((self.nodes[name].finished_at for name in node.depends_on), default=origin)
+            phases[node.name] = {
+                "phase": node.phase.phase_name,
+                "depends_on": list(node.depends_on),
+                "start_seconds": round(node.started_at - origin, 3),
+                "duration_seconds": round(node.finished_at - node.started_at, 3),
+                "wait_seconds": round(node.started_at - ready_at, 3),
+            }
+        critical_path = self.critical_path()
+        return {
+            "phases": phases,
+            "critical_path": critical_path,
+            "total_seconds": round(max(node.finished_at for node in self.nodes.values()
+                                       if node.finished_at is not None) - origin, 3),
+        }
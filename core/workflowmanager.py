@@ -1,93 +1,726 @@
 import asyncio
+import contextlib
 import os
-import json
+import time
+from collections import defaultdict
 from core.scanmanager import ScanManager
 from core.hostmanager import HostManager
-from config.config import NSE_CONFIG_PATH
+from core.sharding import ShardedDiscovery
+from core.batching import BatchScanner
+from core.portsplit import PortSplitScanner
+from utils.configcache import load_json_config
+from core.inventory import Inventory
+from core.scriptselector import ScriptSelector
+from core.workflowdag import WorkflowDAG
+from utils.targets import TargetSet
+from config.config import (
+    NSE_CONFIG_PATH,
+    WORKFLOW_CONFIG_PATH,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_MAX_IN_FLIGHT,
+    BATCH_FLUSH_SECONDS,
+    PORT_SPLIT_SCAN_TYPE,
+    PORT_SPLIT_PARTS,
+    PHASE_TIMEOUT_SECONDS,
+)
+
+# Marks the end of a host stream between pipelined phases
+PIPELINE_END = object()
+
+# Phase classes by the "type" of a workflow_config.json phase
+PHASE_TYPES = ("discovery", "port_scan", "vulnerability")
 
 
 class Phase:
-    def __init__(self, phase_name, workflow_manager_instance):
+    def __init__(self, phase_name, workflow_manager_instance, criteria=None):
         self.phase_name = phase_name
         self.workflow_manager_instance = workflow_manager_instance
+        # `Inventory.query` criteria selecting the hosts the phase works on; empty means every host
+        self.criteria = criteria or {}
+        # Seconds the phase may run before its remaining scans are cancelled; None for no deadline
+        self.timeout = None
+
+    def skip(self, host_instance):
+        """
+        Returns:
+            bool: True if a streamed host is passed on without scanning (already scanned, or outside the phase's input).
+        """
+        workflow_manager = self.workflow_manager_instance
+        return (workflow_manager.scan_completed(host_instance, self.scan_type)
+                or not workflow_manager.workflow_hosts.matches(host_instance, **self.criteria))
 
     async def execute(self):
         raise NotImplementedError("Subclasses must implement the execute method.")
 
+    async def execute_streaming(self, inbound, outbound):
+        """
+        Run the phase as a pipeline stage.
+
+        The default keeps barrier semantics: wait for the upstream stream to end,
+        run `execute`, then forward every known host downstream.
+
+        Args:
+            inbound (asyncio.Queue): Hosts from the previous phase, or None for the first phase.
+            outbound (asyncio.Queue): Queue feeding the next phase, or None for the last phase.
+        """
+        if inbound is not None:
+            while await inbound.get() is not PIPELINE_END:
+                pass
+        await self.execute()
+        if outbound is not None:
+            for host_instance in list(self.workflow_manager_instance.workflow_hosts.values()):
+                await outbound.put(host_instance)
+
 
 class TemplatePhase(Phase):
-    async def execute(self):
-        tasks = []
-        for target_cidr in self.workflow_manager_instance.workflow_targets:  # More descriptive
-            tasks.append(
-                self.workflow_manager_instance.scan_manager_instance.run_discovery(target_cidr)
-            )
+    @property
+    def scan_type(self):
+        return self.workflow_manager_instance.discovery_scan_type
+
+    def create_host(self, ip_address, details):
+        """
+        Build the HostManager for a live host reported by discovery.
+        """
+        host_manager_instance = HostManager(ip_address=ip_address)
+        host_manager_instance.update_metadata("discovered", True)
+        if details.get("ports"):
+            # Port-checking discovery engines already know some open ports; index them right away
+            host_manager_instance.update_from_scan(self.scan_type, details)
+        return host_manager_instance
 
-        discovery_results = await asyncio.gather(*tasks)
+    async def discover_hosts(self):
+        """
+        Run sharded discovery over the workflow targets and yield a HostManager
+        for each live host as soon as the shard containing it completes.
+
+        All targets are sharded as one collapsed TargetSet, so overlapping
+        targets are scanned once and shards are generated lazily.
+        """
+        workflow_manager = self.workflow_manager_instance
+        # Hosts restored from a checkpoint belong to shards that will not be swept again
+        for host_manager_instance in workflow_manager.restored_hosts:
+            yield host_manager_instance
 
-        for result in discovery_results:
+        discovery = ShardedDiscovery(workflow_manager.scan_manager_instance, scan_type=self.scan_type)
+        self.failed_shards = discovery.failed_shards
+        async for shard, result in discovery.run(workflow_manager.pending_targets(self.scan_type)):
             for ip_address, details in result.items():
                 if details.get("state") == "up":  # Using `state` to identify live hosts
-                    host_manager_instance = HostManager(ip_address=ip_address)
-                    host_manager_instance.update_metadata("discovered", True)
-                    self.workflow_manager_instance.workflow_hosts[ip_address] = host_manager_instance
+                    host_manager_instance = self.create_host(ip_address, details)
+                    workflow_manager.workflow_hosts[ip_address] = host_manager_instance
+                    workflow_manager.record_host(host_manager_instance)
+                    yield host_manager_instance
+            workflow_manager.record_shard(self.scan_type, shard)
+        if self.failed_shards:
+            print(f"Phase {self.phase_name}: {len(self.failed_shards)} discovery shards failed and were not swept: "
+                  + ", ".join(failed["shard"] for failed in self.failed_shards))
 
+    async def execute(self):
+        async for _ in self.discover_hosts():
+            pass
+
+    async def execute_streaming(self, inbound, outbound):
+        async for host_manager_instance in self.discover_hosts():
+            if outbound is not None:
+                await outbound.put(host_manager_instance)
+
+
+class DeltaDiscoveryPhase(TemplatePhase):
+    """
+    Cheap re-sweep that compares live hosts against the previous run's inventory.
+
+    Hosts that are new, came back up, or whose open-port fingerprint changed are
+    marked for the expensive scans; unchanged hosts keep their previous
+    `scan_results` and are skipped downstream.
+    """
+
+    scan_type = "delta_sweep"
+
+    @staticmethod
+    def fingerprint(details):
+        return ",".join(str(port) for port in sorted(details.get("ports", [])))
+
+    def create_host(self, ip_address, details):
+        previous_hosts = self.workflow_manager_instance.previous_hosts
+        fingerprint = self.fingerprint(details)
+        host_manager_instance = previous_hosts.get(ip_address)
+        if host_manager_instance is None:
+            host_manager_instance = HostManager(ip_address=ip_address)
+            delta_status = "new"
+        elif (host_manager_instance.get_metadata("state", "up") != "up"
+              or host_manager_instance.get_metadata("sweep_fingerprint") != fingerprint):
+            delta_status = "changed"
+        else:
+            delta_status = "unchanged"
+
+        timestamp = time.time()
+        host_manager_instance.update_metadata("discovered", True, timestamp)
+        host_manager_instance.update_metadata("state", "up", timestamp)
+        host_manager_instance.update_metadata("sweep_fingerprint", fingerprint, timestamp)
+        host_manager_instance.update_metadata("delta_status", delta_status, timestamp)
+        # Record the sweep's open ports too, so script selection sees newly opened services
+        host_manager_instance.update_from_scan(self.scan_type, details)
+        self.workflow_manager_instance.delta_summary[delta_status].append(ip_address)
+        return host_manager_instance
+
+    def finish(self):
+        """
+        Mark hosts from the previous inventory that did not answer the sweep as down.
+        """
+        workflow_hosts = self.workflow_manager_instance.workflow_hosts
+        for ip_address, host_manager_instance in self.workflow_manager_instance.previous_hosts.items():
+            if ip_address not in workflow_hosts and host_manager_instance.get_metadata("state", "up") == "up":
+                host_manager_instance.update_metadata("state", "down")
+                host_manager_instance.update_metadata("delta_status", "missing")
+                self.workflow_manager_instance.delta_summary["missing"].append(ip_address)
+                self.workflow_manager_instance.record_host(host_manager_instance)
 
-class TemplatePhase2(Phase):
     async def execute(self):
-        tasks = []
-        for host_instance in self.workflow_manager_instance.workflow_hosts.values():
-            nse_scripts = ",".join(
-                self.workflow_manager_instance.nse_configuration["categories"]["vuln"]["scripts"]
-            )
-            additional_arguments = f"--script {nse_scripts}"
-            scan_id = await self.workflow_manager_instance.scan_manager_instance.start_scan(
-                host_instance.ip_address, scan_type="vulnerability", additional_args=additional_arguments
+        await super().execute()
+        self.finish()
+
+    async def execute_streaming(self, inbound, outbound):
+        async for host_manager_instance in self.discover_hosts():
+            if outbound is not None and host_manager_instance.get_metadata("delta_status") != "unchanged":
+                await outbound.put(host_manager_instance)
+        self.finish()
+
+
+class PortScanPhase(Phase):
+    """
+    Full-port scan of every live host, split into concurrent port ranges.
+
+    When pipelined, a host is handed downstream as soon as its first partition
+    (the most common ports) is merged or has failed, while the rest of its
+    port space is still being scanned.
+    """
+
+    scan_type = PORT_SPLIT_SCAN_TYPE
+
+    def __init__(self, phase_name, workflow_manager_instance, criteria=None, scan_type=None, parts=PORT_SPLIT_PARTS):
+        super().__init__(phase_name, workflow_manager_instance, criteria)
+        if scan_type is not None:
+            self.scan_type = scan_type
+        self.parts = parts
+
+    def create_scanner(self):
+        return PortSplitScanner(self.workflow_manager_instance.scan_manager_instance, self.scan_type, self.parts)
+
+    async def scan_host(self, scanner, host_instance, on_partition=None):
+        await scanner.scan(host_instance, on_partition=on_partition)
+        self.workflow_manager_instance.record_scan(host_instance, self.scan_type)
+
+    async def execute(self):
+        scanner = self.create_scanner()
+        await asyncio.gather(*(
+            self.scan_host(scanner, host_instance)
+            for host_instance in self.workflow_manager_instance.hosts_pending_scan(self.scan_type, **self.criteria)
+        ))
+
+    async def execute_streaming(self, inbound, outbound):
+        scanner = self.create_scanner()
+        in_flight = asyncio.Semaphore(PIPELINE_MAX_IN_FLIGHT)
+
+        async def process(host_instance):
+            first_partition = asyncio.Event()
+
+            def on_partition(_, index, __):
+                if index == 0:
+                    first_partition.set()
+
+            try:
+                scan = asyncio.ensure_future(self.scan_host(scanner, host_instance, on_partition=on_partition))
+                first_wait = asyncio.ensure_future(first_partition.wait())
+                await asyncio.wait([scan, first_wait], return_when=asyncio.FIRST_COMPLETED)
+                first_wait.cancel()
+                if outbound is not None:
+                    await outbound.put(host_instance)
+                await scan
+            finally:
+                in_flight.release()
+
+        async with asyncio.TaskGroup() as group:
+            while (host_instance := await inbound.get()) is not PIPELINE_END:
+                if self.skip(host_instance):
+                    if outbound is not None:
+                        await outbound.put(host_instance)
+                    continue
+                await in_flight.acquire()
+                group.create_task(process(host_instance))
+
+
+class TemplatePhase2(Phase):
+    scan_type = "vulnerability"
+
+    def __init__(self, phase_name, workflow_manager_instance, criteria=None, scan_type=None, category="vuln"):
+        super().__init__(phase_name, workflow_manager_instance, criteria)
+        if scan_type is not None:
+            self.scan_type = scan_type
+        self.script_selector = ScriptSelector(workflow_manager_instance.nse_configuration, category)
+
+    def build_arguments(self, host_instance=None):
+        """
+        Build the extra nmap arguments for a host: the NSE scripts that apply to
+        its ports and services. Per-subnet timing is added by the scan manager's
+        rate controller, if one is configured.
+
+        Returns:
+            str: The arguments, or None if no script applies to the host.
+        """
+        selector = self.script_selector
+        scripts = selector.select(host_instance) if host_instance is not None else selector.everything
+        additional_arguments = selector.script_argument(scripts)
+        if additional_arguments is None:
+            if host_instance is not None:
+                host_instance.update_metadata(f"scan_{self.scan_type}_skipped", "no applicable scripts")
+            return None
+        return additional_arguments
+
+    async def scan_host(self, host_instance, additional_arguments):
+        scan_manager = self.workflow_manager_instance.scan_manager_instance
+        try:
+            scan_id = await scan_manager.start_scan(
+                host_instance.ip_address, scan_type=self.scan_type, additional_args=additional_arguments
             )
-            tasks.append((host_instance, scan_id))
+            result = await scan_manager.wait_for_scan(scan_id)
+        except Exception as e:
+            # A failed or timed-out host must not take the rest of the phase down with it
+            host_instance.update_metadata(f"scan_{self.scan_type}_error", str(e))
+            return host_instance
+        host_instance.update_from_scan(self.scan_type, result.get(host_instance.ip_address, {}))
+        self.host_done(host_instance)
+        return host_instance
+
+    def host_done(self, host_instance):
+        self.workflow_manager_instance.record_scan(host_instance, self.scan_type)
+
+    def create_batch_scanner(self):
+        return BatchScanner(
+            self.workflow_manager_instance.scan_manager_instance,
+            self.scan_type,
+            on_host_done=self.host_done,
+        )
+
+    async def execute(self):
+        host_instances = self.workflow_manager_instance.hosts_pending_scan(self.scan_type, **self.criteria)
+        # Hosts sharing a script set can share one nmap invocation
+        groups = defaultdict(list)
+        for host_instance in host_instances:
+            additional_arguments = self.build_arguments(host_instance)
+            if additional_arguments is not None:
+                groups[additional_arguments].append(host_instance)
+        if not self.workflow_manager_instance.batch_scans:
+            await asyncio.gather(*(
+                self.scan_host(host_instance, additional_arguments)
+                for additional_arguments, group in groups.items() for host_instance in group
+            ))
+            return
+
+        scanner = self.create_batch_scanner()
+        await asyncio.gather(*(
+            scanner.scan(group, additional_arguments) for additional_arguments, group in groups.items()
+        ))
+
+    async def execute_streaming(self, inbound, outbound):
+        if self.workflow_manager_instance.batch_scans:
+            await self.execute_streaming_batched(inbound, outbound)
+            return
+
+        in_flight = asyncio.Semaphore(PIPELINE_MAX_IN_FLIGHT)
 
-        for host_instance, scan_id in tasks:
-            result = await self.workflow_manager_instance.scan_manager_instance.get_scan_results(scan_id)
-            host_instance.update_from_scan("vulnerability", result)
+        async def process(host_instance, additional_arguments):
+            try:
+                await self.scan_host(host_instance, additional_arguments)
+                if outbound is not None:
+                    await outbound.put(host_instance)
+            finally:
+                in_flight.release()
+
+        async with asyncio.TaskGroup() as group:
+            while (host_instance := await inbound.get()) is not PIPELINE_END:
+                additional_arguments = None if self.skip(host_instance) else self.build_arguments(host_instance)
+                if additional_arguments is None:
+                    if outbound is not None:
+                        await outbound.put(host_instance)
+                    continue
+                # Stop pulling from upstream while too many hosts are in flight (backpressure)
+                await in_flight.acquire()
+                group.create_task(process(host_instance, additional_arguments))
+
+    async def execute_streaming_batched(self, inbound, outbound):
+        """
+        Collect streamed hosts into per-argument buffers and scan each buffer as
+        a batch once it reaches the adaptive batch size, or when no new host
+        arrived for BATCH_FLUSH_SECONDS.
+        """
+        scanner = self.create_batch_scanner()
+        in_flight = asyncio.Semaphore(PIPELINE_MAX_IN_FLIGHT)
+        buffers = defaultdict(list)
+
+        async def process(batch, additional_arguments):
+            try:
+                await scanner.scan(batch, additional_arguments)
+                if outbound is not None:
+                    for host_instance in batch:
+                        await outbound.put(host_instance)
+            finally:
+                for _ in batch:
+                    in_flight.release()
+
+        def flush(group):
+            for additional_arguments in list(buffers):
+                group.create_task(process(buffers.pop(additional_arguments), additional_arguments))
+
+        async with asyncio.TaskGroup() as group:
+            while True:
+                try:
+                    host_instance = await asyncio.wait_for(inbound.get(), timeout=BATCH_FLUSH_SECONDS)
+                except asyncio.TimeoutError:
+                    flush(group)
+                    continue
+                if host_instance is PIPELINE_END:
+                    break
+                additional_arguments = None if self.skip(host_instance) else self.build_arguments(host_instance)
+                if additional_arguments is None:
+                    if outbound is not None:
+                        await outbound.put(host_instance)
+                    continue
+                if in_flight.locked():
+                    # Buffered hosts hold in-flight slots; scan them rather than wait on ourselves
+                    flush(group)
+                await in_flight.acquire()
+                buffers[additional_arguments].append(host_instance)
+                if len(buffers[additional_arguments]) >= scanner.sizer.current:
+                    group.create_task(process(buffers.pop(additional_arguments), additional_arguments))
+            flush(group)
 
 
 class WorkflowManager:
-    def __init__(self, scan_manager_instance: ScanManager, results_dir, workflow_targets: list):
+    def __init__(self, scan_manager_instance: ScanManager, results_dir, workflow_targets: list, pipelined=False,
+                 batch_scans=False, results_writer=None, previous_inventory=None, discovery_scan_type="discovery",
+                 metrics=None, checkpoint=None, resume=False, full_port_scan=False, scan_filter=None,
+                 workflow_config=None, phase_timeout=PHASE_TIMEOUT_SECONDS):
         """
         Initialize WorkflowManager with all components needed to manage phases.
         ie; config triggers, and create new tool phases based on triggers.
 
         Args:
             scan_manager_instance (ScanManager): Manages scanning-related operations.
-            workflow_targets (list): List of CIDR ranges or IP addresses to target.
+            workflow_targets (list | TargetSet): CIDR ranges, IP addresses or ranges to target; overlapping
+                entries are collapsed and exclusions of a TargetSet are honoured.
+            pipelined (bool): Stream hosts between phases instead of running them one after another.
+            batch_scans (bool): Scan hosts that share nmap arguments together in multi-host invocations.
+            results_writer (ResultsWriter): Persists hosts and scan results in the background, if given.
+            previous_inventory (iterable): Host dicts from an earlier run; enables delta mode, where only
+                new or changed hosts are sent through the vulnerability phase. Hosts outside
+                `workflow_targets` are ignored, so a delta run over one subnet leaves the rest alone.
+            discovery_scan_type (str): scan_config.json entry used by the discovery phase
+                (e.g. "fast_discovery" for the built-in asyncio engine).
+            metrics (MetricsRegistry): Receives phase spans and event-loop lag; defaults to the
+                scan manager's registry so scans and phases end up in one trace.
+            checkpoint (CheckpointJournal): Journal of completed shards, hosts and scans, if given.
+            resume (bool): Continue the work recorded in `checkpoint` instead of starting over.
+            full_port_scan (bool): Scan all 65535 TCP ports of every live host, in concurrent port
+                ranges, before the vulnerability phase.
+            scan_filter (dict): Limits the vulnerability phases to hosts matching `Inventory.query`
+                criteria, e.g. {"ports": [445]} or {"services": ["http"], "subnet": "10.0.3.0/24"};
+                applied on top of each phase's own input.
+            workflow_config (dict): Phase graph in the format of workflow_config.json; defaults to that file.
+            phase_timeout (float): Deadline in seconds for phases without their own "timeout"; a phase
+                past its deadline has its scans cancelled and the workflow moves on. None for no deadline.
         """
         self.scan_manager_instance = scan_manager_instance
-        self.workflow_targets = workflow_targets
-        self.workflow_hosts = {}
+        self.workflow_targets = TargetSet.coerce(workflow_targets)
+        # Indexed by port, service and subnet as hosts are added and updated
+        self.workflow_hosts = Inventory()
+        self.scan_filter = scan_filter or {}
         self.results_dir = results_dir
-        self.workflow_phases = [
-            TemplatePhase("Template Enumeration", self),
-            TemplatePhase2("Template Tool Usage", self),
-        ]
+        self.pipelined = pipelined
+        self.batch_scans = batch_scans
+        self.results_writer = results_writer
+        self.discovery_scan_type = discovery_scan_type
+        self.metrics = metrics if metrics is not None else scan_manager_instance.metrics
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.restored_hosts = []
+        self.completed_shards = {}
+        self.completed_scans = {}
+        self.delta = previous_inventory is not None
+        self.previous_hosts = {}
+        self.delta_summary = {"new": [], "changed": [], "unchanged": [], "missing": []}
+        if self.delta:
+            for host_data in previous_inventory:
+                if host_data["ip_address"] not in self.workflow_targets:
+                    continue
+                host_manager_instance = HostManager.from_dict(host_data)
+                self.previous_hosts[host_manager_instance.ip_address] = host_manager_instance
+        self.full_port_scan = full_port_scan
+        self.phase_timeout = phase_timeout
+        self.timed_out_phases = []
         self.nse_configuration = self.load_nse_configuration()  # Avoids shadowing `nse_config`
+        self.workflow_dag = self.build_workflow_dag(
+            workflow_config if workflow_config is not None else load_json_config(WORKFLOW_CONFIG_PATH)
+        )
+        # Phases in dependency order; the order pipelined mode chains them in
+        self.workflow_phases = [node.phase for node in self.workflow_dag.topological_order()]
+        self.phase_report = None
+
+    def build_phase(self, spec):
+        """
+        Build the phase described by one entry of a workflow configuration.
+
+        Args:
+            spec (dict): The phase's "type" plus optional "name", "input" (`Inventory.query` criteria),
+                "timeout" (seconds) and, for scanning phases, "scan_type", "category" (NSE) or "parts"
+                (port ranges).
+
+        Returns:
+            Phase: The phase instance.
+        """
+        phase_type = spec.get("type")
+        if phase_type not in PHASE_TYPES:
+            raise ValueError(f"Unknown workflow phase type: {phase_type}")
+        criteria = dict(spec.get("input", {}))
+        if phase_type == "discovery":
+            if self.delta:
+                return DeltaDiscoveryPhase("Delta Sweep", self)
+            return TemplatePhase(spec.get("name", "Template Enumeration"), self)
+        if phase_type == "port_scan":
+            return PortScanPhase(spec.get("name", "Full Port Scan"), self, criteria,
+                                 spec.get("scan_type"), spec.get("parts", PORT_SPLIT_PARTS))
+        criteria.update(self.scan_filter)
+        return TemplatePhase2(spec.get("name", "Template Tool Usage"), self, criteria,
+                              spec.get("scan_type"), spec.get("category", "vuln"))
+
+    def build_workflow_dag(self, workflow_config):
+        """
+        Build the phase graph of a workflow configuration.
+
+        A phase whose "when" option is off (e.g. "full_port_scan") is left out, and
+        phases depending on it depend on its own dependencies instead.
+
+        Returns:
+            WorkflowDAG: The phases and their dependencies.
+
+        Raises:
+            ValueError: On an unknown phase type, option or dependency, a cycle, or two
+                scanning phases sharing a scan type (results and checkpoints are keyed by it).
+        """
+        options = {"full_port_scan": self.full_port_scan, "delta": self.delta}
+        workflow_dag = WorkflowDAG()
+        disabled = []
+        for name, spec in workflow_config["phases"].items():
+            phase = self.build_phase(spec)
+            phase.timeout = spec.get("timeout", self.phase_timeout)
+            workflow_dag.add(name, phase, spec.get("depends_on", ()))
+            when = spec.get("when")
+            if when is not None:
+                if when not in options:
+                    raise ValueError(f"Unknown workflow option for phase {name}: {when}")
+                if not options[when]:
+                    disabled.append(name)
+        for name in disabled:
+            workflow_dag.remove(name)
+
+        scan_types = {}
+        for node in workflow_dag.topological_order():
+            if isinstance(node.phase, TemplatePhase):
+                continue
+            if node.phase.scan_type in scan_types:
+                raise ValueError(f"Workflow phases {scan_types[node.phase.scan_type]} and {node.name} "
+                                 f"share scan type {node.phase.scan_type}")
+            scan_types[node.phase.scan_type] = node.name
+        return workflow_dag
 
     @staticmethod
     def load_nse_configuration():
         """
-        Load the NSE configuration from a JSON file.
+        Load the NSE configuration from a JSON file (cached until the file changes).
 
         Returns:
             dict: Parsed NSE configuration.
         """
         if not os.path.exists(NSE_CONFIG_PATH):
             raise FileNotFoundError(f"NSE config file not found at {NSE_CONFIG_PATH}")
-        with open(NSE_CONFIG_PATH, "r") as file:
-            return json.load(file)
+        return load_json_config(NSE_CONFIG_PATH)
+
+    def hosts_pending_scan(self, scan_type=None, **criteria):
+        """
+        Hosts that still need the expensive scan phases.
+
+        Args:
+            scan_type (str): Also leave out hosts whose scan of this type a resumed checkpoint recorded.
+            **criteria: `Inventory.query` criteria (ports, services, subnet) selecting a subset of hosts.
+
+        Returns:
+            list: Every (matching) workflow host, minus hosts a delta sweep found unchanged.
+        """
+        candidates = self.workflow_hosts.query(**criteria) if criteria else self.workflow_hosts.values()
+        return [
+            host_instance for host_instance in candidates
+            if host_instance.get_metadata("delta_status") != "unchanged"
+            and not self.scan_completed(host_instance, scan_type)
+        ]
+
+    def scan_completed(self, host_instance, scan_type):
+        """
+        Returns:
+            bool: True if a resumed checkpoint shows the host already finished this scan type.
+        """
+        return host_instance.ip_address in self.completed_scans.get(scan_type, ())
+
+    def pending_targets(self, scan_type):
+        """
+        Targets a discovery phase still has to sweep.
+
+        Returns:
+            TargetSet: The workflow targets minus shards a resumed checkpoint recorded as complete.
+        """
+        completed = self.completed_shards.get(scan_type)
+        if not completed:
+            return self.workflow_targets
+        targets = self.workflow_targets.copy()
+        targets.exclude_all(completed)
+        return targets
+
+    def restore_checkpoint(self):
+        """
+        Open the checkpoint journal and, when resuming, rebuild hosts and completed work from it.
+        """
+        if self.checkpoint is None:
+            return
+        state = self.checkpoint.open(self.workflow_targets, resume=self.resume)
+        if state.complete:
+            # Nothing is left to resume; sweep again under a new journal rather than report stale results
+            print(f"Checkpoint {self.checkpoint.path} records a finished run; starting a new one")
+            self.checkpoint.close()
+            self.resume = False
+            state = self.checkpoint.open(self.workflow_targets)
+        for host_data in state.hosts.values():
+            host_manager_instance = HostManager.from_dict(host_data)
+            self.workflow_hosts[host_manager_instance.ip_address] = host_manager_instance
+            self.restored_hosts.append(host_manager_instance)
+        self.completed_shards = state.completed_shards
+        self.completed_scans = state.completed_scans
+        if self.resume:
+            print(f"Resuming: {len(self.restored_hosts)} hosts, "
+                  f"{sum(len(shards) for shards in self.completed_shards.values())} shards, "
+                  f"{sum(len(ips) for ips in self.completed_scans.values())} scans restored from checkpoint")
+
+    def record_host(self, host_instance):
+        """
+        Queue a host snapshot with the results writer and the checkpoint journal, if configured.
+        """
+        if self.results_writer is not None:
+            self.results_writer.submit_host(host_instance)
+        if self.checkpoint is not None:
+            self.checkpoint.record_host(host_instance)
+
+    def record_scan(self, host_instance, scan_type):
+        """
+        Record a host whose scan of `scan_type` finished, so a resumed run skips it.
+        """
+        self.record_host(host_instance)
+        if self.checkpoint is not None:
+            self.checkpoint.record_scan(scan_type, host_instance.ip_address)
+
+    def record_shard(self, scan_type, shard):
+        """
+        Record a completed discovery shard; journalled after the hosts it found.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.record_shard(scan_type, shard)
 
     async def execute_workflow(self):
         """
-        Execute all workflow phases sequentially.
+        Execute all workflow phases: each once its dependencies finish, or as a pipeline.
+        """
+        self.restore_checkpoint()
+        if self.results_writer is not None:
+            self.results_writer.start()
+            self.scan_manager_instance.host_callbacks.append(self.results_writer.submit_scan_result)
+        self.metrics.loop_lag.start()
+        completed = False
+        try:
+            with self.metrics.span("workflow", pipelined=self.pipelined, batched=self.batch_scans):
+                if self.pipelined and self.workflow_dag.is_chain():
+                    await self.execute_pipelined()
+                else:
+                    if self.pipelined:
+                        print("Workflow phases branch; running them as a dependency graph instead of a pipeline")
+                    await self.workflow_dag.run(self.run_phase)
+                    self.phase_report = self.workflow_dag.report()
+            completed = True
+        finally:
+            await self.metrics.loop_lag.stop()
+            if self.checkpoint is not None:
+                self.checkpoint.close(complete=completed)
+            if self.results_writer is not None:
+                self.scan_manager_instance.host_callbacks.remove(self.results_writer.submit_scan_result)
+                for host_instance in self.workflow_hosts.values():
+                    self.results_writer.submit_host(host_instance)
+                await self.results_writer.close()
+
+    async def run_phase(self, phase):
+        """
+        Run one phase once its dependencies have finished.
+        """
+        print(f"Executing phase: {phase.phase_name}")
+        with self.metrics.span(phase.phase_name):
+            async with self.phase_deadline(phase):
+                await phase.execute()
+
+    @contextlib.asynccontextmanager
+    async def phase_deadline(self, phase):
+        """
+        Enforce a phase's deadline: past it, the phase's outstanding scans are
+        cancelled (stopping their nmap processes) and the workflow carries on
+        with whatever the phase finished.
+        """
+        deadline = asyncio.timeout(phase.timeout)
+        try:
+            async with deadline:
+                yield
+        except TimeoutError:
+            if not deadline.expired():
+                raise
+            self.timed_out_phases.append(phase.phase_name)
+            print(f"Phase {phase.phase_name} missed its {phase.timeout}s deadline; unfinished scans were cancelled")
+
+    async def execute_pipelined(self):
+        """
+        Execute all phases concurrently, connected by bounded queues.
+
+        Each host found by a phase is handed to the next one as soon as it is
+        ready, so total runtime approaches the slowest phase rather than the sum
+        of all phases. Full queues block the upstream phase (backpressure).
+        """
+        queues = [asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE) for _ in self.workflow_phases[1:]]
+        closed = set()
+        async with asyncio.TaskGroup() as group:
+            for index, phase in enumerate(self.workflow_phases):
+                inbound = queues[index - 1] if index > 0 else None
+                outbound = queues[index] if index < len(queues) else None
+                group.create_task(self.run_stage(phase, inbound, outbound, closed))
+
+    async def run_stage(self, phase, inbound, outbound, closed):
+        """
+        Run one pipelined phase and close its outbound stream when it finishes.
+
+        Args:
+            closed (set): Queues whose end marker has been put, shared by all stages.
         """
-        for phase in self.workflow_phases:
-            print(f"Executing phase: {phase.phase_name}")
-            await phase.execute()
\ No newline at end of file
+        print(f"Executing phase (pipelined): {phase.phase_name}")
+        with self.metrics.span(phase.phase_name, pipelined=True):
+            async with self.phase_deadline(phase):
+                await phase.execute_streaming(inbound, outbound)
+        # The end marker is the last item of a closed queue, so it is still unread unless the queue is closed and empty
+        if (inbound is not None and phase.phase_name in self.timed_out_phases
+                and not (inbound in closed and inbound.empty())):
+            # Pass the rest of the upstream hosts on unscanned so upstream phases are not blocked
+            while (host_instance := await inbound.get()) is not PIPELINE_END:
+                if outbound is not None:
+                    await outbound.put(host_instance)
+        if outbound is not None:
+            await outbound.put(PIPELINE_END)
+            closed.add(outbound)
@@ -1,14 +1,106 @@
+import argparse
 import asyncio
-from core.scanmanager import ScanManager
-from core.workflowmanager import WorkflowManager
-from utils.stager import create_dir_structure, determine_target
-from config.config import RESULTS_DIR
+from config.config import (
+    RESULTS_DIR,
+    RESULTS_DB_PATH,
+    RESULTS_HOSTS_DIR,
+    SCAN_CACHE_PATH,
+    CHECKPOINT_PATH,
+    DISTRIBUTED_ADDRESS,
+    DISTRIBUTED_WORKER_CAPACITY,
+    PHASE_TIMEOUT_SECONDS,
+    REPORTS_DIR,
+    REPORT_FORMATS,
+)
 
 
-async def main():
+def parse_arguments():
+    """
+    Parse command-line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Aether network scanning workflow")
+    parser.add_argument("-t", "--target", nargs="+", help="Target IPs, CIDR ranges or ranges like 10.0.0.1-50")
+    parser.add_argument("--target-file", action="append", metavar="PATH",
+                        help="File with one target per line (may be repeated; streamed, so it can be very large)")
+    parser.add_argument("--exclude", nargs="+", help="IPs, CIDR ranges or ranges to leave out")
+    parser.add_argument("--exclude-file", action="append", metavar="PATH",
+                        help="File with one exclusion per line (may be repeated)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Stream discovered hosts into later phases instead of waiting for each phase")
+    parser.add_argument("--batch", action="store_true",
+                        help="Scan hosts that share a script set in multi-host nmap invocations")
+    parser.add_argument("--json-export", action="store_true",
+                        help="Also write one JSON file per host next to the results database")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached results and rescan every target")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only run vulnerability scans on hosts that are new or changed since the last run")
+    parser.add_argument("--discovery-scan-type", default="discovery",
+                        help="scan_config.json entry used for discovery (e.g. fast_discovery for the asyncio engine)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write scan and phase metrics in Prometheus text format to PATH")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write a JSON trace (Chrome trace-event format) of every scan and phase to PATH")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted workflow from its checkpoint, skipping completed shards and scans")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Do not journal progress for --resume")
+    parser.add_argument("--full-ports", action="store_true",
+                        help="Scan all TCP ports of every live host, split into concurrent port ranges")
+    parser.add_argument("--scan-ports", nargs="+", type=int, metavar="PORT",
+                        help="Only run vulnerability scans on hosts with one of these ports open")
+    parser.add_argument("--scan-services", nargs="+", metavar="SERVICE",
+                        help="Only run vulnerability scans on hosts running one of these services")
+    parser.add_argument("--scan-subnet", metavar="CIDR",
+                        help="Only run vulnerability scans on hosts inside this network")
+    parser.add_argument("--workflow", metavar="PATH",
+                        help="Phase graph to run instead of config/workflow_config.json")
+    parser.add_argument("--adaptive-rate", action="store_true",
+                        help="Adapt nmap's rate, parallelism and host group size per subnet to observed latency and loss")
+    parser.add_argument("--hedge", action="store_true",
+                        help="Re-issue straggling scans with a tighter host timeout and keep the first result")
+    parser.add_argument("--phase-timeout", type=float, default=PHASE_TIMEOUT_SECONDS, metavar="SECONDS",
+                        help="Cancel a workflow phase's unfinished scans after SECONDS and move on")
+    parser.add_argument("--report", nargs="*", choices=REPORT_FORMATS, metavar="FORMAT",
+                        help=f"Write fleet reports from the results database to {REPORTS_DIR} "
+                             f"(formats: {', '.join(REPORT_FORMATS)}; all if none given)")
+    parser.add_argument("--report-gzip", action="store_true",
+                        help="gzip the --report files")
+    parser.add_argument("--progress", action="store_true",
+                        help="Print nmap's percent complete and ETA for running scans")
+    parser.add_argument("--coordinator", nargs="?", const=DISTRIBUTED_ADDRESS, metavar="HOST:PORT",
+                        help="Lease shards and scans to worker processes connecting to HOST:PORT instead of scanning "
+                             f"locally (default {DISTRIBUTED_ADDRESS}). Workers are not authenticated; listen on a "
+                             "non-loopback address only on a trusted network")
+    parser.add_argument("--local-workers", type=int, default=0, metavar="N",
+                        help="With --coordinator, also start N worker processes on this machine")
+    parser.add_argument("--worker", metavar="HOST:PORT",
+                        help="Run as a worker for the coordinator at HOST:PORT")
+    parser.add_argument("--worker-capacity", type=int, default=DISTRIBUTED_WORKER_CAPACITY,
+                        help="Scans a worker runs at once")
+    return parser.parse_args()
+
+
+async def main(args):
     """
     Main entry point for initializing and executing the workflow.
+
+    The scanning modules are imported here rather than at module level so that
+    `--help` and argument errors return without loading them.
     """
+    from core.workflowmanager import WorkflowManager
+    from core.resultstore import ResultsWriter, SQLiteResultsStore, JsonResultsWriter
+    from core.checkpoint import CheckpointJournal
+    from utils.configcache import load_json_config
+    from utils.stager import create_dir_structure, determine_target
+
+    if args.worker:
+        await run_worker(args)
+        return
+
     print("Initializing Workflow...")
 
     # 1: Create directories
@@ -17,7 +109,7 @@ async def main():
     # 2: Initialize Targets
     try:
         print("Determining targets...")
-        targets = determine_target()  # template here
+        targets = determine_target(args)
         if not targets:
             print("No targets selected. Exiting.")
             return
@@ -26,26 +118,160 @@ async def main():
         print(f"Error determining targets: {e}")
         return
 
-    # 3: Initialize ScanManager
-    print("Initializing ScanManager...")
-    scan_manager_instance = ScanManager()
+    # 3: Initialize ScanManager, or a coordinator that leases scans to workers
+    if args.coordinator:
+        from core.distributed import ScanCoordinator, is_loopback
+        print(f"Initializing ScanCoordinator on {args.coordinator}...")
+        scan_manager_instance = ScanCoordinator(args.coordinator)
+        if not is_loopback(scan_manager_instance.host):
+            print(f"Warning: the coordinator accepts unauthenticated workers on {args.coordinator}; "
+                  "anyone who can reach it can take scans and report results")
+        await scan_manager_instance.start()
+        worker_args = [flag for flag, enabled in (
+            ("--no-cache", args.no_cache), ("--adaptive-rate", args.adaptive_rate), ("--hedge", args.hedge)
+        ) if enabled]
+        await scan_manager_instance.spawn_local_workers(args.local_workers, args.worker_capacity, extra_args=worker_args)
+    else:
+        print("Initializing ScanManager...")
+        scan_manager_instance = create_scan_manager(args)
+
+    # 4: Initialize results store (and the previous inventory for delta runs)
+    results_store = SQLiteResultsStore(RESULTS_DB_PATH)
+    previous_inventory = list(results_store.iter_hosts()) if args.delta else None
+    results_backends = [results_store]
+    if args.json_export:
+        results_backends.append(JsonResultsWriter(RESULTS_HOSTS_DIR))
 
-    # 4: Initialize WorkflowManager
+    # 5: Initialize WorkflowManager
     print("Initializing WorkflowManager...")
     workflow_manager_instance = WorkflowManager(
         scan_manager_instance=scan_manager_instance,
         workflow_targets=targets,
-        results_dir=RESULTS_DIR
+        results_dir=RESULTS_DIR,
+        pipelined=args.pipeline,
+        batch_scans=args.batch,
+        results_writer=ResultsWriter(results_backends),
+        previous_inventory=previous_inventory,
+        discovery_scan_type=args.discovery_scan_type,
+        full_port_scan=args.full_ports,
+        scan_filter={
+            key: value for key, value in (
+                ("ports", args.scan_ports), ("services", args.scan_services), ("subnet", args.scan_subnet)
+            ) if value
+        },
+        checkpoint=None if args.no_checkpoint else CheckpointJournal(CHECKPOINT_PATH),
+        resume=args.resume,
+        workflow_config=load_json_config(args.workflow) if args.workflow else None,
+        phase_timeout=args.phase_timeout,
     )
 
-    # 4: Execute
+    progress_printer = None
+    if args.progress:
+        from core.eventbus import SCAN_PROGRESS, SCAN_FINISHED, COALESCE
+        subscription = scan_manager_instance.event_bus.subscribe((SCAN_PROGRESS, SCAN_FINISHED), policy=COALESCE)
+        progress_printer = asyncio.ensure_future(print_progress(subscription))
+
+    # 6: Execute
     print("Executing workflow...")
     try:
         await workflow_manager_instance.execute_workflow()
         print("Workflow execution completed.")
+        print(f"Inventory: {workflow_manager_instance.workflow_hosts.summary()}")
+        if getattr(scan_manager_instance, "hedger", None) is not None:
+            print(f"Straggler hedging: {scan_manager_instance.hedger.stats}")
+        phase_report = workflow_manager_instance.phase_report
+        if phase_report is not None:
+            print(f"Critical path ({phase_report['total_seconds']}s): {' -> '.join(phase_report['critical_path'])}")
+            for name, timing in phase_report["phases"].items():
+                print(f"  {name}: started at {timing['start_seconds']}s, ran {timing['duration_seconds']}s")
+        if args.report is not None:
+            await write_reports(args)
     except Exception as e:
         print(f"Workflow execution failed: {e}")
+    finally:
+        if progress_printer is not None:
+            scan_manager_instance.event_bus.close()
+            await progress_printer
+        await close_scan_manager(scan_manager_instance)
+        if args.metrics:
+            scan_manager_instance.metrics.export_prometheus(args.metrics)
+        if args.trace:
+            scan_manager_instance.metrics.export_trace(args.trace)
+
+
+async def write_reports(args):
+    """
+    Stream the requested reports from the results database, off the event loop.
+    """
+    from core.resultstore import SQLiteResultsStore
+    from core.reports import ReportGenerator
+
+    generator = ReportGenerator(REPORTS_DIR, formats=args.report or REPORT_FORMATS, compress=args.report_gzip)
+    results_store = SQLiteResultsStore(RESULTS_DB_PATH)
+    try:
+        report = await asyncio.get_running_loop().run_in_executor(None, generator.generate, results_store)
+    finally:
+        results_store.close()
+    print(f"Reports written: {', '.join(report['files'].values())}")
+
+
+async def print_progress(subscription):
+    """
+    Print progress and completion events from the scan manager's event bus until it is closed.
+    """
+    async for event in subscription:
+        if event.kind == "scan_progress":
+            print(f"[{event.scan_id}] {event.data['task']}: {event.data['percent']:.1f}% done, "
+                  f"about {event.data['remaining']}s left")
+        else:
+            print(f"[{event.scan_id}] {event.data['scan_type']} scan {event.data['status']}")
+
+
+def create_scan_manager(args):
+    """
+    Build the local ScanManager with the cache, rate control and hedging selected on the command line.
+    """
+    from core.scanmanager import ScanManager
+    from core.scancache import ScanCache
+    from core.ratecontrol import RateController
+    from core.hedging import StragglerHedger
+
+    return ScanManager(
+        scan_cache=None if args.no_cache else ScanCache(SCAN_CACHE_PATH),
+        rate_controller=RateController() if args.adaptive_rate else None,
+        hedger=StragglerHedger() if args.hedge else None,
+    )
+
+
+async def run_worker(args):
+    """
+    Serve scans leased by a coordinator until it shuts down.
+    """
+    from core.distributed import ScanWorker
+    from utils.stager import create_dir_structure
+
+    create_dir_structure()
+    scan_manager_instance = create_scan_manager(args)
+    worker = ScanWorker(args.worker, scan_manager_instance, capacity=args.worker_capacity)
+    print(f"Worker {worker.worker_id} connecting to {args.worker}...")
+    try:
+        await worker.run()
+    except OSError as e:
+        print(f"Worker failed: {e}")
+    finally:
+        await close_scan_manager(scan_manager_instance)
+    print(f"Worker {worker.worker_id} finished {worker.completed} scans.")
+
+
+async def close_scan_manager(scan_manager_instance):
+    """
+    Cancel outstanding scans, stop the scan manager's parser threads and close its scan cache, if any.
+    """
+    await scan_manager_instance.shutdown()
+    scan_cache = getattr(scan_manager_instance, "scan_cache", None)
+    if scan_cache is not None:
+        scan_cache.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_arguments()))
@@ -0,0 +1,94 @@
+import pytest
+import asyncio
+import time
+from core.asyncdiscovery import AsyncDiscoveryEngine, RateLimiter
+from core.scanmanager import ScanManager
+
+
+async def start_listener():
+    async def handle(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def closed_port():
+    server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+    return port
+
+
+# Test that a local listener is reported open and the host up
+@pytest.mark.asyncio
+async def test_local_listener_detected():
+    server, listener = await start_listener()
+    engine = AsyncDiscoveryEngine(ports=[listener, await closed_port()], connect_timeout=1.0)
+    results = await engine.scan("127.0.0.1")
+
+    server.close()
+
+    assert results["127.0.0.1"]["state"] == "up"
+    assert results["127.0.0.1"]["ports"] == [listener]
+
+
+# Test that every address of a loopback range is probed and reported
+@pytest.mark.asyncio
+async def test_loopback_range():
+    server, listener = await start_listener()
+    seen = []
+    engine = AsyncDiscoveryEngine(ports=[listener], connect_timeout=1.0, max_in_flight=4)
+    results = await engine.scan("127.0.0.0/29", on_host=lambda ip, details: seen.append(ip))
+    server.close()
+
+    assert sorted(results) == [f"127.0.0.{i}" for i in range(1, 7)]
+    assert sorted(seen) == sorted(results)
+    assert all(details["state"] == "up" for details in results.values()), "Refused connections mean the host is up."
+
+
+
+# Test that addresses where every probe is filtered are left out, as nmap -sn leaves them out
+@pytest.mark.asyncio
+async def test_down_hosts_not_reported(monkeypatch):
+    server, listener = await start_listener()
+    seen = []
+    engine = AsyncDiscoveryEngine(ports=[listener], connect_timeout=1.0)
+    probe = engine.probe
+
+    async def filter_odd(ip_address, *args):
+        return "filtered" if int(ip_address.rsplit(".", 1)[1]) % 2 else await probe(ip_address, *args)
+
+    monkeypatch.setattr(engine, "probe", filter_odd)
+    results = await engine.scan("127.0.0.0/29", on_host=lambda ip, details: seen.append(ip))
+    server.close()
+
+    assert sorted(results) == ["127.0.0.2", "127.0.0.4", "127.0.0.6"]
+    assert sorted(seen) == sorted(results)
+
+
+# Test that the token bucket spaces out acquisitions
+@pytest.mark.asyncio
+async def test_rate_limiter():
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        await limiter.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+# Test that ScanManager runs asyncio-engine scan types without nmap
+@pytest.mark.asyncio
+async def test_scan_manager_asyncio_engine():
+    server, listener = await start_listener()
+    scan_manager = ScanManager(path="/nonexistent/nmap")
+    # The parsed config is shared between instances; replace the entry rather than mutating it
+    scan_manager.scan_config = {
+        **scan_manager.scan_config,
+        "fast_discovery": {**scan_manager.scan_config["fast_discovery"], "ports": [listener]},
+    }
+    results = await scan_manager.run_discovery("127.0.0.1", scan_type="fast_discovery")
+    server.close()
+
+    assert results["127.0.0.1"]["ports"] == [listener]
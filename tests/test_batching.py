@@ -0,0 +1,64 @@
+import pytest
+from core.batching import AdaptiveBatchSizer, BatchScanner
+from core.hostmanager import HostManager
+
+
+class BatchScanManager:
+    """Fails any batch larger than `max_working` hosts, otherwise reports port 443 open."""
+
+    def __init__(self, max_working):
+        self.max_working = max_working
+        self.batches = []
+        self.results = {}
+
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None):
+        ips = target.split()
+        self.batches.append(ips)
+        scan_id = f"scan_{len(self.batches)}"
+        if len(ips) > self.max_working:
+            self.results[scan_id] = RuntimeError("batch too large")
+        else:
+            self.results[scan_id] = {ip: {"ports": [443], "services": {443: "https"}} for ip in ips}
+        return scan_id
+
+    async def wait_for_scan(self, scan_id):
+        result = self.results[scan_id]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+# Test that combined output is split back into per-host updates
+@pytest.mark.asyncio
+async def test_batch_results_split_per_host():
+    hosts = [HostManager(f"10.0.0.{i}") for i in range(1, 9)]
+    scan_manager = BatchScanManager(max_working=100)
+    scanner = BatchScanner(scan_manager, "vulnerability", sizer=AdaptiveBatchSizer(initial=4))
+    await scanner.scan(hosts, "--script http-title")
+
+    assert [len(batch) for batch in scan_manager.batches] == [4, 4]
+    assert all(host.services == {443: "https"} for host in hosts)
+    assert all("vulnerability" in host.scan_results for host in hosts)
+
+
+# Test that failed batches are retried at smaller sizes
+@pytest.mark.asyncio
+async def test_failed_batch_retried_smaller():
+    hosts = [HostManager(f"10.0.0.{i}") for i in range(1, 9)]
+    scan_manager = BatchScanManager(max_working=2)
+    scanner = BatchScanner(scan_manager, "vulnerability", sizer=AdaptiveBatchSizer(initial=8))
+    await scanner.scan(hosts)
+
+    assert scan_manager.batches[0] == [host.ip_address for host in hosts]
+    assert all(host.open_ports == [443] for host in hosts), "Hosts were lost after a batch failure."
+    assert max(len(batch) for batch in scan_manager.batches[1:]) < 8
+    assert scanner.failed_hosts == []
+
+
+# Test adaptive sizing towards the target batch duration
+def test_batch_sizer_adapts():
+    sizer = AdaptiveBatchSizer(initial=10, minimum=1, maximum=1000, target_duration=100)
+    sizer.record(10, duration=10.0)  # 1s per host -> wants 100, capped at doubling
+    assert sizer.current == 20
+    sizer.shrink()
+    assert sizer.current == 10
@@ -0,0 +1,103 @@
+import pytest
+from core.checkpoint import CheckpointJournal
+from core.hostmanager import HostManager
+from core.workflowmanager import WorkflowManager
+from utils.targets import TargetSet
+from tests.test_workflowmanager import FakeScanManager
+
+TARGETS = ["10.0.0.0/30", "10.0.1.0/30"]
+
+
+def fake_scan_manager():
+    return FakeScanManager(
+        discovery={
+            "10.0.0.0/30": {"10.0.0.1": {"state": "up"}},
+            "10.0.1.0/30": {"10.0.1.1": {"state": "up"}},
+        },
+        delays={},
+    )
+
+
+# Test that a journal replays its records and ignores a tail truncated by a crash
+def test_journal_ignores_truncated_tail(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    journal = CheckpointJournal(path, flush_records=1)
+    journal.open(TargetSet(TARGETS))
+    journal.record_shard("discovery", "10.0.0.0/30")
+    journal.record_scan("vulnerability", "10.0.0.1")
+    journal.close()
+    with open(path, "a") as file:
+        file.write('{"type": "shard", "scan_type": "discov')
+
+    state = CheckpointJournal.load(path)
+    assert state.completed_shards == {"discovery": ["10.0.0.0/30"]}
+    assert state.completed_scans == {"vulnerability": {"10.0.0.1"}}
+    assert not state.complete
+    with pytest.raises(ValueError):
+        CheckpointJournal(path).open(TargetSet(["10.0.2.0/30"]), resume=True)
+
+
+# Test that records appended after resuming a crashed journal survive the next replay
+def test_resume_cuts_truncated_tail(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    journal = CheckpointJournal(path, flush_records=1)
+    journal.open(TargetSet(TARGETS))
+    journal.record_shard("discovery", "10.0.0.0/30")
+    journal.close()
+    with open(path, "a") as file:
+        file.write('{"type": "shard", "scan_type": "discov')
+
+    resumed = CheckpointJournal(path, flush_records=1)
+    resumed.open(TargetSet(TARGETS), resume=True)
+    resumed.record_shard("discovery", "10.0.1.0/30")
+    resumed.record_scan("vulnerability", "10.0.1.1")
+    resumed.close(complete=True)
+
+    state = CheckpointJournal.load(path)
+    assert state.completed_shards == {"discovery": ["10.0.0.0/30", "10.0.1.0/30"]}
+    assert state.completed_scans == {"vulnerability": {"10.0.1.1"}}
+    assert state.complete
+    assert resumed.records_written == 3
+
+
+# Test that a resumed workflow skips the shards and scans an interrupted run completed
+@pytest.mark.asyncio
+async def test_resume_skips_completed_work(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    # The interrupted run swept the first shard and scanned its host, then died
+    journal = CheckpointJournal(path, flush_records=1)
+    journal.open(TargetSet(TARGETS))
+    journal.record_host(HostManager(ip_address="10.0.0.1"))
+    journal.record_shard("discovery", "10.0.0.0/30")
+    journal.record_scan("vulnerability", "10.0.0.1")
+    journal.close()
+
+    resumed = fake_scan_manager()
+    workflow = WorkflowManager(resumed, str(tmp_path), TARGETS, pipelined=True,
+                               checkpoint=CheckpointJournal(path), resume=True)
+    await workflow.execute_workflow()
+
+    assert resumed.events == [("discovered", "10.0.1.0/30"), ("scanned", "10.0.1.1")]
+    assert set(workflow.workflow_hosts) == {"10.0.0.1", "10.0.1.1"}
+    assert CheckpointJournal.load(path).complete
+
+
+# Test that resuming a journal of a finished run starts a fresh sweep instead of restoring it
+@pytest.mark.asyncio
+async def test_resume_of_finished_run_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    journal = CheckpointJournal(path, flush_records=1)
+    journal.open(TargetSet(TARGETS))
+    journal.record_shard("discovery", "10.0.0.0/30")
+    journal.close(complete=True)
+
+    resumed = fake_scan_manager()
+    workflow = WorkflowManager(resumed, str(tmp_path), TARGETS, pipelined=True,
+                               checkpoint=CheckpointJournal(path), resume=True)
+    await workflow.execute_workflow()
+
+    assert sorted(event for event in resumed.events if event[0] == "discovered") == [
+        ("discovered", "10.0.0.0/30"), ("discovered", "10.0.1.0/30"),
+    ]
+    state = CheckpointJournal.load(path)
+    assert state.complete and state.completed_shards == {"discovery": ["10.0.0.0/30", "10.0.1.0/30"]}
@@ -0,0 +1,117 @@
+import pytest
+import asyncio
+from core.distributed import ScanCoordinator, ScanWorker, encode_message, read_message
+from core.sharding import ShardedDiscovery
+
+
+class SlowScanManager:
+    """Stands in for a worker's ScanManager; scans of targets listed in `delays` take that long."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.cancelled = []
+        self.cancelled_scans = []
+        self.results = {}
+
+    async def start_scan(self, target, scan_type, additional_args=None):
+        self.results[target] = target
+        return target
+
+    async def wait_for_scan(self, scan_id):
+        try:
+            await asyncio.sleep(self.delays.get(scan_id, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(scan_id)
+            raise
+        return {scan_id: {"state": "up", "ports": [80], "services": {80: "http"}}}
+
+    def cancel_scan(self, scan_id):
+        self.cancelled_scans.append(scan_id)
+        return True
+
+    async def shutdown(self):
+        pass
+
+
+async def connect_stalled_worker(coordinator):
+    """A worker that accepts leases and then never answers or sends a heartbeat."""
+    reader, writer = await asyncio.open_connection(coordinator.host, coordinator.port)
+    writer.write(encode_message({"type": "hello", "worker": "stalled", "capacity": 1}))
+    await read_message(reader)
+    await coordinator.wait_for_workers(1, timeout=5)
+    return writer
+
+
+# Test that local worker processes discover every shard, including one leased to a stalled worker
+@pytest.mark.asyncio
+async def test_local_workers_take_over_expired_lease():
+    coordinator = ScanCoordinator("127.0.0.1:0", lease_seconds=0.5, heartbeat_interval=0.1)
+    await coordinator.start()
+    stalled = await connect_stalled_worker(coordinator)
+    try:
+        discovery = ShardedDiscovery(coordinator, scan_type="fast_discovery", prefix=30, min_prefix=30, max_prefix=30)
+        await coordinator.spawn_local_workers(2, capacity=2, extra_args=["--no-cache"])
+        shards = {}
+        async with asyncio.timeout(30):
+            async for shard, result in discovery.run("127.0.1.0/28"):
+                shards[shard] = result
+    finally:
+        stalled.close()
+        await coordinator.shutdown()
+
+    assert sorted(shards) == ["127.0.1.0/30", "127.0.1.12/30", "127.0.1.4/30", "127.0.1.8/30"]
+    assert sum(len(result) for result in shards.values()) == 8
+    assert coordinator.stats["retried"] >= 1 and not discovery.failed_shards
+    assert all(process.returncode == 0 for process in coordinator.processes)
+
+
+# Test that an idle worker steals a straggling lease and the slow copy is cancelled
+@pytest.mark.asyncio
+async def test_idle_worker_steals_straggler():
+    coordinator = ScanCoordinator("127.0.0.1:0", lease_seconds=5, heartbeat_interval=0.05, steal_after=0.2)
+    await coordinator.start()
+    slow = SlowScanManager({"10.0.0.1": 30})
+    fast = SlowScanManager({})
+    workers = [ScanWorker(coordinator.address, slow, capacity=1)]
+    tasks = [asyncio.ensure_future(workers[0].run())]
+    await coordinator.wait_for_workers(1, timeout=5)
+
+    scan_id = await coordinator.start_scan("10.0.0.1", "vulnerability")
+    workers.append(ScanWorker(coordinator.address, fast, capacity=1))
+    tasks.append(asyncio.ensure_future(workers[1].run()))
+    async with asyncio.timeout(5):
+        result = await coordinator.wait_for_scan(scan_id)
+        while not slow.cancelled:
+            await asyncio.sleep(0.01)
+    await coordinator.shutdown()
+    await asyncio.gather(*tasks)
+
+    assert result == {"10.0.0.1": {"state": "up", "ports": [80], "services": {80: "http"}}}
+    assert coordinator.stats["stolen"] == 1
+    assert slow.cancelled == ["10.0.0.1"] and workers[1].completed == 1
+    assert slow.cancelled_scans == ["10.0.0.1"] and not fast.cancelled_scans
+
+
+# Test that cancelling a scan's future withdraws the lease and stops the worker's scan
+@pytest.mark.asyncio
+async def test_cancelled_scan_withdraws_lease():
+    coordinator = ScanCoordinator("127.0.0.1:0", lease_seconds=5, heartbeat_interval=0.05)
+    await coordinator.start()
+    slow = SlowScanManager({"10.0.0.1": 30})
+    worker = ScanWorker(coordinator.address, slow, capacity=1)
+    task = asyncio.ensure_future(worker.run())
+    await coordinator.wait_for_workers(1, timeout=5)
+
+    scan_id = await coordinator.start_scan("10.0.0.1", "vulnerability")
+    async with asyncio.timeout(5):
+        while not worker.tasks:
+            await asyncio.sleep(0.01)
+        coordinator.active_scans[scan_id].cancel()
+        while not slow.cancelled:
+            await asyncio.sleep(0.01)
+    connection = coordinator.workers[worker.worker_id]
+    await coordinator.shutdown()
+    await task
+
+    assert scan_id not in coordinator.running and connection.free == 1
+    assert slow.cancelled == ["10.0.0.1"] and slow.cancelled_scans == ["10.0.0.1"]
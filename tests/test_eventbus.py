@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from core.eventbus import EventBus, DROP_NEWEST, COALESCE, SCAN_PROGRESS, HOST_FOUND
+from core.scanmanager import ScanManager
+
+PROGRESS_NMAP = """#!/usr/bin/env python3
+import os, sys
+with open(os.path.join(os.path.dirname(__file__), "argv.log"), "w") as log:
+    log.write(" ".join(sys.argv[1:]))
+sys.stdout.write('<?xml version="1.0"?><nmaprun>')
+sys.stdout.write('<taskprogress task="Ping Scan" time="1700000000" percent="40.00" remaining="6" etc="1700000006"/>')
+sys.stdout.write('<host><status state="up"/><address addr="10.0.0.1" addrtype="ipv4"/></host>')
+sys.stdout.write('<taskend task="Ping Scan" time="1700000004"/>')
+sys.stdout.write('</nmaprun>')
+"""
+
+
+async def drain(subscription):
+    return [event async for event in subscription]
+
+
+# Test that full subscriber queues drop or coalesce events according to their policy
+@pytest.mark.asyncio
+async def test_subscriber_policies():
+    bus = EventBus()
+    oldest = bus.subscribe(maxsize=2)
+    newest = bus.subscribe(maxsize=2, policy=DROP_NEWEST)
+    coalesced = bus.subscribe(maxsize=2, policy=COALESCE)
+    hosts_only = bus.subscribe(kinds=[HOST_FOUND])
+
+    for percent in (10, 20, 30):
+        bus.publish(SCAN_PROGRESS, "scan_a", percent=percent)
+    bus.publish(HOST_FOUND, "scan_a", ip_address="10.0.0.1")
+    bus.publish(HOST_FOUND, "scan_a", ip_address="10.0.0.2")
+    bus.close()
+
+    assert [event.data for event in await drain(oldest)] == [{"ip_address": "10.0.0.1"}, {"ip_address": "10.0.0.2"}]
+    assert [event.data for event in await drain(newest)] == [{"percent": 10}, {"percent": 20}]
+    assert [event.data for event in await drain(coalesced)] == [{"ip_address": "10.0.0.1"}, {"ip_address": "10.0.0.2"}]
+    assert (oldest.dropped, newest.dropped, coalesced.dropped, coalesced.coalesced) == (3, 3, 1, 2)
+    assert len(await drain(hosts_only)) == 2 and bus.subscriptions == []
+
+
+# Test that a scan publishes its lifecycle, hosts and nmap's parsed progress to subscribers
+@pytest.mark.asyncio
+async def test_scan_manager_publishes_progress(tmp_path):
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(PROGRESS_NMAP)
+    fake_nmap.chmod(0o755)
+    scan_manager = ScanManager(path=str(fake_nmap))
+    subscription = scan_manager.event_bus.subscribe()
+
+    scan_id = await scan_manager.start_scan(target="10.0.0.1", scan_type="discovery", use_cache=False)
+    await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+    scan_manager.event_bus.close()
+    events = await drain(subscription)
+
+    # Hosts and progress parsed from the same chunk of output are published hosts first
+    assert [event.kind for event in events[:2]] == ["scan_queued", "scan_started"]
+    assert events[-1].kind == "scan_finished" and events[-1].data["status"] == "completed"
+    assert [event.data["ip_address"] for event in events if event.kind == "host_found"] == ["10.0.0.1"]
+    progress = [event.data for event in events if event.kind == "scan_progress"]
+    assert progress[0] == {"scan_type": "discovery", "task": "Ping Scan", "percent": 40.0, "remaining": 6,
+                           "eta": 1700000006}
+    assert progress[1]["percent"] == 100.0 and len(progress) == 2
+    assert scan_manager.progress[scan_id]["percent"] == 100.0
+    assert "--stats-every 5s" in (tmp_path / "argv.log").read_text()
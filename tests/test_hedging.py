@@ -0,0 +1,113 @@
+import asyncio
+import os
+import pytest
+import core.scanmanager
+from core.hedging import StragglerHedger
+from core.scanmanager import ScanManager
+from core.workflowmanager import WorkflowManager
+from tests.test_workflowmanager import FakeScanManager
+
+# Hangs on 10.0.0.9, ignoring SIGTERM, unless it is given a --host-timeout
+STRAGGLING_NMAP = """#!/usr/bin/env python3
+import os, signal, sys, time
+args = sys.argv[1:]
+with open(os.path.join(os.path.dirname(__file__), "runs.log"), "a") as log:
+    log.write(f"{os.getpid()} {' '.join(args)}\\n")
+if "10.0.0.9" in args and "--host-timeout" not in args:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(60)
+sys.stdout.write('<?xml version="1.0"?><nmaprun>')
+for target in (arg for arg in args if arg.startswith("10.")):
+    sys.stdout.write(f'<host><status state="up"/><address addr="{target}" addrtype="ipv4"/></host>')
+sys.stdout.write('</nmaprun>')
+"""
+
+
+def fake_nmap(tmp_path):
+    path = tmp_path / "nmap"
+    path.write_text(STRAGGLING_NMAP)
+    path.chmod(0o755)
+    return str(path)
+
+
+def runs(tmp_path):
+    return [line.split(" ", 1) for line in (tmp_path / "runs.log").read_text().splitlines()]
+
+
+def process_exists(pid):
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+# Test that a scan past its deadline fails with TimeoutError and its nmap is killed after ignoring SIGTERM
+@pytest.mark.asyncio
+async def test_scan_deadline_terminates_nmap(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.scanmanager, "SCAN_TERMINATE_GRACE_SECONDS", 0.2)
+    scan_manager = ScanManager(path=fake_nmap(tmp_path))
+
+    scan_id = await scan_manager.start_scan(target="10.0.0.9", scan_type="discovery", timeout=0.5)
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+
+    assert scan_manager.scan_status[scan_id] == "timed_out"
+    assert scan_manager.scheduler.running == 0
+    [(pid, _)] = runs(tmp_path)
+    assert not process_exists(pid)
+
+
+# Test that a straggling scan is re-issued with a host timeout and the faster copy's result is kept
+@pytest.mark.asyncio
+async def test_straggler_is_hedged(tmp_path, monkeypatch):
+    monkeypatch.setattr(core.scanmanager, "SCAN_TERMINATE_GRACE_SECONDS", 0.2)
+    hedger = StragglerHedger(min_samples=2, min_delay=0.3)
+    scan_manager = ScanManager(path=fake_nmap(tmp_path), hedger=hedger)
+
+    for target in ("10.0.0.1", "10.0.0.2", "10.0.0.9"):
+        scan_id = await scan_manager.start_scan(target=target, scan_type="discovery", use_cache=False)
+        result = await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+
+    assert result["10.0.0.9"]["state"] == "up"
+    assert hedger.stats == {"hedged": 1, "hedge_won": 1, "primary_won": 0}
+    straggler, hedge = runs(tmp_path)[2:]
+    assert "--host-timeout 1s" in hedge[1] and "--host-timeout" not in straggler[1]
+    assert not process_exists(straggler[0])
+
+
+# Test that hostname targets are timed and hedged like single addresses
+@pytest.mark.asyncio
+async def test_hostname_target_with_hedger(tmp_path):
+    hedger = StragglerHedger(min_samples=1, min_delay=5)
+    scan_manager = ScanManager(path=fake_nmap(tmp_path), hedger=hedger)
+
+    for _ in range(2):
+        scan_id = await scan_manager.start_scan(target="scanme.example.org", scan_type="discovery", use_cache=False)
+        await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+        assert scan_manager.scan_status[scan_id] == "completed"
+
+    assert len(hedger.samples["discovery"]) == 2
+    assert hedger.hedge_delay("discovery", "scanme.example.org 10.0.0.1") == 5
+
+
+class SlowScanManager(FakeScanManager):
+    async def wait_for_scan(self, scan_id):
+        if scan_id == "10.0.0.2":
+            await asyncio.sleep(60)
+        return await super().wait_for_scan(scan_id)
+
+
+# Test that a phase past its deadline is cut short and the workflow still completes
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipelined", [False, True])
+async def test_phase_deadline(tmp_path, pipelined):
+    scan_manager = SlowScanManager(
+        {"10.0.0.0/29": {"10.0.0.1": {"state": "up"}, "10.0.0.2": {"state": "up"}}}, delays={}
+    )
+    workflow = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/29"], pipelined=pipelined, phase_timeout=0.3)
+    await asyncio.wait_for(workflow.execute_workflow(), timeout=30)
+
+    assert workflow.timed_out_phases == ["Template Tool Usage"]
+    assert workflow.workflow_hosts["10.0.0.1"].open_ports == [80]
+    assert workflow.workflow_hosts["10.0.0.2"].open_ports == []
@@ -0,0 +1,52 @@
+import json
+import pytest
+import time
+from core.hostmanager import HostManager
+
+
+# Test that to_dict keeps the original structure
+def test_to_dict_compatible():
+    host = HostManager("10.0.0.5")
+    host.update_from_scan("port_scan", {"ports": [443, 22, 443], "services": {22: "ssh", 443: "https"}})
+    host.update_metadata("discovered", True)
+
+    data = host.to_dict()
+    assert set(data) == {"ip_address", "metadata", "services", "open_ports", "scan_results"}
+    assert data["open_ports"] == [22, 443], "Ports should be de-duplicated."
+    assert data["services"] == {22: "ssh", 443: "https"}
+    assert data["metadata"]["discovered"] is True
+    assert {"created_at", "last_updated", "open_ports_updated", "services_updated"} <= set(data["metadata"])
+    json.dumps(data)
+
+
+# Test port membership and duplicate handling
+def test_add_open_port_deduplicates():
+    host = HostManager("10.0.0.6")
+    assert host.add_open_port(8080) is True
+    assert host.add_open_port(8080) is False
+    assert host.has_port(8080) and not host.has_port(80)
+    assert host.open_ports == [8080]
+
+
+# Test that service names are interned across hosts
+def test_service_names_interned():
+    first, second = HostManager("10.0.0.7"), HostManager("10.0.0.8")
+    first.add_service(80, "".join(["ht", "tp"]))
+    second.add_service(80, "".join(["h", "ttp"]))
+    assert first.services[80] is second.services[80]
+
+
+# Test that a scan update takes a single timestamp and metadata can only change through update_metadata
+def test_update_from_scan_single_timestamp(monkeypatch):
+    host = HostManager("10.0.0.9")
+    calls = []
+    monkeypatch.setattr(time, "time", lambda: calls.append(None) or 1700000000.0)
+    host.update_from_scan("port_scan", {"ports": list(range(1, 200)), "services": {1: "tcpmux", 2: "compressnet"}})
+
+    assert len(calls) == 1
+    assert host.metadata["last_updated"] == HostManager.format_timestamp(1700000000.0)
+    assert not hasattr(host, "__dict__"), "HostManager should use __slots__."
+    with pytest.raises(TypeError):
+        host.metadata["discovered"] = True
+    host.update_metadata("discovered", True)
+    assert host.metadata["discovered"] is True and host.to_dict()["metadata"]["discovered"] is True
@@ -0,0 +1,73 @@
+import pytest
+from core.hostmanager import HostManager
+from core.inventory import Inventory
+from core.workflowmanager import WorkflowManager
+from tests.test_workflowmanager import FakeScanManager
+
+
+# Test that ports and services learned after a host is added are indexed incrementally
+def test_index_follows_host_updates():
+    inventory = Inventory()
+    for ip_address in ("10.0.0.5", "10.0.0.20", "10.0.1.7"):
+        inventory[ip_address] = HostManager(ip_address)
+    inventory["10.0.0.20"].update_from_scan("port_scan", {"ports": [445, 80], "services": {80: "http"}})
+    inventory["10.0.1.7"].update_from_scan("port_scan", {"ports": [8080], "services": {8080: "http"}})
+    inventory["10.0.0.5"].add_open_port(445)
+
+    assert [host.ip_address for host in inventory.with_port(445)] == ["10.0.0.5", "10.0.0.20"]
+    assert [host.ip_address for host in inventory.with_service("http")] == ["10.0.0.20", "10.0.1.7"]
+    assert [host.ip_address for host in inventory.query(ports=[445], services=["http"])] == ["10.0.0.20"]
+    assert [host.ip_address for host in inventory.in_subnet("10.0.0.0/16")] == ["10.0.0.5", "10.0.0.20", "10.0.1.7"]
+    assert [host.ip_address for host in inventory.in_subnet("10.0.0.16/28")] == ["10.0.0.20"]
+
+    inventory["10.0.1.7"].add_service(8080, "http-proxy")
+    del inventory["10.0.0.20"]
+    assert inventory.with_service("http") == [] and inventory.summary()["ports"] == {445: 1, 8080: 1}
+
+
+# Test that hosts of both address families are listed IPv4 first, each in address order
+def test_mixed_address_families():
+    inventory = Inventory()
+    for ip_address in ("2001:db8::10", "10.0.0.9", "2001:db8::2", "10.0.0.10"):
+        inventory[ip_address] = HostManager(ip_address)
+        inventory[ip_address].add_open_port(443)
+
+    ordered = ["10.0.0.9", "10.0.0.10", "2001:db8::2", "2001:db8::10"]
+    assert [host.ip_address for host in inventory.with_port(443)] == ordered
+    assert [host.ip_address for host in inventory.query()] == ordered
+    assert [host.ip_address for host in inventory.in_subnet("2001:db8::/32")] == ordered[2:]
+
+
+
+# Test that hosts keyed by name sort after addresses and stay out of the subnet index
+def test_hostname_keys():
+    inventory = Inventory()
+    for ip_address in ("scanme.example.org", "10.0.0.9", "backup.example.org"):
+        inventory.setdefault(ip_address, HostManager(ip_address)).add_open_port(22)
+
+    ordered = ["10.0.0.9", "backup.example.org", "scanme.example.org"]
+    assert [host.ip_address for host in inventory.with_port(22)] == ordered
+    assert [host.ip_address for host in inventory.query(ports=[22])] == ordered
+    assert list(inventory.by_subnet) == ["10.0.0.0/24"]
+    assert [host.ip_address for host in inventory.query(subnet="10.0.0.0/24")] == ["10.0.0.9"]
+    assert not inventory.matches(inventory["backup.example.org"], subnet="10.0.0.0/8")
+    del inventory["scanme.example.org"]
+    assert len(inventory.with_port(22)) == 2
+
+
+# Test that the vulnerability phase only scans hosts selected through the index
+@pytest.mark.asyncio
+async def test_scan_filter_selects_hosts(tmp_path):
+    fake_scan_manager = FakeScanManager(
+        discovery={"10.0.0.0/29": {
+            "10.0.0.1": {"state": "up", "ports": [445]},
+            "10.0.0.2": {"state": "up", "ports": [22]},
+            "10.0.0.3": {"state": "up"},
+        }},
+        delays={},
+    )
+    workflow = WorkflowManager(fake_scan_manager, str(tmp_path), ["10.0.0.0/29"], scan_filter={"ports": [445]})
+    await workflow.execute_workflow()
+
+    assert [event for event in fake_scan_manager.events if event[0] == "scanned"] == [("scanned", "10.0.0.1")]
+    assert set(workflow.workflow_hosts) == {"10.0.0.1", "10.0.0.2", "10.0.0.3"}
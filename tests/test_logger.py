@@ -0,0 +1,28 @@
+import logging
+from utils.logger import OutputRateFilter, create_logger
+
+
+# Test that creating the same logger twice reuses its handler instead of adding another
+def test_logger_handlers_reused(tmp_path):
+    first = create_logger("test.reuse", str(tmp_path / "reuse.log"), console=False)
+    second = create_logger("test.reuse", str(tmp_path / "other.log"), console=False)
+
+    assert first is second
+    assert len(first.handlers) == 1
+    assert not (tmp_path / "other.log").exists()
+
+
+# Test sampling and rate limiting of raw output lines
+def test_output_rate_filter():
+    def record(index):
+        return logging.LogRecord("test.output", logging.WARNING, __file__, 0, "line %d", (index,), None)
+
+    sampled = OutputRateFilter(sample_every=10)
+    kept = [index for index in range(100) if sampled.filter(record(index))]
+    assert len(kept) == 10
+
+    limited = OutputRateFilter(max_per_second=5)
+    records = [record(index) for index in range(1000)]
+    passed = [entry for entry in records if limited.filter(entry)]
+    assert len(passed) == 5
+    assert limited.suppressed == 995
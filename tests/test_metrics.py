@@ -0,0 +1,68 @@
+import pytest
+import asyncio
+import json
+from core.metrics import LoopLagMonitor, MetricsRegistry
+from core.scanmanager import ScanManager
+from tests.test_scanmanager import FAKE_NMAP
+
+
+# Test that a scan run through a fake nmap records queue wait, runtime and output bytes
+@pytest.mark.asyncio
+async def test_scan_metrics_recorded(tmp_path):
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(FAKE_NMAP)
+    fake_nmap.chmod(0o755)
+    scan_manager = ScanManager(path=str(fake_nmap))
+
+    scan_id = await scan_manager.start_scan(target="10.0.0.1", scan_type="discovery")
+    await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+
+    [record] = scan_manager.metrics.finished
+    assert record.scan_id == scan_id and scan_id not in scan_manager.metrics.scans
+    assert record.status == "completed"
+    assert record.queue_wait >= 0 and record.runtime > 0
+    assert record.output_bytes > 0
+
+    prometheus = scan_manager.metrics.to_prometheus()
+    assert 'aether_scans_total{scan_type="discovery",status="completed",cached="false"} 1' in prometheus
+    assert 'aether_scan_runtime_seconds_count{scan_type="discovery"} 1' in prometheus
+
+
+# Test phase spans and JSON trace export
+@pytest.mark.asyncio
+async def test_phase_spans_exported(tmp_path):
+    metrics = MetricsRegistry()
+    with metrics.span("discovery"):
+        await asyncio.sleep(0.01)
+    with pytest.raises(RuntimeError):
+        with metrics.span("vulnerability"):
+            raise RuntimeError("boom")
+
+    metrics.export_trace(str(tmp_path / "trace.json"))
+    metrics.export_prometheus(str(tmp_path / "metrics.prom"))
+    trace = json.loads((tmp_path / "trace.json").read_text())
+
+    phases = {event["name"]: event for event in trace["traceEvents"] if event["cat"] == "phase"}
+    assert phases["discovery"]["dur"] >= 10000
+    assert phases["vulnerability"]["args"]["status"] == "error"
+    assert 'aether_phase_duration_seconds{phase="discovery"}' in (tmp_path / "metrics.prom").read_text()
+
+
+# Test that finished scans and loop lag samples are folded into bounded aggregates
+def test_metrics_memory_bounded():
+    metrics = MetricsRegistry(trace_scans=3)
+    metrics.loop_lag = LoopLagMonitor(history=4)
+    for index in range(10):
+        scan_id = f"scan_{index}"
+        metrics.scan_queued(scan_id, "discovery")
+        metrics.scan_started(scan_id)
+        metrics.scan_finished(scan_id, "errored" if index == 0 else "completed")
+        metrics.loop_lag.observe(index / 1000)
+
+    assert metrics.scans == {} and [record.scan_id for record in metrics.finished] == ["scan_7", "scan_8", "scan_9"]
+    assert metrics.summary()["scan_types"]["discovery"]["scans"] == 10
+    assert metrics.summary()["scan_types"]["discovery"]["errored"] == 1
+    assert 'aether_scans_total{scan_type="discovery",status="completed",cached="false"} 9' in metrics.to_prometheus()
+    assert len(metrics.to_trace()["traceEvents"]) == 6
+    assert len(metrics.loop_lag.samples) == 4
+    assert metrics.loop_lag.summary() == {"mean_ms": 4.5, "p99_ms": 9.0, "max_ms": 9.0}
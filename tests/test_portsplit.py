@@ -0,0 +1,101 @@
+import pytest
+import asyncio
+from core.hostmanager import HostManager
+from core.metrics import MetricsRegistry
+from core.portsplit import PortSplitScanner, TOP_PORTS, split_ports, strip_port_options
+from core.scanmanager import ScanManager
+from core.workflowmanager import PIPELINE_END, PortScanPhase, WorkflowManager
+
+
+def expand(spec):
+    for part in spec.split(","):
+        first, _, last = part.partition("-")
+        yield from range(int(first), int(last or first) + 1)
+
+
+class PortScanManager:
+    """Reports the open ports that fall into each requested range; port 80 is reported by every range.
+
+    Lower-priority (later) partitions take longer, as the large high-port ranges would.
+    """
+
+    def __init__(self, open_ports):
+        self.open_ports = open_ports
+        self.priorities = []
+        self.results = {}
+
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None):
+        ports = set(expand(additional_args.split("-p ")[1]))
+        self.priorities.append(priority)
+        found = sorted(port for port in self.open_ports if port in ports) + [80]
+        scan_id = f"scan_{len(self.results)}"
+        self.results[scan_id] = (priority, {target: {"state": "up", "ports": found,
+                                                       "services": {port: f"svc{port}" for port in found}}})
+        return scan_id
+
+    async def wait_for_scan(self, scan_id):
+        priority, result = self.results[scan_id]
+        await asyncio.sleep(0.005 * (priority - 100))  # Later partitions finish later
+        return result
+
+
+# Test that the partitions cover every port exactly once, common ports first
+def test_split_covers_port_space():
+    partitions = split_ports(parts=8)
+    ports = [port for partition in partitions for port in expand(partition)]
+
+    assert len(partitions) == 8
+    assert sorted(ports) == list(range(1, 65536))
+    assert list(expand(partitions[0])) == sorted(TOP_PORTS)
+    assert strip_port_options(["-sS", "-p-", "-T4", "--top-ports", "100", "-Pn"]) == ["-sS", "-T4", "-Pn"]
+    command = ScanManager().build_command("10.0.0.1", "stealth_all_port", "-p 1-100")
+    assert "-p-" not in command and command[-2:] == ["-p", "1-100"]
+
+
+# Test that partitions are merged without duplicates and the common ports are published first
+@pytest.mark.asyncio
+async def test_partitions_merged_into_host():
+    scan_manager = PortScanManager(open_ports=[22, 3389, 40000, 65000])
+    host = HostManager("10.0.0.5")
+    published = []
+    merged = await PortSplitScanner(scan_manager, "stealth_all_port", parts=6).scan(
+        host, on_partition=lambda host_instance, index, new_ports: published.append((index, new_ports))
+    )
+
+    assert host.open_ports == [22, 80, 3389, 40000, 65000] and merged["ports"] == host.open_ports
+    assert host.services[40000] == "svc40000" and len(host.services) == 5
+    assert published[0] == (0, [22, 80, 3389]) and sum(len(new_ports) for _, new_ports in published) == 5
+    assert scan_manager.priorities == [100 + index for index in range(6)]
+
+
+class SlowFirstPartitionManager(PortScanManager):
+    """The common-ports partition finishes last; records the partitions finished so far."""
+
+    def __init__(self, open_ports):
+        super().__init__(open_ports)
+        self.finished = []
+        self.metrics = MetricsRegistry()
+
+    async def wait_for_scan(self, scan_id):
+        priority, result = self.results[scan_id]
+        await asyncio.sleep(0.05 if priority == 100 else 0)
+        self.finished.append(priority - 100)
+        return result
+
+
+# Test that a pipelined host is handed downstream once its common-ports partition is merged, not any partition
+@pytest.mark.asyncio
+async def test_streaming_waits_for_first_partition(tmp_path):
+    scan_manager = SlowFirstPartitionManager(open_ports=[22, 40000])
+    workflow = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.5"])
+    phase = PortScanPhase("port_scan", workflow)
+    inbound, outbound = asyncio.Queue(), asyncio.Queue()
+    await inbound.put(HostManager("10.0.0.5"))
+    await inbound.put(PIPELINE_END)
+
+    streaming = asyncio.ensure_future(phase.execute_streaming(inbound, outbound))
+    host = await asyncio.wait_for(outbound.get(), timeout=5)
+    finished_at_handoff = list(scan_manager.finished)
+    await streaming
+
+    assert 0 in finished_at_handoff and 22 in host.open_ports
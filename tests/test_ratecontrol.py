@@ -0,0 +1,71 @@
+import pytest
+import asyncio
+from core.ratecontrol import RateController
+from core.scanmanager import ScanManager
+
+DROPPING_NMAP = """#!/usr/bin/env python3
+import os, sys
+with open(os.path.join(os.path.dirname(__file__), "argv.log"), "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+sys.stderr.write("Increasing send delay for 10.0.0.1 from 0 to 5 due to 11 out of 33 dropped probes since last increase.\\n")
+sys.stdout.write('<?xml version="1.0"?><nmaprun>')
+for target in (arg for arg in sys.argv[1:] if "." in arg):
+    sys.stdout.write(f'<host><status state="up"/><address addr="{target}" addrtype="ipv4"/></host>')
+sys.stdout.write('</nmaprun>')
+"""
+
+
+# Test that clean scans raise a subnet's settings additively and congestion cuts them multiplicatively
+def test_aimd_per_subnet():
+    controller = RateController(max_rate=(100, 10, 1000, 50), parallelism=(8, 1, 64, 2), hostgroup=(16, 1, 64, 4))
+    subnet = controller.subnet_for("10.0.3.0/28")
+    assert subnet == "10.0.3.0/24" and controller.subnet_for("10.0.3.200 10.9.0.1") == subnet
+    assert controller.subnet_for("Scanme.Nmap.org") == "scanme.nmap.org"
+
+    for _ in range(2):
+        decision = controller.record("a", "10.0.3.0/28", subnet, duration=1.4)
+    assert decision["action"] == "increase" and decision["max_rate"] == 200 and decision["max_parallelism"] == 12
+
+    decision = controller.record("b", "10.0.3.0/28", subnet, duration=7.0)
+    assert decision["action"] == "decrease" and decision["reason"] == "5.0x slower per address"
+    assert decision["max_rate"] == 100 and decision["max_hostgroup"] == 12
+
+    controller.observe_output("c", "Warning: 10.0.3.4 giving up on port because retransmission cap hit (6).")
+    assert controller.record("c", "10.0.3.0/28", subnet, duration=1.4)["reason"] == "1 dropped probes"
+    assert controller.arguments("10.0.4.0/24") == "-T3 --max-rate 100 --max-parallelism 8 --max-hostgroup 16"
+
+
+# Test that dropped probes reported by nmap slow down the next scan of the subnet and are recorded in progress
+@pytest.mark.asyncio
+async def test_scan_manager_applies_rate_decisions(tmp_path):
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(DROPPING_NMAP)
+    fake_nmap.chmod(0o755)
+    controller = RateController(max_rate=(400, 10, 1000, 50))
+    scan_manager = ScanManager(path=str(fake_nmap), rate_controller=controller)
+
+    for target in ("10.0.0.1", "10.0.0.2"):
+        scan_id = await scan_manager.start_scan(target=target, scan_type="discovery")
+        await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+
+    decision = scan_manager.progress[scan_id]["rate_control"]
+    assert decision["action"] == "decrease" and decision["reason"] == "11 dropped probes"
+    assert decision["max_rate"] == 100
+    commands = (tmp_path / "argv.log").read_text().splitlines()
+    assert "--max-rate 400" in commands[0] and "--max-rate 200" in commands[1]
+
+
+# Test that a hostname target is scanned under its own rate state and completes
+@pytest.mark.asyncio
+async def test_hostname_target_with_rate_control(tmp_path):
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(DROPPING_NMAP)
+    fake_nmap.chmod(0o755)
+    scan_manager = ScanManager(path=str(fake_nmap), rate_controller=RateController())
+
+    scan_id = await scan_manager.start_scan(target="scanme.example.org", scan_type="discovery", use_cache=False)
+    result = await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+
+    assert "scanme.example.org" in result
+    assert scan_manager.scan_status[scan_id] == "completed"
+    assert scan_manager.progress[scan_id]["rate_control"]["subnet"] == "scanme.example.org"
@@ -0,0 +1,67 @@
+import csv
+import gzip
+import json
+from core.hostmanager import HostManager
+from core.inventory import Inventory
+from core.reports import ReportGenerator
+from core.resultstore import SQLiteResultsStore
+
+MS17_010 = "VULNERABLE:\n  Remote Code Execution vulnerability in Microsoft SMBv1 servers (ms17-010)\n    State: VULNERABLE"
+
+
+def build_inventory():
+    inventory = Inventory()
+    for ip_address, ports, services, scripts in (
+        ("10.0.0.5", [445], {445: "microsoft-ds"}, {"445": {"smb-vuln-ms17-010": MS17_010}}),
+        ("10.0.0.9", [80, 443], {80: "http", 443: "https"}, {"80": {"http-vuln-cve2017-5638": "State: NOT VULNERABLE"}}),
+        ("10.0.1.7", [80], {80: "http"}, {"80": {"http-title": "<script>alert(1)</script>"}}),
+    ):
+        inventory[ip_address] = HostManager(ip_address)
+        inventory[ip_address].update_from_scan(
+            "vulnerability", {"state": "up", "ports": ports, "services": services, "scripts": scripts}
+        )
+    return inventory
+
+
+# Test that one pass over the inventory writes gzipped JSON Lines, CSV and HTML with per-section aggregates
+def test_reports_from_inventory(tmp_path):
+    report = ReportGenerator(str(tmp_path), compress=True).generate(build_inventory())
+
+    summary = report["summary"]
+    assert summary["hosts"] == 3
+    assert summary["open_ports_by_service"] == {"http": {80: 2}, "microsoft-ds": {445: 1}, "https": {443: 1}}
+    assert summary["vulnerabilities_by_subnet"] == {"10.0.0.0/24": 1}
+    assert summary["vulnerabilities_by_script"] == {"smb-vuln-ms17-010": 1}
+
+    with gzip.open(report["files"]["jsonl"], "rt") as file:
+        records = [json.loads(line) for line in file]
+    assert [record.get("ip_address") for record in records[:3]] == ["10.0.0.5", "10.0.0.9", "10.0.1.7"]
+    assert records[0]["vulnerabilities"] == ["445/smb-vuln-ms17-010"] and records[1]["vulnerabilities"] == []
+    assert records[3]["summary"]["hosts_by_subnet"] == {"10.0.0.0/24": 2, "10.0.1.0/24": 1}
+
+    with gzip.open(report["files"]["csv"], "rt", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [(row["ip_address"], row["open_ports"], row["vulnerabilities"]) for row in rows] == [
+        ("10.0.0.5", "445", "1"), ("10.0.0.9", "80;443", "0"), ("10.0.1.7", "80", "0")]
+
+    with gzip.open(report["files"]["html"], "rt") as file:
+        page = file.read()
+    assert all(f"<tr><td>{ip_address}</td>" in page for ip_address in ("10.0.0.5", "10.0.0.9", "10.0.1.7"))
+    assert page.count('class="vulnerable"') == 1
+    assert page.rstrip().endswith("</html>")
+    assert "Vulnerabilities by subnet" in page and "<script>" not in page
+
+
+# Test that reports stream from the results database
+def test_reports_from_results_store(tmp_path):
+    inventory = build_inventory()
+    store = SQLiteResultsStore(str(tmp_path / "aether.db"))
+    store.write_hosts([host.to_dict() for host in inventory.values()])
+
+    report = ReportGenerator(str(tmp_path / "reports"), formats=["csv"]).generate(store)
+    store.close()
+
+    assert list(report["files"]) == ["csv"] and report["files"]["csv"].endswith("report.csv")
+    assert report["summary"]["vulnerabilities_by_subnet"] == {"10.0.0.0/24": 1}
+    with open(report["files"]["csv"], newline="") as file:
+        assert len(list(csv.DictReader(file))) == 3
@@ -0,0 +1,85 @@
+import pytest
+import json
+from core.hostmanager import HostManager
+from core.resultstore import ResultsWriter, SQLiteResultsStore, JsonResultsWriter
+
+
+def make_host(ip, services):
+    host = HostManager(ip)
+    host.update_from_scan("port_scan", {"ports": list(services), "services": services})
+    return host
+
+
+# Test that the background writer persists hosts into SQLite in batches
+@pytest.mark.asyncio
+async def test_writer_persists_hosts(tmp_path):
+    store = SQLiteResultsStore(str(tmp_path / "results.db"))
+    writer = ResultsWriter([store], batch_size=2, flush_interval=0.01)
+    writer.start()
+    for i in range(5):
+        writer.submit_host(make_host(f"10.0.0.{i}", {80: "http", 445 + i: "microsoft-ds"}))
+    writer.submit_scan_result("scan_1", "vulnerability", "10.0.0.1", {"ports": [80]})
+    await writer.close()
+
+    reader = SQLiteResultsStore(str(tmp_path / "results.db"))
+    assert reader.hosts_with_port(80) == [f"10.0.0.{i}" for i in range(5)]
+    assert reader.hosts_with_port(446) == ["10.0.0.1"]
+    assert reader.hosts_with_service("http") == [f"10.0.0.{i}" for i in range(5)]
+    hosts = list(reader.iter_hosts())
+    assert hosts[0]["services"] == {80: "http", 445: "microsoft-ds"}
+    assert reader.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert writer.batches_written >= 3
+    reader.close()
+
+
+# Test that a newer snapshot replaces the stored ports of a host
+@pytest.mark.asyncio
+async def test_writer_replaces_snapshot(tmp_path):
+    store = SQLiteResultsStore(str(tmp_path / "results.db"))
+    writer = ResultsWriter([store], flush_interval=0.01)
+    writer.start()
+    writer.submit_host(make_host("10.0.0.1", {22: "ssh"}))
+    writer.submit_host(make_host("10.0.0.1", {443: "https"}))
+    await writer.close()
+
+    reader = SQLiteResultsStore(str(tmp_path / "results.db"))
+    assert reader.hosts_with_port(22) == []
+    assert reader.hosts_with_port(443) == ["10.0.0.1"]
+    reader.close()
+
+
+# Test the optional JSON export writer
+@pytest.mark.asyncio
+async def test_json_export(tmp_path):
+    writer = ResultsWriter([JsonResultsWriter(str(tmp_path / "hosts"))], flush_interval=0.01)
+    writer.start()
+    writer.submit_host(make_host("10.0.0.2", {21: "ftp"}))
+    await writer.close()
+
+    with open(tmp_path / "hosts" / "10.0.0.2.json") as file:
+        data = json.load(file)
+    assert data["open_ports"] == [21]
+
+
+# Test that changes made to a host or scan result after it is queued do not leak into the stored snapshot
+@pytest.mark.asyncio
+async def test_writer_snapshots_host_on_submit(tmp_path):
+    store = SQLiteResultsStore(str(tmp_path / "results.db"))
+    writer = ResultsWriter([store], flush_interval=0.01)
+    writer.start()
+    host = make_host("10.0.0.3", {22: "ssh"})
+    writer.submit_host(host)
+    details = {"ports": [22]}
+    writer.submit_scan_result("scan_1", "port_scan", "10.0.0.3", details)
+    host.add_service(8080, "http-proxy")
+    host.scan_results["port_scan"]["ports"].append(8080)
+    details["ports"].append(8080)
+    await writer.close()
+
+    reader = SQLiteResultsStore(str(tmp_path / "results.db"))
+    stored = next(reader.iter_hosts())
+    assert stored["services"] == {22: "ssh"}
+    assert stored["scan_results"]["port_scan"]["ports"] == [22]
+    row = reader.connection.execute("SELECT result FROM scan_results WHERE scan_id = 'scan_1'").fetchone()
+    assert json.loads(row[0]) == {"ports": [22]}
+    reader.close()
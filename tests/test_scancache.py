@@ -0,0 +1,90 @@
+import pytest
+import threading
+import time
+from core.scancache import ScanCache
+
+DISCOVERY_ENTRY = {"args": "-sn", "description": "Host discovery scan", "priority": 10, "cache_ttl": 60}
+RESULT = {"10.0.0.1": {"state": "up", "ports": [80], "services": {80: "http"}}}
+
+
+# Test that keys depend on target, nmap arguments and extra args but not scheduling fields
+def test_cache_key_content_addressed():
+    key = ScanCache.make_key("10.0.0.1 10.0.0.2", DISCOVERY_ENTRY, "--script x")
+    assert key == ScanCache.make_key("10.0.0.2 10.0.0.1", dict(DISCOVERY_ENTRY, priority=99), "--script x")
+    assert key != ScanCache.make_key("10.0.0.1 10.0.0.2", DISCOVERY_ENTRY, "--script y")
+    assert key != ScanCache.make_key("10.0.0.1 10.0.0.2", dict(DISCOVERY_ENTRY, args="-sS"), "--script x")
+
+
+# Test hits, TTL expiry and restoration of integer service ports
+def test_cache_hit_and_expiry(tmp_path, monkeypatch):
+    cache = ScanCache(str(tmp_path / "cache.db"))
+    key = cache.make_key("10.0.0.1", DISCOVERY_ENTRY)
+    assert cache.get(key, ttl=60) is None
+    cache.put(key, "discovery", RESULT)
+
+    assert cache.get(key, ttl=60) == RESULT
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get(key, ttl=60) is None
+    assert cache.stats == {"hits": 1, "misses": 2, "expired": 1, "stores": 1, "evictions": 0}
+
+
+# Test least-recently-used eviction once the cache is full
+def test_cache_lru_eviction(tmp_path, monkeypatch):
+    cache = ScanCache(str(tmp_path / "cache.db"), max_entries=2)
+    clock = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    keys = [cache.make_key(f"10.0.0.{i}", DISCOVERY_ENTRY) for i in range(3)]
+
+    cache.put(keys[0], "discovery", RESULT)
+    clock[0] += 1
+    cache.put(keys[1], "discovery", RESULT)
+    clock[0] += 1
+    cache.get(keys[0], ttl=60)  # keys[1] is now least recently used
+    clock[0] += 1
+    cache.put(keys[2], "discovery", RESULT)
+
+    assert len(cache) == 2
+    assert cache.get(keys[1], ttl=60) is None
+    assert cache.get(keys[0], ttl=60) is not None
+    assert cache.stats["evictions"] == 1
+
+
+# Test that the row count behind the LRU bound ignores replaced keys and survives reopening the file
+def test_cache_row_count(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ScanCache(path, max_entries=2)
+    keys = [cache.make_key(f"10.0.0.{i}", DISCOVERY_ENTRY) for i in range(3)]
+    cache.put(keys[0], "discovery", RESULT)
+    cache.put(keys[0], "discovery", RESULT)
+    cache.put(keys[1], "discovery", RESULT)
+    assert cache.stats["evictions"] == 0
+    cache.close()
+
+    reopened = ScanCache(path, max_entries=2)
+    reopened.put(keys[2], "discovery", RESULT)
+    assert len(reopened) == 2 and reopened.stats["evictions"] == 1
+
+
+# Test that the asynchronous lookups and stores used by scans run on the cache thread, off the event loop
+@pytest.mark.asyncio
+async def test_cache_io_off_event_loop(tmp_path, monkeypatch):
+    cache = ScanCache(str(tmp_path / "cache.db"))
+    threads = []
+
+    def on_thread(method):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return method(*args)
+        return wrapper
+
+    monkeypatch.setattr(cache, "get", on_thread(cache.get))
+    monkeypatch.setattr(cache, "_write", on_thread(cache._write))
+    key = cache.make_key("10.0.0.1", DISCOVERY_ENTRY)
+
+    result = dict(RESULT)
+    await cache.store(key, "discovery", result)
+    result["10.0.0.2"] = {"state": "up"}  # Changes after the store are not written
+    assert await cache.lookup(key, ttl=60) == RESULT
+    assert len(threads) == 2 and all(name.startswith("scan-cache") for name in threads)
+    cache.close()
@@ -1,6 +1,16 @@
 import pytest
 import asyncio
+import os
 from core.scanmanager import ScanManager
+from utils.configcache import clear_config_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_config():
+    # Some tests patch `open`; never let them read from or poison the shared config cache
+    clear_config_cache()
+    yield
+    clear_config_cache()
 
 
 @pytest.fixture
@@ -88,3 +98,101 @@ def test_invalid_scan_config_keys(monkeypatch):
         m.setattr("builtins.open", mock_open)
         with pytest.raises(KeyError, match="discovery"):
             ScanManager()
+
+
+FAKE_NMAP = """#!/usr/bin/env python3
+import sys
+# Flood stderr first: reading stdout before stderr would deadlock once the pipe is full
+sys.stderr.write("warning: noisy nmap\\n" * 5000)
+sys.stderr.flush()
+targets = [arg for arg in sys.argv[1:] if arg[0].isdigit()]
+sys.stdout.write('<?xml version="1.0"?><nmaprun>')
+for target in targets:
+    sys.stdout.write(
+        f'<host><status state="up"/><address addr="{target}" addrtype="ipv4"/>'
+        '<ports><port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port></ports></host>'
+    )
+    sys.stdout.flush()
+sys.stdout.write('</nmaprun>')
+"""
+
+
+# Test streaming output handling against a fake nmap that floods stderr, and shutdown of the parser threads
+@pytest.mark.asyncio
+async def test_streaming_output_with_noisy_stderr(tmp_path):
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(FAKE_NMAP)
+    fake_nmap.chmod(0o755)
+    scan_manager = ScanManager(path=str(fake_nmap))
+    seen = []
+    scan_manager.host_callbacks.append(lambda scan_id, scan_type, ip, details: seen.append(ip))
+
+    scan_id = await scan_manager.start_scan(target="10.0.0.1 10.0.0.2", scan_type="discovery")
+    result = await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+
+    assert seen == ["10.0.0.1", "10.0.0.2"], "Hosts were not published as they were parsed."
+    assert result["10.0.0.2"]["services"] == {80: "http"}
+    assert scan_manager.scan_status[scan_id] == "completed"
+
+    await scan_manager.shutdown()
+    with pytest.raises(RuntimeError):
+        scan_manager.parse_executor.submit(int)
+
+
+FAILING_NMAP = """#!/usr/bin/env python3
+import sys
+sys.stderr.write("Failed to resolve \\"no-such-host.invalid\\".\\n")
+sys.exit(1)
+"""
+
+
+# Test that nmap failing with no XML output raises NmapExecutionError carrying its stderr, not a parse error
+@pytest.mark.asyncio
+async def test_failed_nmap_reports_stderr(tmp_path):
+    from nmap3.exceptions import NmapExecutionError
+
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(FAILING_NMAP)
+    fake_nmap.chmod(0o755)
+    scan_manager = ScanManager(path=str(fake_nmap))
+
+    scan_id = await scan_manager.start_scan(target="no-such-host.invalid", scan_type="discovery", use_cache=False)
+    with pytest.raises(NmapExecutionError, match="Failed to resolve"):
+        await asyncio.wait_for(scan_manager.wait_for_scan(scan_id), timeout=30)
+    assert scan_manager.scan_status[scan_id] == "errored"
+
+
+# Test that a repeated scan is answered from the scan cache without running nmap again
+@pytest.mark.asyncio
+async def test_repeated_scan_served_from_cache(tmp_path):
+    from core.scancache import ScanCache
+
+    fake_nmap = tmp_path / "nmap"
+    fake_nmap.write_text(FAKE_NMAP)
+    fake_nmap.chmod(0o755)
+    scan_manager = ScanManager(path=str(fake_nmap), scan_cache=ScanCache(str(tmp_path / "cache.db")))
+
+    first = await scan_manager.start_scan(target="10.0.0.3", scan_type="discovery")
+    await scan_manager.wait_for_scan(first)
+    second = await scan_manager.start_scan(target="10.0.0.3", scan_type="discovery")
+
+    assert scan_manager.scan_status[second] == "completed", "Cached scan should complete immediately."
+    assert scan_manager.get_scan_results(second) == scan_manager.get_scan_results(first)
+    assert scan_manager.cache_stats["hits"] == 1 and scan_manager.cache_stats["misses"] == 1
+
+
+# Test that instances share one parsed scan configuration and the file is re-read after it changes
+def test_scan_config_cached_until_modified(tmp_path, monkeypatch):
+    import json
+    import core.scanmanager
+
+    config_path = tmp_path / "scan_config.json"
+    config_path.write_text(json.dumps({"discovery": {"args": "-sn"}}))
+    monkeypatch.setattr(core.scanmanager, "SCAN_CONFIG_PATH", str(config_path))
+
+    first, second = ScanManager(), ScanManager()
+    assert first.scan_config is second.scan_config
+
+    config_path.write_text(json.dumps({"discovery": {"args": "-sn -PE"}}))
+    os.utime(config_path, ns=(0, 10**9))
+    assert ScanManager().scan_config["discovery"]["args"] == "-sn -PE"
@@ -0,0 +1,107 @@
+import pytest
+import asyncio
+from core.scheduler import ScanScheduler
+
+
+def make_job(log, name, delay=0.01):
+    async def job():
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+    return job
+
+
+# Test that the global concurrency cap is never exceeded
+@pytest.mark.asyncio
+async def test_global_limit_respected():
+    scheduler = ScanScheduler(max_concurrent=3)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        peak = max(peak, scheduler.running)
+        await asyncio.sleep(0.005)
+
+    futures = [scheduler.submit(f"job_{i}", "discovery", job) for i in range(50)]
+    await asyncio.gather(*futures)
+
+    assert peak <= 3, "Global concurrency limit was exceeded."
+    assert scheduler.stats()["completed"] == 50
+
+
+# Test per-scan-type limits while other types still make progress
+@pytest.mark.asyncio
+async def test_per_type_limit():
+    scheduler = ScanScheduler(max_concurrent=10, type_limits={"vulnerability": 1})
+    peak = {"vulnerability": 0, "discovery": 0}
+
+    async def job():
+        running = scheduler.stats()["running_by_type"]
+        for scan_type in peak:
+            peak[scan_type] = max(peak[scan_type], running.get(scan_type, 0))
+        await asyncio.sleep(0.005)
+
+    futures = [scheduler.submit(f"vuln_{i}", "vulnerability", job) for i in range(5)]
+    futures += [scheduler.submit(f"disc_{i}", "discovery", job) for i in range(5)]
+    await asyncio.gather(*futures)
+
+    assert peak["vulnerability"] == 1, "Per-type limit was not enforced."
+    assert peak["discovery"] == 5, "Other scan types were held back by the limit."
+
+
+# Test that jobs cancelled while queued stop counting towards the queue depth
+@pytest.mark.asyncio
+async def test_cancelled_queued_jobs_leave_queue_depth():
+    scheduler = ScanScheduler(max_concurrent=1)
+    log = []
+    blocker = scheduler.submit("blocker", "discovery", make_job(log, "blocker"))
+    queued = [scheduler.submit(f"job_{i}", "discovery", make_job(log, f"job_{i}")) for i in range(3)]
+    queued[1].cancel()
+    await asyncio.sleep(0)
+
+    assert scheduler.queue_depth == 2 and scheduler.stats()["queued"] == 2
+    await asyncio.gather(blocker, queued[0], queued[2])
+    assert scheduler.queue_depth == 0 and ("start", "job_1") not in log
+
+
+# Test that lower priority values are dispatched first
+@pytest.mark.asyncio
+async def test_priority_ordering():
+    scheduler = ScanScheduler(max_concurrent=1, type_priorities={"discovery": 10, "vulnerability": 80})
+    log = []
+    blocker = scheduler.submit("blocker", "discovery", make_job(log, "blocker"))
+    futures = [
+        scheduler.submit("vuln", "vulnerability", make_job(log, "vuln")),
+        scheduler.submit("disc", "discovery", make_job(log, "disc")),
+    ]
+    await asyncio.gather(blocker, *futures)
+
+    starts = [name for event, name in log if event == "start"]
+    assert starts == ["blocker", "disc", "vuln"], f"Unexpected dispatch order: {starts}"
+
+
+# Test that workflows share slots round-robin at equal priority
+@pytest.mark.asyncio
+async def test_fair_sharing_across_workflows():
+    scheduler = ScanScheduler(max_concurrent=1)
+    log = []
+    futures = [scheduler.submit(f"a{i}", "discovery", make_job(log, f"a{i}"), workflow_id="a") for i in range(3)]
+    futures += [scheduler.submit(f"b{i}", "discovery", make_job(log, f"b{i}"), workflow_id="b") for i in range(3)]
+    await asyncio.gather(*futures)
+
+    starts = [name[0] for event, name in log if event == "start"]
+    assert starts == ["a", "b", "a", "b", "a", "b"], f"Workflows were not interleaved: {starts}"
+
+
+# Test that job failures propagate through the returned future
+@pytest.mark.asyncio
+async def test_job_exception_propagates():
+    scheduler = ScanScheduler(max_concurrent=2)
+
+    async def job():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await scheduler.submit("bad", "discovery", job)
+    assert scheduler.running == 0
@@ -0,0 +1,65 @@
+import pytest
+from core.hostmanager import HostManager
+from core.scriptselector import ScriptSelector
+from core.workflowmanager import WorkflowManager, TemplatePhase2
+from tests.test_workflowmanager import FakeScanManager
+
+
+def host_with(ports, services=None):
+    host = HostManager("10.0.0.1")
+    host.update_from_scan("port_scan", {"ports": ports, "services": services or {}})
+    return host
+
+
+# Test that scripts are selected by open ports and services, and unknown hosts get the whole category
+def test_scripts_selected_by_ports_and_services():
+    selector = ScriptSelector(WorkflowManager.load_nse_configuration())
+
+    assert selector.select(host_with([445])) == {"smb-vuln-ms17-010"}
+    assert selector.select(host_with([8081], {8081: "http"})) == {"http-vuln-cve2017-5638"}
+    assert selector.select(host_with([443])) == {"http-vuln-cve2017-5638", "ssl-poodle"}
+    assert selector.select(host_with([22], {22: "ssh"})) == frozenset()
+    assert selector.select(HostManager("10.0.0.2")) == selector.everything
+
+    argument = selector.script_argument(selector.select(host_with([443, 21])))
+    assert argument == "--script http-vuln-cve2017-5638,ssl-poodle,ftp-vsftpd-backdoor"
+    assert selector.script_argument(selector.select(host_with([21, 443]))) is argument
+    assert selector.script_argument(frozenset()) is None
+
+
+class RecordingScanManager(FakeScanManager):
+    def __init__(self, discovery):
+        super().__init__(discovery, delays={})
+        self.arguments = {}
+
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None):
+        self.arguments[target] = additional_args
+        return await super().start_scan(target, scan_type, additional_args, workflow_id, priority)
+
+
+# Test that the vulnerability phase sends each host only its scripts and skips hosts with none
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pipelined", [False, True])
+async def test_vulnerability_phase_uses_selected_scripts(tmp_path, pipelined):
+    scan_manager = RecordingScanManager({"10.0.0.0/29": {
+        "10.0.0.1": {"state": "up", "ports": [80]},
+        "10.0.0.2": {"state": "up", "ports": [445]},
+        "10.0.0.3": {"state": "up", "ports": [22]},
+    }})
+    workflow = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/29"], pipelined=pipelined)
+    await workflow.execute_workflow()
+
+    assert scan_manager.arguments == {
+        "10.0.0.1": "--script http-vuln-cve2017-5638",
+        "10.0.0.2": "--script smb-vuln-ms17-010",
+    }
+    assert workflow.workflow_hosts["10.0.0.3"].get_metadata("scan_vulnerability_skipped") == "no applicable scripts"
+
+
+# Test that building arguments without a host returns None when the category has no scripts
+def test_build_arguments_without_host(tmp_path):
+    workflow = WorkflowManager(RecordingScanManager({}), str(tmp_path), ["10.0.0.0/29"])
+    workflow.nse_configuration = {"categories": {"vuln": {"scripts": []}}}
+    phase = TemplatePhase2("vulnerability", workflow)
+
+    assert phase.build_arguments() is None
@@ -0,0 +1,76 @@
+import pytest
+import asyncio
+import ipaddress
+from core.sharding import AdaptiveSharder, ShardedDiscovery
+
+
+def drain(sharder):
+    shards = []
+    while (shard := sharder.next_shard()) is not None:
+        shards.append(shard)
+    return shards
+
+
+# Test that shards cover the whole network without gaps or overlaps
+def test_shards_cover_network():
+    shards = drain(AdaptiveSharder("10.0.0.0/16", prefix=20))
+
+    assert len(shards) == 16
+    total = sum(ipaddress.ip_network(shard).num_addresses for shard in shards)
+    assert total == 65536, "Shards do not cover the network exactly."
+
+
+# Test that targets smaller than the shard size are scanned as a single unit
+def test_small_target_single_shard():
+    assert drain(AdaptiveSharder("192.168.1.7")) == ["192.168.1.7/32"]
+    assert drain(AdaptiveSharder("192.168.1.0/26")) == ["192.168.1.0/26"]
+
+
+# Test that IPv6 networks are not split into IPv4-sized shards and do not skew adaptation
+def test_ipv6_target_single_shard():
+    sharder = AdaptiveSharder("2001:db8::/64")
+    assert drain(sharder) == ["2001:db8::/64"]
+    sharder.record("2001:db8::/64", duration=1.0)
+    assert sharder.prefix == 24 and sharder.seconds_per_address is None
+
+    shards = drain(AdaptiveSharder(["10.0.0.0/23", "2001:db8::/48"], prefix=24))
+    assert shards == ["10.0.0.0/24", "10.0.1.0/24", "2001:db8::/48"]
+
+
+# Test that fast shards grow the shard size and slow shards shrink it
+def test_shard_size_adapts():
+    sharder = AdaptiveSharder("10.0.0.0/8", prefix=24, min_prefix=16, max_prefix=28, target_duration=60)
+    sharder.record(sharder.next_shard(), duration=1.0)
+    assert sharder.prefix == 23, "Fast shard should grow the next shard."
+
+    sharder = AdaptiveSharder("10.0.0.0/8", prefix=24, min_prefix=16, max_prefix=28, target_duration=60)
+    sharder.record(sharder.next_shard(), duration=600.0)
+    assert sharder.prefix == 25, "Slow shard should shrink the next shard."
+
+
+# Test that failing and cancelled shards are logged without losing the results of the others
+@pytest.mark.asyncio
+async def test_failed_shard_is_isolated():
+    class FlakyScanManager:
+        def __init__(self):
+            self.errors = []
+
+        async def run_discovery(self, target, workflow_id="default", scan_type="discovery"):
+            await asyncio.sleep(0)
+            if target == "10.0.1.0/24":
+                raise RuntimeError("nmap crashed")
+            if target == "10.0.2.0/24":
+                raise asyncio.CancelledError()
+            return {str(ipaddress.ip_network(target)[1]): {"state": "up"}}
+
+        def log_error(self, scan_id, error_message):
+            self.errors.append((scan_id, error_message))
+
+    scan_manager = FlakyScanManager()
+    discovery = ShardedDiscovery(scan_manager, max_in_flight=2, prefix=24, min_prefix=24)
+    results = [shard async for shard, _ in discovery.run("10.0.0.0/22")]
+
+    assert sorted(results) == ["10.0.0.0/24", "10.0.3.0/24"]
+    assert discovery.failed_shards == [{"shard": "10.0.1.0/24", "error": "nmap crashed"},
+                                       {"shard": "10.0.2.0/24", "error": "cancelled"}]
+    assert [scan_id for scan_id, _ in scan_manager.errors] == ["shard 10.0.1.0/24", "shard 10.0.2.0/24"]
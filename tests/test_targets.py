@@ -0,0 +1,45 @@
+import ipaddress
+from core.sharding import AdaptiveSharder
+from utils.targets import TargetSet, count_addresses
+
+
+# Test that overlapping and adjacent targets collapse into one range
+def test_overlapping_targets_collapse():
+    targets = TargetSet(["10.0.0.0/8", "10.1.0.0/16", "11.0.0.0/8", "192.168.1.5", "192.168.1.6-10"])
+
+    assert list(targets) == ["10.0.0.0/7", "192.168.1.5/32", "192.168.1.6/31", "192.168.1.8/31", "192.168.1.10/32"]
+    assert targets.num_addresses == 2 * 2 ** 24 + 6
+
+
+# Test that exclusions are subtracted and expansion is lazy
+def test_exclusions_subtracted():
+    targets = TargetSet(["10.0.0.0/8"], exclude=["10.0.0.0/9", "10.200.0.0/16", "10.255.255.255"])
+
+    assert "10.0.0.1" not in targets and "10.200.3.4" not in targets and "10.128.0.0" in targets
+    assert targets.num_addresses == 2 ** 23 - 2 ** 16 - 1
+    addresses = targets.addresses()
+    assert [next(addresses) for _ in range(2)] == ["10.128.0.0", "10.128.0.1"]
+
+
+# Test that address counting treats hostnames as single addresses instead of raising
+def test_count_addresses_with_hostnames():
+    assert count_addresses("10.0.0.0/30 10.0.0.2") == 4
+    assert count_addresses("scanme.nmap.org 10.0.0.0/31") == 3
+    assert count_addresses("") == 1
+
+
+# Test that target files are streamed, skipping comments, and sharding honours exclusions
+def test_target_file_sharding(tmp_path):
+    target_file = tmp_path / "targets.txt"
+    target_file.write_text("# lab\n10.0.0.0/24\n\n10.0.0.0/25  # duplicate\n10.0.1.0/24\n")
+    targets = TargetSet()
+    targets.add_file(str(target_file))
+    targets.exclude("10.0.0.128/26")
+
+    sharder = AdaptiveSharder(targets, prefix=24)
+    shards = []
+    while (shard := sharder.next_shard()) is not None:
+        shards.append(shard)
+
+    assert shards == ["10.0.0.0/25", "10.0.0.192/26", "10.0.1.0/24"]
+    assert sum(ipaddress.ip_network(shard).num_addresses for shard in shards) == targets.num_addresses
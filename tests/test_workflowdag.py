@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from core.workflowmanager import WorkflowManager
+from tests.test_workflowmanager import FakeScanManager
+
+BRANCHES = {"phases": {
+    "discovery": {"type": "discovery"},
+    "web": {"type": "vulnerability", "name": "Web", "scan_type": "vulnerability",
+            "input": {"ports": [80, 443]}, "depends_on": ["discovery"]},
+    "smb": {"type": "vulnerability", "name": "SMB", "scan_type": "port_scan",
+            "input": {"ports": [445]}, "depends_on": ["discovery"]},
+}}
+
+
+class TimedScanManager(FakeScanManager):
+    """Takes a fixed time per scan type and records when each scan starts and ends."""
+
+    def __init__(self, discovery, durations):
+        super().__init__(discovery, delays={})
+        self.durations = durations
+        self.scan_types = {}
+
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None):
+        self.scan_types[target] = scan_type
+        return await super().start_scan(target, scan_type, additional_args, workflow_id, priority)
+
+    async def wait_for_scan(self, scan_id):
+        scan_type = self.scan_types[scan_id]
+        self.events.append(("start", scan_type))
+        await asyncio.sleep(self.durations[scan_type])
+        self.events.append(("end", scan_type))
+        return await super().wait_for_scan(scan_id)
+
+
+# Test that independent phases run concurrently on their own inputs and the critical path is reported
+@pytest.mark.asyncio
+async def test_independent_phases_run_concurrently(tmp_path):
+    scan_manager = TimedScanManager(
+        {"10.0.0.0/29": {
+            "10.0.0.1": {"state": "up", "ports": [80]},
+            "10.0.0.2": {"state": "up", "ports": [445]},
+            "10.0.0.3": {"state": "up", "ports": [22]},
+        }},
+        durations={"vulnerability": 0.2, "port_scan": 0.05},
+    )
+    workflow = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/29"], workflow_config=BRANCHES)
+    await workflow.execute_workflow()
+
+    assert scan_manager.scan_types == {"10.0.0.1": "vulnerability", "10.0.0.2": "port_scan"}
+    scan_events = [event for event in scan_manager.events if event[0] in ("start", "end")]
+    assert scan_events[:2] == [("start", "vulnerability"), ("start", "port_scan")]
+
+    report = workflow.phase_report
+    assert report["critical_path"] == ["discovery", "web"]
+    assert report["phases"]["smb"]["start_seconds"] == pytest.approx(report["phases"]["web"]["start_seconds"], abs=0.01)
+    assert report["phases"]["web"]["duration_seconds"] >= 0.2 > report["phases"]["smb"]["duration_seconds"]
+    assert report["total_seconds"] < 0.2 + 0.05 + report["phases"]["discovery"]["duration_seconds"]
+
+
+# Test that disabled phases are bypassed and invalid graphs are rejected
+def test_workflow_graph_validation(tmp_path):
+    scan_manager = FakeScanManager({}, delays={})
+    default = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/29"])
+    assert [phase.phase_name for phase in default.workflow_phases] == ["Template Enumeration", "Template Tool Usage"]
+    assert default.workflow_dag.nodes["vulnerability"].depends_on == ("discovery",)
+    assert default.workflow_dag.is_chain()
+
+    full_ports = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/29"], full_port_scan=True)
+    assert [node.name for node in full_ports.workflow_dag.topological_order()] == [
+        "discovery", "full_ports", "vulnerability"]
+
+    cycle = {"phases": {
+        "discovery": {"type": "discovery", "depends_on": ["web"]},
+        "web": {"type": "vulnerability", "depends_on": ["discovery"]},
+    }}
+    shared_scan_type = {"phases": {
+        **BRANCHES["phases"], "smb": {**BRANCHES["phases"]["smb"], "scan_type": "vulnerability"},
+    }}
+    for workflow_config in (cycle, shared_scan_type, {"phases": {"web": {"type": "exploit"}}}):
+        with pytest.raises(ValueError):
+            WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/29"], workflow_config=workflow_config)
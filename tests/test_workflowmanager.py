@@ -0,0 +1,132 @@
+import pytest
+import asyncio
+from core.workflowmanager import WorkflowManager
+from core.metrics import MetricsRegistry
+
+
+class FakeScanManager:
+    """Stands in for ScanManager with canned discovery results and instant vulnerability scans."""
+
+    def __init__(self, discovery, delays):
+        self.discovery = discovery
+        self.delays = delays
+        self.events = []
+        self.results = {}
+        self.metrics = MetricsRegistry()
+
+    async def run_discovery(self, target, workflow_id="default", scan_type="discovery"):
+        await asyncio.sleep(self.delays.get(target, 0))
+        self.events.append(("discovered", target))
+        return self.discovery[target]
+
+    async def start_scan(self, target, scan_type, additional_args=None, workflow_id="default", priority=None):
+        self.events.append(("scanned", target))
+        self.results[target] = {ip: {"ports": [80], "services": {80: "http"}} for ip in target.split()}
+        return target
+
+    async def wait_for_scan(self, scan_id):
+        return self.results[scan_id]
+
+
+@pytest.fixture
+def fake_scan_manager():
+    return FakeScanManager(
+        discovery={
+            "10.0.0.0/30": {"10.0.0.1": {"state": "up"}, "10.0.0.2": {"state": "down"}},
+            "10.0.1.0/30": {"10.0.1.1": {"state": "up"}},
+        },
+        delays={"10.0.0.0/30": 0.0, "10.0.1.0/30": 0.05},
+    )
+
+
+# Test that the sequential workflow still scans every live host
+@pytest.mark.asyncio
+async def test_sequential_workflow(fake_scan_manager, tmp_path):
+    workflow = WorkflowManager(fake_scan_manager, str(tmp_path), ["10.0.0.0/30", "10.0.1.0/30"])
+    await workflow.execute_workflow()
+
+    assert set(workflow.workflow_hosts) == {"10.0.0.1", "10.0.1.1"}
+    assert workflow.workflow_hosts["10.0.0.1"].open_ports == [80]
+
+
+# Test that pipelined mode starts vulnerability scans before discovery has finished
+@pytest.mark.asyncio
+async def test_pipelined_workflow_streams_hosts(fake_scan_manager, tmp_path):
+    workflow = WorkflowManager(fake_scan_manager, str(tmp_path), ["10.0.0.0/30", "10.0.1.0/30"], pipelined=True)
+    await workflow.execute_workflow()
+
+    events = fake_scan_manager.events
+    assert events.index(("scanned", "10.0.0.1")) < events.index(("discovered", "10.0.1.0/30")), events
+    assert workflow.workflow_hosts["10.0.1.1"].services == {80: "http"}
+
+
+# Test that batched mode scans hosts sharing arguments in one invocation
+@pytest.mark.asyncio
+async def test_batched_workflow(fake_scan_manager, tmp_path):
+    workflow = WorkflowManager(fake_scan_manager, str(tmp_path), ["10.0.0.0/30", "10.0.1.0/30"], batch_scans=True)
+    await workflow.execute_workflow()
+
+    scans = [target for event, target in fake_scan_manager.events if event == "scanned"]
+    assert len(scans) == 1 and set(scans[0].split()) == {"10.0.0.1", "10.0.1.1"}
+    assert workflow.workflow_hosts["10.0.1.1"].open_ports == [80]
+
+
+# Test that pipelined batching flushes partial batches when the stream ends
+@pytest.mark.asyncio
+async def test_pipelined_batched_workflow(fake_scan_manager, tmp_path):
+    workflow = WorkflowManager(
+        fake_scan_manager, str(tmp_path), ["10.0.0.0/30", "10.0.1.0/30"], pipelined=True, batch_scans=True
+    )
+    await workflow.execute_workflow()
+
+    assert all(host.open_ports == [80] for host in workflow.workflow_hosts.values())
+
+
+# Test that delta mode only rescans new or changed hosts and carries forward the rest
+@pytest.mark.asyncio
+async def test_delta_workflow(tmp_path):
+    scan_manager = FakeScanManager(
+        discovery={
+            "10.0.0.0/30": {
+                "10.0.0.1": {"state": "up", "ports": [22]},
+                "10.0.0.2": {"state": "up", "ports": [22, 80]},
+                "10.0.0.3": {"state": "up", "ports": [443]},
+            },
+        },
+        delays={},
+    )
+    previous_inventory = [
+        {"ip_address": "10.0.0.1", "metadata": {"sweep_fingerprint": "22"}, "open_ports": [22],
+         "services": {"22": "ssh"}, "scan_results": {"vulnerability": {"ports": [22], "old": True}}},
+        {"ip_address": "10.0.0.2", "metadata": {"sweep_fingerprint": "22"}, "open_ports": [22],
+         "services": {}, "scan_results": {}},
+        {"ip_address": "10.0.0.9", "metadata": {"sweep_fingerprint": "21"}, "open_ports": [21],
+         "services": {}, "scan_results": {}},
+    ]
+    workflow = WorkflowManager(scan_manager, str(tmp_path), ["10.0.0.0/30"], previous_inventory=previous_inventory)
+    await workflow.execute_workflow()
+
+    scanned = {target for event, target in scan_manager.events if event == "scanned"}
+    assert scanned == {"10.0.0.2", "10.0.0.3"}
+    assert workflow.delta_summary == {
+        "new": ["10.0.0.3"], "changed": ["10.0.0.2"], "unchanged": ["10.0.0.1"], "missing": [],
+    }
+    assert workflow.workflow_hosts["10.0.0.1"].scan_results["vulnerability"]["old"] is True
+    assert workflow.workflow_hosts["10.0.0.1"].services == {22: "ssh"}
+
+
+# Test that a delta run over one subnet only marks missing hosts inside its targets as down
+@pytest.mark.asyncio
+async def test_delta_workflow_limited_to_targets(tmp_path):
+    scan_manager = FakeScanManager(discovery={"10.0.5.0/30": {"10.0.5.1": {"state": "up", "ports": [22]}}}, delays={})
+    previous_inventory = [
+        {"ip_address": ip_address, "metadata": {"sweep_fingerprint": "22", "state": "up"}, "open_ports": [22],
+         "services": {}, "scan_results": {}}
+        for ip_address in ("10.0.5.1", "10.0.5.2", "10.0.6.1")
+    ]
+    workflow = WorkflowManager(scan_manager, str(tmp_path), ["10.0.5.0/30"], previous_inventory=previous_inventory)
+    await workflow.execute_workflow()
+
+    assert workflow.delta_summary["missing"] == ["10.0.5.2"]
+    assert set(workflow.previous_hosts) == {"10.0.5.1", "10.0.5.2"}
+    assert workflow.previous_hosts["10.0.5.2"].get_metadata("state") == "down"
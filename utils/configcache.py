@@ -0,0 +1,44 @@
+import json
+import os
+import threading
+
+# path -> ((mtime_ns, size), parsed document)
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_json_config(path):
+    """
+    Load a JSON configuration file, parsing it only when it changed on disk.
+
+    The parsed document is shared by every caller, so ScanManager and
+    WorkflowManager instances created in one process reuse a single copy.
+    Treat it as read-only; copy it before making local changes.
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        The parsed JSON document.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        json.JSONDecodeError: If the file is not valid JSON.
+    """
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _lock:
+        with open(path, "r") as file:
+            document = json.load(file)
+        _cache[path] = (signature, document)
+    return document
+
+
+def clear_config_cache():
+    """Forget every cached configuration so the next load reads from disk."""
+    with _lock:
+        _cache.clear()
@@ -1,42 +1,170 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
+from config.config import LOG_MAX_BYTES, LOG_BACKUP_COUNT
 
-def create_logger(name, log_file, level=logging.INFO):
+# One background listener per configured logger name, and one file handler per log file
+_listeners = {}
+_file_handlers = {}
+_console_handler = None
+_lock = threading.Lock()
+
+FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def create_logger(name, log_file, level=logging.INFO, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                  when=None, console=True):
     """
     Creates and configures a logger for the application.
 
+    Records are handed to a queue and written by a background listener thread,
+    so logging never blocks the event loop on disk or console I/O. Calling this
+    again for the same name returns the existing logger without adding handlers.
+
     Args:
         name (str): Name of the logger.
         log_file (str): Path to the log file.
         level (int): Logging level (default: logging.INFO).
+        max_bytes (int): Rotate the file once it reaches this size (0 disables size rotation).
+        backup_count (int): Number of rotated files to keep.
+        when (str): Rotate on time instead of size, e.g. "midnight" or "H" (see TimedRotatingFileHandler).
+        console (bool): Also write records to stderr.
 
     Returns:
         logging.Logger: Configured logger instance.
     """
-    # Ensure the directory for the log file exists
-    log_dir = os.path.dirname(log_file)
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    # Create and configure the logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    with _lock:
+        if name in _listeners:
+            return logger
+
+        log_queue = queue.SimpleQueue()
+        handlers = [_file_handler(log_file, max_bytes, backup_count, when)]
+        if console:
+            handlers.append(_get_console_handler())
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
+        logger.addHandler(_QueueHandler(log_queue))
+    return logger
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve the message now (its args may change later) but leave formatting to the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
-    # Create a file handler
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(level)
 
-    # Create a console handler for debugging
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
+def _file_handler(log_file, max_bytes, backup_count, when):
+    path = os.path.abspath(log_file)
+    handler = _file_handlers.get(path)
+    if handler is None:
+        # Ensure the directory for the log file exists
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if when:
+            handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count)
+        else:
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+        handler.setFormatter(FORMATTER)
+        _file_handlers[path] = handler
+    return handler
+
+
+def _get_console_handler():
+    global _console_handler
+    if _console_handler is None:
+        _console_handler = logging.StreamHandler()
+        _console_handler.setFormatter(FORMATTER)
+    return _console_handler
+
+
+class OutputRateFilter(logging.Filter):
+    """
+    Samples and rate-limits high-volume records such as raw nmap output lines.
+
+    One line out of every `sample_every` is kept, then at most `max_per_second`
+    lines per second pass. Dropped lines are counted and reported on the next
+    record that gets through.
+    """
 
-    # Define a standard log format
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+    def __init__(self, sample_every=1, max_per_second=0):
+        """
+        Args:
+            sample_every (int): Keep one line out of every `sample_every`.
+            max_per_second (float): Maximum lines kept per second (0 = unlimited).
+        """
+        super().__init__()
+        self.sample_every = max(1, int(sample_every))
+        self.max_per_second = max_per_second
+        self.seen = 0
+        self.suppressed = 0
+        self.window_start = time.monotonic()
+        self.window_count = 0
+
+    def filter(self, record):
+        self.seen += 1
+        if self.seen % self.sample_every:
+            self.suppressed += 1
+            return False
+        if self.max_per_second:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            if self.window_count >= self.max_per_second:
+                self.suppressed += 1
+                return False
+            self.window_count += 1
+        if self.suppressed:
+            record.msg = f"{record.getMessage()} ({self.suppressed} similar lines suppressed)"
+            record.args = None
+            self.suppressed = 0
+        return True
+
+
+def create_output_logger(parent, sample_every=1, max_per_second=0):
+    """
+    Returns a child logger for raw tool output, with sampling and rate limiting applied.
+
+    Records propagate to the parent's handlers, so they end up in the same file.
+
+    Args:
+        parent (logging.Logger): Logger whose handlers receive the output.
+        sample_every (int): Keep one line out of every `sample_every`.
+        max_per_second (float): Maximum lines kept per second (0 = unlimited).
+
+    Returns:
+        logging.Logger: The output logger.
+    """
+    logger = parent.getChild("output")
+    if not any(isinstance(existing, OutputRateFilter) for existing in logger.filters):
+        logger.addFilter(OutputRateFilter(sample_every, max_per_second))
+    return logger
+
+
+def stop_logging():
+    """
+    Flush and stop every background listener; loggers created afterwards start new ones.
+    """
+    with _lock:
+        for listener in _listeners.values():
+            listener.stop()
+        for name in _listeners:
+            logger = logging.getLogger(name)
+            for handler in list(logger.handlers):
+                if isinstance(handler, logging.handlers.QueueHandler):
+                    logger.removeHandler(handler)
+        _listeners.clear()
+        for handler in _file_handlers.values():
+            handler.close()
+        _file_handlers.clear()
 
-    # Add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
 
-    return logger
\ No newline at end of file
+atexit.register(stop_logging)
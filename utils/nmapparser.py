@@ -0,0 +1,163 @@
+from xml.etree import ElementTree as ET
+
+
+def parse_host(host_element):
+    """
+    Convert a single nmap XML <host> element into the host dictionary used by the workflow.
+
+    Args:
+        host_element (xml.etree.ElementTree.Element): A <host> element from nmap's XML output.
+
+    Returns:
+        tuple: The host's IP address and its details, or (None, None) if it has no address.
+    """
+    ip_address = None
+    for address in host_element.findall("address"):
+        if address.get("addrtype") in ("ipv4", "ipv6"):
+            ip_address = address.get("addr")
+            break
+    if ip_address is None:
+        return None, None
+
+    status = host_element.find("status")
+    details = {
+        "state": status.get("state") if status is not None else "unknown",
+        "hostnames": [hostname.get("name") for hostname in host_element.findall("hostnames/hostname")],
+        "ports": [],
+        "services": {},
+        "scripts": {},
+    }
+
+    for port in host_element.findall("ports/port"):
+        state = port.find("state")
+        if state is None or state.get("state") != "open":
+            continue
+        port_id = int(port.get("portid"))
+        details["ports"].append(port_id)
+        service = port.find("service")
+        if service is not None and service.get("name"):
+            details["services"][port_id] = service.get("name")
+        for script in port.findall("script"):
+            details["scripts"].setdefault(str(port_id), {})[script.get("id")] = script.get("output")
+
+    for script in host_element.findall("hostscript/script"):
+        details["scripts"].setdefault("host", {})[script.get("id")] = script.get("output")
+
+    return ip_address, details
+
+
+def parse_task_progress(element):
+    """
+    Convert an nmap <taskprogress> or <taskend> element (written with --stats-every) into a progress record.
+
+    Args:
+        element (xml.etree.ElementTree.Element): e.g.
+            <taskprogress task="SYN Stealth Scan" time="1700000000" percent="24.60" remaining="31" etc="1700000031"/>
+
+    Returns:
+        dict: Task name, percent complete, seconds remaining and estimated completion time (epoch seconds).
+    """
+    if element.tag == "taskend":
+        finished_at = int(element.get("time", 0))
+        return {"task": element.get("task"), "percent": 100.0, "remaining": 0, "eta": finished_at}
+    return {
+        "task": element.get("task"),
+        "percent": float(element.get("percent", 0)),
+        "remaining": int(element.get("remaining", 0)),
+        "eta": int(element.get("etc", 0)),
+    }
+
+
+def parse_hosts(xml_root):
+    """
+    Parse every <host> element of an nmap XML document.
+
+    Args:
+        xml_root (xml.etree.ElementTree.Element): Root <nmaprun> element.
+
+    Returns:
+        dict: Mapping of IP address to host details (see `parse_host`).
+    """
+    hosts = {}
+    for host_element in xml_root.iter("host"):
+        ip_address, details = parse_host(host_element)
+        if ip_address is not None:
+            hosts[ip_address] = details
+    return hosts
+
+
+class StreamingHostParser:
+    """
+    Incremental parser for nmap XML output.
+
+    Bytes are fed as they arrive from the subprocess; every <host> element is
+    converted as soon as it closes and then dropped from the tree, so memory
+    stays flat no matter how large the output grows. Task progress records
+    are collected in `progress` for the caller to take.
+    """
+
+    def __init__(self, host_parser=parse_host):
+        """
+        Args:
+            host_parser (callable): Converts a <host> element into (ip, details).
+        """
+        self.host_parser = host_parser
+        self.bytes_fed = 0
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+        self.progress = []
+
+    def feed(self, chunk):
+        """
+        Feed a chunk of raw XML output.
+
+        Args:
+            chunk (bytes): Next piece of nmap's stdout.
+
+        Returns:
+            list: (ip, details) tuples for every host completed by this chunk.
+        """
+        self.bytes_fed += len(chunk)
+        self._parser.feed(chunk)
+        return self._collect()
+
+    def close(self):
+        """
+        Finish parsing and return any hosts completed by the final bytes.
+
+        Raises:
+            xml.etree.ElementTree.ParseError: If the output was truncated or malformed.
+        """
+        self._parser.close()
+        return self._collect()
+
+    def _collect(self):
+        hosts = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                self._depth += 1
+                continue
+
+            self._depth -= 1
+            if self._depth != 1:
+                continue
+            # Direct children of <nmaprun> are complete here; convert hosts and release everything
+            if element.tag == "host":
+                ip_address, details = self.host_parser(element)
+                if ip_address is not None:
+                    hosts.append((ip_address, details))
+            elif element.tag in ("taskprogress", "taskend"):
+                self.progress.append(parse_task_progress(element))
+            self._root.remove(element)
+        return hosts
+
+    def take_progress(self):
+        """
+        Returns:
+            list: Progress records parsed since the last call (see `parse_task_progress`).
+        """
+        progress, self.progress = self.progress, []
+        return progress
@@ -1,11 +1,17 @@
 import os
-import psutil
 import socket
 import ipaddress
 from utils.logger import create_logger
-from config.config import RESULTS_DIR
+from config.config import RESULTS_DIR, LOGS_DIR
+from utils.targets import TargetSet, parse_target
+
+
+def get_logger():
+    """
+    Returns the stager logger, creating it (and its log file) on first use rather than at import.
+    """
+    return create_logger("stager", os.path.join(LOGS_DIR, "stager.log"))
 
-logger = create_logger("stager", "logs/stager.log")
 
 def create_dir_structure():
     """
@@ -21,6 +27,8 @@ def get_interfaces_and_subnets():
     Returns:
         list: A list of tuples containing the interface name and its subnet.
     """
+    import psutil  # Only needed for interactive target selection
+
     interfaces_with_subnets = []
     addresses = psutil.net_if_addrs()
 
@@ -45,7 +53,7 @@ def get_subnet_choice():
 
     if not interfaces_with_subnets:
         print("No network interfaces with IPv4 subnets available.")
-        logger.error("No network interfaces with IPv4 subnets available.")
+        get_logger().error("No network interfaces with IPv4 subnets available.")
         return None
 
     print("Available network interfaces and subnets:")
@@ -57,7 +65,7 @@ def get_subnet_choice():
             choice = int(input("Select a network interface by number: "))
             if 1 <= choice <= len(interfaces_with_subnets):
                 selected = interfaces_with_subnets[choice - 1]
-                logger.info(f"Selected interface: {selected[0]}, Subnet: {selected[1]}")
+                get_logger().info(f"Selected interface: {selected[0]}, Subnet: {selected[1]}")
                 return selected
             else:
                 print("Invalid choice. Please select a valid number.")
@@ -77,7 +85,7 @@ def stage_discovery():
         return result
     else:
         print("No valid interface selected.")
-        logger.error("No valid interface selected during discovery.")
+        get_logger().error("No valid interface selected during discovery.")
         return None
 
 def handle_options(target_input):
@@ -85,52 +93,61 @@ def handle_options(target_input):
     Validate and process the target input provided via the `-t` option.
 
     Args:
-        target_input (list): A list of target strings (e.g., IPs or CIDR).
+        target_input (list): A list of target strings (e.g., IPs, CIDR or ranges like 10.0.0.1-50).
 
     Returns:
-        list: A list of validated targets (IP or CIDR).
+        list: A list of validated targets.
     """
     targets = []
     for target in target_input:
         try:
-            # Check if target is a valid IP or CIDR
-            ip = ipaddress.ip_network(target, strict=False)
-            targets.append(str(ip))
+            # Check if target is a valid IP, CIDR or range
+            parse_target(target)
+            targets.append(target.strip())
         except ValueError:
-            logger.error(f"Invalid target format: {target}")
+            get_logger().error(f"Invalid target format: {target}")
             raise ValueError(f"Invalid target format: {target}")
-    logger.info(f"Validated targets: {targets}")
+    get_logger().info(f"Validated targets: {targets}")
     return targets
 
 def determine_target(args):
     """
     Determine the scanning target based on program arguments or interactive selection.
 
+    Targets from `-t` and `--target-file` are merged into one TargetSet, and
+    `--exclude` / `--exclude-file` entries are subtracted from it. Target files
+    are streamed line by line.
+
     Args:
         args (argparse.Namespace): Parsed command-line arguments.
 
     Returns:
-        list: A list of targets (IP or CIDR) for scanning.
+        TargetSet: The collapsed targets for scanning.
     """
-    if args.target:
-        # Validate targets provided via the `-t` option
-        try:
-            targets = handle_options(args.target)
-            logger.info(f"Targets specified via command line: {targets}")
-            return targets
-        except ValueError as e:
-            logger.error(f"Invalid target: {e}")
-            print(f"Error: {e}")
-            exit(1)
-    else:
-        # Fallback to interactive selection
-        result = stage_discovery()
-        if result:
-            return [result[1]]  # Return only the subnet
+    try:
+        if args.target or args.target_file:
+            # Validate targets provided via the `-t` option
+            targets = TargetSet(handle_options(args.target or []))
+            for path in args.target_file or []:
+                targets.add_file(path)
+            get_logger().info(f"Targets specified via command line: {targets}")
         else:
-            logger.error("No valid target or subnet selected.")
-            print("Error: No valid target or subnet selected. Exiting.")
-            exit(1)
+            # Fallback to interactive selection
+            result = stage_discovery()
+            if not result:
+                get_logger().error("No valid target or subnet selected.")
+                print("Error: No valid target or subnet selected. Exiting.")
+                exit(1)
+            targets = TargetSet([result[1]])  # Only the subnet
+
+        targets.exclude_all(args.exclude or [])
+        for path in args.exclude_file or []:
+            targets.exclude_file(path)
+        return targets
+    except (ValueError, OSError) as e:
+        get_logger().error(f"Invalid target: {e}")
+        print(f"Error: {e}")
+        exit(1)
 
 def sanitize_target(target):
     """
@@ -0,0 +1,304 @@
+import ipaddress
+from array import array
+from bisect import bisect_right
+from heapq import merge
+
+# Pending intervals are sorted into the compact store once this many have been added
+COMPACT_THRESHOLD = 65536
+
+
+def _ipv4_to_int(text):
+    parts = text.split(".")
+    if len(parts) != 4:
+        return None
+    value = 0
+    for part in parts:
+        if not (part.isascii() and part.isdigit()) or len(part) > 3 or (len(part) > 1 and part[0] == "0"):
+            return None
+        octet = int(part)
+        if octet > 255:
+            return None
+        value = value << 8 | octet
+    return value
+
+
+def parse_target(target):
+    """
+    Parse one target into an inclusive integer interval.
+
+    Accepts an IP address, a CIDR network or a range such as
+    `10.0.0.10-10.0.0.50` (or the short form `10.0.0.10-50`).
+
+    Args:
+        target (str): The target string.
+
+    Returns:
+        tuple: (version, first, last) with `first` and `last` as integers.
+
+    Raises:
+        ValueError: If the target is not a valid address, network or range.
+    """
+    target = target.strip()
+    # Fast path for plain IPv4 addresses and networks, the bulk of large target files
+    address, _, prefix = target.partition("/")
+    value = _ipv4_to_int(address)
+    if value is not None and (not prefix or (prefix.isdigit() and int(prefix) <= 32)):
+        host_bits = 32 - int(prefix or 32)
+        first = value >> host_bits << host_bits
+        return 4, first, first + (1 << host_bits) - 1
+    if "-" in target:
+        first, last = target.split("-", 1)
+        first = ipaddress.ip_address(first.strip())
+        last = last.strip()
+        if last.isdigit() and first.version == 4:
+            last = ".".join(str(first).split(".")[:3] + [last])
+        last = ipaddress.ip_address(last)
+        if first.version != last.version or int(last) < int(first):
+            raise ValueError(f"Invalid target range: {target}")
+        return first.version, int(first), int(last)
+    network = ipaddress.ip_network(target, strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+
+class _IntervalStore:
+    """
+    Sorted, disjoint, inclusive integer intervals of one address family.
+
+    IPv4 bounds are kept in two `array('I')` (8 bytes per interval), so
+    millions of scattered targets stay small; IPv6 bounds need plain lists.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.starts, self.ends = self._empty()
+        self.pending = []
+
+    def _empty(self):
+        if self.version == 4:
+            return array("I"), array("I")
+        return [], []
+
+    def add(self, first, last):
+        self.pending.append((first, last))
+        if len(self.pending) >= COMPACT_THRESHOLD:
+            self.compact()
+
+    def compact(self):
+        """Merge pending intervals into the sorted store, coalescing overlapping and adjacent ones."""
+        if not self.pending:
+            return
+        self.pending.sort()
+        starts, ends = self._empty()
+        for first, last in merge(zip(self.starts, self.ends), self.pending):
+            if ends and first <= ends[-1] + 1:
+                if last > ends[-1]:
+                    ends[-1] = last
+            else:
+                starts.append(first)
+                ends.append(last)
+        self.starts, self.ends = starts, ends
+        self.pending = []
+
+    def __iter__(self):
+        self.compact()
+        return zip(self.starts, self.ends)
+
+    def __len__(self):
+        self.compact()
+        return len(self.starts)
+
+
+def subtract(included, excluded):
+    """
+    Subtract one sorted interval sequence from another in a single linear sweep.
+
+    Args:
+        included (iterable): Sorted, disjoint (first, last) intervals.
+        excluded (iterable): Sorted, disjoint (first, last) intervals to remove.
+
+    Yields:
+        tuple: The remaining (first, last) intervals, in order.
+    """
+    excluded = iter(excluded)
+    hole = next(excluded, None)
+    for first, last in included:
+        while hole is not None and hole[1] < first:
+            hole = next(excluded, None)
+        while hole is not None and hole[0] <= last:
+            if hole[0] > first:
+                yield first, hole[0] - 1
+            if hole[1] >= last:
+                break
+            first = hole[1] + 1
+            hole = next(excluded, None)
+        else:
+            yield first, last
+
+
+class TargetSet:
+    """
+    A set of scan targets held as address intervals.
+
+    Overlapping and adjacent targets collapse into one interval, so
+    10.0.0.0/8 plus 10.1.0.0/16 is scanned once. Exclusions are subtracted
+    interval by interval, never address by address, and expansion into CIDR
+    blocks or single addresses is lazy, so a /8 or a target file with
+    millions of lines never has to be materialised.
+    """
+
+    def __init__(self, targets=(), exclude=()):
+        """
+        Args:
+            targets (iterable): Target strings (IPs, CIDRs or ranges).
+            exclude (iterable): Target strings to leave out.
+        """
+        self._included = {4: _IntervalStore(4), 6: _IntervalStore(6)}
+        self._excluded = {4: _IntervalStore(4), 6: _IntervalStore(6)}
+        self._resolved = None
+        self.update(targets)
+        self.exclude_all(exclude)
+
+    @classmethod
+    def coerce(cls, targets):
+        """Return `targets` unchanged if it already is a TargetSet, else build one from strings."""
+        if isinstance(targets, cls):
+            return targets
+        if isinstance(targets, str):
+            targets = targets.split()
+        return cls(targets)
+
+    def _store(self, stores, target):
+        version, first, last = parse_target(target)
+        stores[version].add(first, last)
+        self._resolved = None
+
+    def add(self, target):
+        self._store(self._included, target)
+
+    def exclude(self, target):
+        self._store(self._excluded, target)
+
+    def update(self, targets):
+        for target in targets:
+            self.add(target)
+
+    def exclude_all(self, targets):
+        for target in targets:
+            self.exclude(target)
+
+    def copy(self):
+        """
+        Returns:
+            TargetSet: An independent set with the same addresses (exclusions already applied).
+        """
+        clone = TargetSet()
+        for version, store in self._resolve().items():
+            clone_store = clone._included[version]
+            clone_store.starts.extend(store.starts)
+            clone_store.ends.extend(store.ends)
+        return clone
+
+    @staticmethod
+    def read_lines(path):
+        """
+        Stream targets from a file, one per line; blank lines and `#` comments are skipped.
+
+        Args:
+            path (str): Path of the target file.
+
+        Yields:
+            str: Each target.
+        """
+        with open(path, "r") as file:
+            for line in file:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    yield line
+
+    def add_file(self, path):
+        self.update(self.read_lines(path))
+
+    def exclude_file(self, path):
+        self.exclude_all(self.read_lines(path))
+
+    def _resolve(self):
+        if self._resolved is None:
+            resolved = {}
+            for version in (4, 6):
+                store = _IntervalStore(version)
+                for first, last in subtract(self._included[version], self._excluded[version]):
+                    store.starts.append(first)
+                    store.ends.append(last)
+                resolved[version] = store
+            self._resolved = resolved
+        return self._resolved
+
+    def intervals(self):
+        """
+        Yields:
+            tuple: (version, first, last) for every target interval after exclusions, IPv4 first.
+        """
+        for version, store in self._resolve().items():
+            for first, last in store:
+                yield version, first, last
+
+    def networks(self):
+        """
+        Yields:
+            str: The fewest CIDR blocks that exactly cover the targets, in address order.
+        """
+        for version, first, last in self.intervals():
+            address = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            for network in ipaddress.summarize_address_range(address(first), address(last)):
+                yield str(network)
+
+    def addresses(self):
+        """
+        Yields:
+            str: Every target address, in order.
+        """
+        for version, first, last in self.intervals():
+            address = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+            for value in range(first, last + 1):
+                yield str(address(value))
+
+    @property
+    def num_addresses(self):
+        return sum(last - first + 1 for _, first, last in self.intervals())
+
+    def __iter__(self):
+        return self.networks()
+
+    def __bool__(self):
+        return any(len(store) for store in self._resolve().values())
+
+    def __contains__(self, ip_address):
+        address = ipaddress.ip_address(ip_address)
+        store = self._resolve()[address.version]
+        value = int(address)
+        index = bisect_right(store.starts, value)
+        return index > 0 and value <= store.ends[index - 1]
+
+    def __repr__(self):
+        intervals = sum(len(store) for store in self._resolve().values())
+        return f"TargetSet({intervals} ranges, {self.num_addresses} addresses)"
+
+
+def count_addresses(target):
+    """
+    Count the addresses of a space-separated target string.
+
+    Tokens that are not addresses, networks or ranges (hostnames, for
+    instance) count as one address each instead of raising.
+
+    Returns:
+        int: The number of addresses, at least 1.
+    """
+    addresses = TargetSet()
+    names = 0
+    for token in target.split():
+        try:
+            addresses.add(token)
+        except ValueError:
+            names += 1
+    return max(addresses.num_addresses + names, 1)